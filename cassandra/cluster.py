@@ -19,8 +19,8 @@ This module houses the main classes you will interact with,
 from __future__ import absolute_import
 
 import atexit
-from collections import defaultdict, Mapping
-from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as wait_futures
+from collections import defaultdict, deque, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait as wait_futures
 from copy import copy
 from functools import partial, wraps
 from itertools import groupby, count
@@ -58,18 +58,20 @@ from cassandra.protocol import (QueryMessage, ResultMessage,
                                 IsBootstrappingErrorMessage,
                                 BatchMessage, RESULT_KIND_PREPARED,
                                 RESULT_KIND_SET_KEYSPACE, RESULT_KIND_ROWS,
-                                RESULT_KIND_SCHEMA_CHANGE, ProtocolHandler)
+                                RESULT_KIND_SCHEMA_CHANGE, ProtocolHandler,
+                                EncodedRowsProtocolHandler)
 from cassandra.metadata import Metadata, protect_name, murmur3
 from cassandra.policies import (TokenAwarePolicy, DCAwareRoundRobinPolicy, SimpleConvictionPolicy,
                                 ExponentialReconnectionPolicy, HostDistance,
                                 RetryPolicy, IdentityTranslator, NoSpeculativeExecutionPlan,
-                                NoSpeculativeExecutionPolicy)
+                                NoSpeculativeExecutionPolicy, LatencyTracker)
 from cassandra.pool import (Host, _ReconnectionHandler, _HostReconnectionHandler,
                             HostConnectionPool, HostConnection,
                             NoConnectionsAvailable)
 from cassandra.query import (SimpleStatement, PreparedStatement, BoundStatement,
                              BatchStatement, bind_params, QueryTrace, TraceUnavailable,
-                             named_tuple_factory, dict_factory, tuple_factory, FETCH_SIZE_UNSET)
+                             named_tuple_factory, dict_factory, tuple_factory, lazy_row_factory,
+                             FETCH_SIZE_UNSET)
 from cassandra.timestamps import MonotonicTimestampGenerator
 
 
@@ -88,7 +90,8 @@ def _is_gevent_monkey_patched():
 
 # default to gevent when we are monkey patched with gevent, eventlet when
 # monkey patched with eventlet, otherwise if libev is available, use that as
-# the default because it's fastest. Otherwise, use asyncore.
+# the default because it's fastest. Otherwise, use selectors, or asyncore
+# where that is not available.
 if _is_gevent_monkey_patched():
     from cassandra.io.geventreactor import GeventConnection as DefaultConnection
 elif _is_eventlet_monkey_patched():
@@ -97,7 +100,10 @@ else:
     try:
         from cassandra.io.libevreactor import LibevConnection as DefaultConnection  # NOQA
     except ImportError:
-        from cassandra.io.asyncorereactor import AsyncoreConnection as DefaultConnection  # NOQA
+        try:
+            from cassandra.io.selectorsreactor import SelectorsConnection as DefaultConnection  # NOQA
+        except ImportError:
+            from cassandra.io.asyncorereactor import AsyncoreConnection as DefaultConnection  # NOQA
 
 # Forces load of utf8 encoding module to avoid deadlock that occurs
 # if code that is being imported tries to import the module in a seperate
@@ -117,6 +123,8 @@ DEFAULT_MAX_CONNECTIONS_PER_LOCAL_HOST = 8
 DEFAULT_MIN_CONNECTIONS_PER_REMOTE_HOST = 1
 DEFAULT_MAX_CONNECTIONS_PER_REMOTE_HOST = 2
 
+DEFAULT_HOST_CONNECTIONS = (1, 1)
+
 
 _NOT_SET = object()
 
@@ -263,6 +271,10 @@ class ExecutionProfile(object):
         self.row_factory = row_factory
         self.speculative_execution_policy = speculative_execution_policy or NoSpeculativeExecutionPolicy()
 
+    def _register_latency_trackers(self, cluster):
+        if isinstance(self.speculative_execution_policy, LatencyTracker):
+            cluster.register_latency_tracker(self.speculative_execution_policy)
+
 
 class ProfileManager(object):
 
@@ -287,6 +299,7 @@ class ProfileManager(object):
     def populate(self, cluster, hosts):
         for p in self.profiles.values():
             p.load_balancing_policy.populate(cluster, hosts)
+            p._register_latency_trackers(cluster)
 
     def check_supported(self):
         for p in self.profiles.values():
@@ -530,18 +543,37 @@ class Cluster(object):
     .. versionadded:: 2.1.0
     """
 
+    new_connection_threshold = 1024
+    """
+    When using protocol version 3 or higher, another connection is opened
+    to a host when every connection to it has this many requests in flight,
+    up to the maximum set with :meth:`.set_host_connections`. Connections
+    above the core number are closed again once the load would fit in the
+    others at half this threshold.
+    """
+
     metrics_enabled = False
     """
     Whether or not metric collection is enabled.  If enabled, :attr:`.metrics`
-    will be an instance of :class:`~cassandra.metrics.Metrics`.
+    will be an instance of :attr:`.metrics_class`.
     """
 
     metrics = None
     """
-    An instance of :class:`cassandra.metrics.Metrics` if :attr:`.metrics_enabled` is
+    An instance of :attr:`.metrics_class` if :attr:`.metrics_enabled` is
     :const:`True`, else :const:`None`.
     """
 
+    metrics_class = None
+    """
+    The class used for :attr:`.metrics`. It is called with a proxy of the
+    :class:`.Cluster`. Defaults to :class:`cassandra.metrics.Metrics`, which
+    requires the scales library; :class:`cassandra.metrics.HistogramMetrics`
+    has a lower overhead and no dependencies::
+
+        cluster = Cluster(metrics_enabled=True, metrics_class=HistogramMetrics)
+    """
+
     ssl_options = None
     """
     A optional dict which will be used as kwargs for ``ssl.wrap_socket()``
@@ -591,13 +623,15 @@ class Cluster(object):
 
     * :class:`cassandra.io.asyncorereactor.AsyncoreConnection`
     * :class:`cassandra.io.libevreactor.LibevConnection`
+    * :class:`cassandra.io.selectorsreactor.SelectorsConnection`
     * :class:`cassandra.io.eventletreactor.EventletConnection` (requires monkey-patching - see doc for details)
     * :class:`cassandra.io.geventreactor.GeventConnection` (requires monkey-patching - see doc for details)
     * :class:`cassandra.io.twistedreactor.TwistedConnection`
     * EXPERIMENTAL: :class:`cassandra.io.asyncioreactor.AsyncioConnection`
 
-    By default, ``AsyncoreConnection`` will be used, which uses
-    the ``asyncore`` module in the Python standard library.
+    By default, ``SelectorsConnection`` will be used, which uses
+    the ``selectors`` module in the Python standard library. On Python 2,
+    which does not have it, ``AsyncoreConnection`` is used instead.
 
     If ``libev`` is installed, ``LibevConnection`` will be used instead.
 
@@ -766,6 +800,7 @@ class Cluster(object):
 
     _listeners = None
     _listener_lock = None
+    _latency_trackers = ()
 
     def __init__(self,
                  contact_points=_NOT_SET,
@@ -799,11 +834,15 @@ class Cluster(object):
                  allow_beta_protocol_version=False,
                  timestamp_generator=None,
                  idle_heartbeat_timeout=30,
-                 no_compact=False):
+                 no_compact=False,
+                 metrics_class=None):
         """
         ``executor_threads`` defines the number of threads in a pool for handling asynchronous tasks such as
         extablishing connection pools or refreshing metadata.
 
+        ``metrics_class`` is the class instantiated for :attr:`.metrics` when ``metrics_enabled``
+        is true (see :attr:`.metrics_class`).
+
         Any of the mutable Cluster attributes may be set as keyword arguments to the constructor.
         """
         if contact_points is not None:
@@ -919,6 +958,7 @@ class Cluster(object):
                         ''.format(cp=contact_points, lbp=load_balancing_policy))
 
         self.metrics_enabled = metrics_enabled
+        self.metrics_class = metrics_class
         self.ssl_options = ssl_options
         self.sockopts = sockopts
         self.cql_version = cql_version
@@ -966,14 +1006,21 @@ class Cluster(object):
             HostDistance.REMOTE: DEFAULT_MAX_CONNECTIONS_PER_REMOTE_HOST
         }
 
+        self._host_connections = {
+            HostDistance.LOCAL: DEFAULT_HOST_CONNECTIONS,
+            HostDistance.REMOTE: DEFAULT_HOST_CONNECTIONS
+        }
+
         self.executor = ThreadPoolExecutor(max_workers=executor_threads)
         self.scheduler = _Scheduler(self.executor)
 
         self._lock = RLock()
 
         if self.metrics_enabled:
-            from cassandra.metrics import Metrics
-            self.metrics = Metrics(weakref.proxy(self))
+            metrics_class = self.metrics_class
+            if metrics_class is None:
+                from cassandra.metrics import Metrics as metrics_class
+            self.metrics = metrics_class(weakref.proxy(self))
 
         self.control_connection = ControlConnection(
             self, self.control_connection_timeout,
@@ -1076,6 +1123,7 @@ class Cluster(object):
 
         self.profile_manager.profiles[name] = profile
         profile.load_balancing_policy.populate(self, self.metadata.all_hosts())
+        profile._register_latency_trackers(self)
         # on_up after populate allows things like DCA LBP to choose default local dc
         for host in filter(lambda h: h.is_up, self.metadata.all_hosts()):
             profile.load_balancing_policy.on_up(host)
@@ -1196,6 +1244,46 @@ class Cluster(object):
                 "when using protocol_version 1 or 2.")
         self._max_connections_per_host[host_distance] = max_connections
 
+    def get_host_connections(self, host_distance):
+        """
+        Gets the core and maximum number of connections per Session that will
+        be opened for each host with :class:`~.HostDistance` equal to
+        `host_distance`, as a tuple, when using protocol version 3 or higher.
+        The default is one connection.
+        """
+        return self._host_connections[host_distance]
+
+    def set_host_connections(self, host_distance, core_connections, max_connections=None):
+        """
+        Sets the number of connections per Session that will be opened for
+        each host with :class:`~.HostDistance` equal to `host_distance` when
+        using protocol version 3 or higher. `core_connections` are kept open,
+        and more are opened under load, up to `max_connections`; see
+        :attr:`.new_connection_threshold`. `max_connections` defaults to
+        `core_connections`.
+
+        Requests to a host are sent on its least busy connection, so several
+        connections spread the work of writing and reading the requests,
+        and keep a large response from delaying the others.
+
+        If :attr:`~.Cluster.protocol_version` is set to 1 or 2, this is not
+        supported (see :meth:`.set_core_connections_per_host`) and using
+        this will result in an :exc:`~.UnsupportedOperation`.
+        """
+        if self.protocol_version < 3:
+            raise UnsupportedOperation(
+                "Cluster.set_host_connections() only has an effect "
+                "when using protocol_version 3 or higher.")
+        if max_connections is None:
+            max_connections = core_connections
+        if core_connections < 1 or max_connections < core_connections:
+            raise ValueError("core_connections must be at least 1, and max_connections "
+                             "at least core_connections")
+        old_core, _ = self._host_connections[host_distance]
+        self._host_connections[host_distance] = (core_connections, max_connections)
+        if old_core < core_connections:
+            self._ensure_core_connections()
+
     def connection_factory(self, address, *args, **kwargs):
         """
         Called to create a new connection with proper configuration.
@@ -1661,6 +1749,20 @@ class Cluster(object):
         with self._listener_lock:
             return self._listeners.copy()
 
+    def register_latency_tracker(self, tracker):
+        """
+        Adds a :class:`cassandra.policies.LatencyTracker` subclass instance to
+        be notified of the latency of each response from a host.
+        """
+        with self._listener_lock:
+            if tracker not in self._latency_trackers:
+                self._latency_trackers = self._latency_trackers + (tracker,)
+
+    def unregister_latency_tracker(self, tracker):
+        """ Removes a registered latency tracker. """
+        with self._listener_lock:
+            self._latency_trackers = tuple(t for t in self._latency_trackers if t is not tracker)
+
     def _ensure_core_connections(self):
         """
         If any host has fewer than the configured number of core connections
@@ -1992,6 +2094,28 @@ class Session(object):
     .. versionadded:: 2.0.0
     """
 
+    default_prefetch_pages = 0
+    """
+    The number of pages to read ahead when paging through query results.
+    When this is greater than zero, the request for the next page is sent as
+    soon as a page arrives, rather than when the application asks for it, so
+    that fetching overlaps with processing the current page. Up to this many
+    pages may be buffered client-side for each result set.
+
+    Read-ahead is off by default. It can be also specified per-query through
+    :attr:`.Statement.prefetch_pages`.
+    """
+
+    request_phase_timing = False
+    """
+    When this is :const:`True`, each request records the time it spends in
+    each phase of its execution, which is available from
+    :attr:`.ResponseFuture.phase_timings` and recorded by the cluster's
+    metrics when :attr:`.Cluster.metrics_enabled` is set.
+
+    This is off by default, since it takes several extra timestamps per request.
+    """
+
     use_client_timestamp = True
     """
     When using protocol version 3 or higher, write timestamps may be supplied
@@ -2169,11 +2293,77 @@ class Session(object):
 
         """
         future = self._create_response_future(query, parameters, trace, custom_payload, timeout, execution_profile, paging_state)
-        future._protocol_handler = self.client_protocol_handler
+        if future.row_factory is lazy_row_factory and self.client_protocol_handler is ProtocolHandler:
+            future._protocol_handler = EncodedRowsProtocolHandler
+        else:
+            future._protocol_handler = self.client_protocol_handler
         self._on_request(future)
         future.send_request()
         return future
 
+    def execute_asyncio(self, query, parameters=None, trace=False, custom_payload=None, timeout=_NOT_SET, execution_profile=EXEC_PROFILE_DEFAULT, paging_state=None, loop=None):
+        """
+        Execute the given query and return an :class:`asyncio.Future` which
+        resolves to the :class:`.ResultSet`, or raises the request error, when
+        awaited.
+
+        See :meth:`Session.execute` for parameter definitions. `loop` is the
+        event loop the returned future belongs to; it defaults to the current
+        event loop.
+
+        The future is completed on its own loop, directly if the response is
+        processed on the thread running that loop and otherwise through
+        ``loop.call_soon_threadsafe``, so no other synchronization is needed.
+        Rows may be consumed with ``async for``, which fetches further pages
+        without blocking the loop.
+
+        Example usage::
+
+            >>> async def log_users(session):
+            ...     results = await session.execute_asyncio("SELECT * FROM users")
+            ...     async for user_row in results:
+            ...         log.info("Results: %s", user_row)
+
+        """
+        future = self.execute_async(query, parameters, trace, custom_payload, timeout, execution_profile, paging_state)
+        return future._asyncio_future(loop)
+
+    def scan_table(self, keyspace, table, columns=None, concurrency=32, fetch_size=None,
+                   consistency_level=None, execution_profile=EXEC_PROFILE_DEFAULT):
+        """
+        Reads every row of a table, returning a generator over the rows.
+
+        The ring from :attr:`.Metadata.token_map` is split into the token ranges
+        owned by each node, and each range is read with its own paged
+        ``token(<partition key>) > ? AND token(<partition key>) <= ?`` query,
+        routed by that range. With :class:`~.TokenAwarePolicy`, every query is
+        served by a replica of its range, spreading the scan over the whole
+        cluster instead of a single coordinator.
+
+        `columns` is an optional list of column names to select (all columns by
+        default). Up to `concurrency` ranges are read at a time. Each range holds
+        at most one page that has not been consumed yet, so memory stays bounded
+        however large the table is. Rows are yielded as pages arrive, in no
+        particular order.
+
+        `fetch_size` and `consistency_level` override the defaults for the
+        range queries. See :meth:`Session.execute` for `execution_profile`.
+
+        An error reading any of the ranges is raised from the generator.
+
+        Example usage::
+
+            >>> for row in session.scan_table("mykeyspace", "users", columns=["id", "email"]):
+            ...     export(row)
+
+        """
+        from cassandra.concurrent import ConcurrentTokenRangeScan
+        if concurrency <= 0:
+            raise ValueError("concurrency must be greater than 0")
+        scan = ConcurrentTokenRangeScan(self, keyspace, table, columns, fetch_size,
+                                        consistency_level, execution_profile)
+        return scan.execute(concurrency)
+
     def _create_response_future(self, query, parameters, trace, custom_payload, timeout, execution_profile=EXEC_PROFILE_DEFAULT, paging_state=None):
         """ Returns the ResponseFuture before calling send_request() on it """
 
@@ -2198,7 +2388,14 @@ class Session(object):
             row_factory = self.row_factory
             load_balancing_policy = self.cluster.load_balancing_policy
             spec_exec_policy = None
+            profile_name = None
         else:
+            if execution_profile is EXEC_PROFILE_DEFAULT:
+                profile_name = 'EXEC_PROFILE_DEFAULT'
+            elif isinstance(execution_profile, ExecutionProfile):
+                profile_name = None
+            else:
+                profile_name = execution_profile
             execution_profile = self._get_execution_profile(execution_profile)
 
             if timeout is _NOT_SET:
@@ -2219,6 +2416,10 @@ class Session(object):
         elif self._protocol_version == 1:
             fetch_size = None
 
+        prefetch_pages = query.prefetch_pages
+        if prefetch_pages is None:
+            prefetch_pages = self.default_prefetch_pages
+
         start_time = time.time()
         if self._protocol_version >= 3 and self.use_client_timestamp:
             timestamp = self.cluster.timestamp_generator()
@@ -2240,7 +2441,8 @@ class Session(object):
                 prepared_statement.query_id, query.values, cl,
                 serial_cl, fetch_size,
                 timestamp=timestamp, skip_meta=bool(prepared_statement.result_metadata),
-                result_metadata_id=prepared_statement.result_metadata_id)
+                result_metadata_id=prepared_statement.result_metadata_id,
+                prefix_cache=prepared_statement._execute_prefixes)
         elif isinstance(query, BatchStatement):
             if self._protocol_version < 2:
                 raise UnsupportedOperation(
@@ -2260,10 +2462,17 @@ class Session(object):
         message.paging_state = paging_state
 
         spec_exec_plan = spec_exec_policy.new_plan(query.keyspace or self.keyspace, query) if query.is_idempotent and spec_exec_policy else None
-        return ResponseFuture(
+        future = ResponseFuture(
             self, message, query, timeout, metrics=self._metrics,
             prepared_statement=prepared_statement, retry_policy=retry_policy, row_factory=row_factory,
-            load_balancer=load_balancing_policy, start_time=start_time, speculative_execution_plan=spec_exec_plan)
+            load_balancer=load_balancing_policy, start_time=start_time, speculative_execution_plan=spec_exec_plan,
+            latency_trackers=self.cluster._latency_trackers)
+        future._execution_profile_name = profile_name
+        if self.request_phase_timing:
+            future._attempt_phases = {}
+        if fetch_size and prefetch_pages:
+            future.prefetch_pages = prefetch_pages
+        return future
 
     def _get_execution_profile(self, ep):
         profiles = self.cluster.profile_manager.profiles
@@ -3388,6 +3597,44 @@ def refresh_schema_and_set_result(control_conn, response_future, connection, **k
         response_future._set_final_result(None)
 
 
+def _resolve_asyncio_futures(waiters, response_future, result, exception):
+    """
+    Completes the (loop, future) pairs registered by :meth:`.ResponseFuture._asyncio_future`.
+    Futures of the loop running on this thread are completed directly, others
+    are handed to their loop.
+    """
+    from asyncio import events
+    get_running_loop = getattr(events, '_get_running_loop', None)
+    running_loop = get_running_loop() if get_running_loop else None
+    for loop, future in waiters:
+        value = ResultSet(response_future, result) if exception is None else None
+        if loop is running_loop:
+            _complete_asyncio_future(future, value, exception)
+        else:
+            try:
+                loop.call_soon_threadsafe(_complete_asyncio_future, future, value, exception)
+            except RuntimeError:
+                log.debug("Could not complete asyncio future for %s; event loop is closed", response_future)
+
+
+def _complete_asyncio_future(future, value, exception):
+    if future.done():  # cancelled by the application
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(value)
+
+
+_REQUEST_PHASES = (('queue_wait', 'start', 'borrow_start'),
+                   ('pool_borrow', 'borrow_start', 'borrowed'),
+                   ('encode', 'borrowed', 'encoded'),
+                   ('server', 'encoded', 'received'),
+                   ('decode', 'received', 'decoded'),
+                   ('result', 'decoded', 'final'),
+                   ('callbacks', 'final', 'done'))
+
+
 class ResponseFuture(object):
     """
     An asynchronous response delivery mechanism that is returned from calls
@@ -3428,6 +3675,12 @@ class ResponseFuture(object):
     A list of hosts tried, including all speculative executions, retries, and pages
     """
 
+    prefetch_pages = 0
+    """
+    The number of pages read ahead of the page being consumed. See
+    :attr:`.Session.default_prefetch_pages`.
+    """
+
     session = None
     row_factory = None
     message = None
@@ -3444,6 +3697,7 @@ class ResponseFuture(object):
     _query_traces = None
     _callbacks = None
     _errbacks = None
+    _asyncio_futures = None
     _current_host = None
     _connection = None
     _query_retries = 0
@@ -3453,13 +3707,22 @@ class ResponseFuture(object):
     _custom_payload = None
     _warnings = None
     _timer = None
+    _read_ahead = None
+    _read_ahead_tail = None
+    _read_ahead_lock = None
     _protocol_handler = ProtocolHandler
     _spec_execution_plan = NoSpeculativeExecutionPlan()
+    _latency_trackers = ()
+    _sent_times = None
+    _execution_profile_name = None
+    _attempt_phases = None
+    _phases = None
 
     _warned_timeout = False
 
     def __init__(self, session, message, query, timeout, metrics=None, prepared_statement=None,
-                 retry_policy=RetryPolicy(), row_factory=None, load_balancer=None, start_time=None, speculative_execution_plan=None):
+                 retry_policy=RetryPolicy(), row_factory=None, load_balancer=None, start_time=None, speculative_execution_plan=None,
+                 latency_trackers=None):
         self.session = session
         # TODO: normalize handling of retry policy and row factory
         self.row_factory = row_factory or session.row_factory
@@ -3473,6 +3736,8 @@ class ResponseFuture(object):
         self._callback_lock = Lock()
         self._start_time = start_time or time.time()
         self._spec_execution_plan = speculative_execution_plan or self._spec_execution_plan
+        self._latency_trackers = latency_trackers or self._latency_trackers
+        self._sent_times = {}
         self._make_query_plan()
         self._event = Event()
         self._errors = {}
@@ -3528,8 +3793,7 @@ class ResponseFuture(object):
 
             pool = self.session._pools.get(self._current_host)
             if pool and not pool.is_shutdown:
-                with self._connection.lock:
-                    self._connection.request_ids.append(self._req_id)
+                self._connection.request_ids.append(self._req_id)
 
                 pool.return_connection(self._connection)
 
@@ -3608,18 +3872,29 @@ class ResponseFuture(object):
 
         connection = None
         try:
+            borrow_start = time.time()
             # TODO get connectTimeout from cluster settings
             connection, request_id = pool.borrow_connection(timeout=2.0)
+            sent_time = time.time()
+            if self._metrics is not None:
+                self._metrics.on_pool_borrow(sent_time - borrow_start, host)
+                if not self.attempted_hosts:
+                    self._metrics.on_queue_wait(sent_time - self._start_time)
             self._connection = connection
             result_meta = self.prepared_statement.result_metadata if self.prepared_statement else []
 
             if cb is None:
                 cb = partial(self._set_result, host, connection, pool)
 
+            self._sent_times[host] = sent_time
+            send_kwargs = {}
+            if self._attempt_phases is not None:
+                phases = {'start': self._start_time, 'borrow_start': borrow_start, 'borrowed': sent_time}
+                self._attempt_phases[host] = send_kwargs['timings'] = phases
             self.request_encoded_size = connection.send_msg(message, request_id, cb=cb,
                                                             encoder=self._protocol_handler.encode_message,
                                                             decoder=self._protocol_handler.decode_message,
-                                                            result_metadata=result_meta)
+                                                            result_metadata=result_meta, **send_kwargs)
             self.attempted_hosts.append(host)
             return request_id
         except NoConnectionsAvailable as exc:
@@ -3646,6 +3921,33 @@ class ResponseFuture(object):
         """
         return self._paging_state is not None
 
+    @property
+    def phase_timings(self):
+        """
+        A dict of the seconds this request spent in each phase of its
+        execution, when :attr:`.Session.request_phase_timing` is enabled.
+        The phases are:
+
+          * queue_wait - from the creation of the request until a connection
+            was requested for the attempt which was answered
+          * pool_borrow - borrowing a connection from the host's pool
+          * encode - encoding the request message
+          * server - from then until the whole response was read; this
+            includes writing the request, and the time on the network and
+            in the server
+          * decode - decoding the response message
+          * result - handling the response, such as applying the row factory
+          * callbacks - running the callbacks added to this future
+
+        Phases the request did not go through are left out. This is
+        :const:`None` until a response was handled, and when timing is disabled.
+        """
+        phases = self._phases
+        if phases is None:
+            return None
+        return dict((name, phases[end] - phases[start]) for name, start, end in _REQUEST_PHASES
+                    if start in phases and end in phases)
+
     @property
     def warnings(self):
         """
@@ -3695,6 +3997,17 @@ class ResponseFuture(object):
         if not self._paging_state:
             raise QueryExhausted()
 
+        if self._read_ahead:
+            with self._read_ahead_lock:
+                page_future = self._read_ahead.popleft()
+                self._extend_read_ahead()
+            self._event.clear()
+            self._final_result = _NOT_SET
+            self._final_exception = None
+            page_future.add_callbacks(self._adopt_page, self._adopt_page_error,
+                                      callback_args=(page_future,), errback_args=(page_future,))
+            return
+
         self._make_query_plan()
         self.message.paging_state = self._paging_state
         self._event.clear()
@@ -3703,6 +4016,70 @@ class ResponseFuture(object):
         self._start_timer()
         self.send_request()
 
+    def _start_read_ahead(self):
+        self._read_ahead = deque()
+        self._read_ahead_lock = RLock()
+        with self._read_ahead_lock:
+            self._fetch_ahead(self._paging_state)
+
+    def _fetch_ahead(self, paging_state):
+        """
+        Sends the request for the page after ``_read_ahead_tail``. Must be
+        called with ``_read_ahead_lock`` held.
+        """
+        message = copy(self.message)
+        message.paging_state = paging_state
+        page_future = ResponseFuture(
+            self.session, message, self.query, self.timeout, metrics=self._metrics,
+            prepared_statement=self.prepared_statement, retry_policy=self._retry_policy,
+            row_factory=self.row_factory, load_balancer=self._load_balancer,
+            latency_trackers=self._latency_trackers)
+        page_future._execution_profile_name = self._execution_profile_name
+        if self._attempt_phases is not None:
+            page_future._attempt_phases = {}
+        page_future._protocol_handler = self._protocol_handler
+        self._read_ahead.append(page_future)
+        self._read_ahead_tail = page_future
+        page_future.add_callback(self._on_read_ahead)
+        page_future.send_request()
+
+    def _extend_read_ahead(self):
+        """
+        Starts fetching the page after the last one requested, if it has
+        arrived and fewer than :attr:`prefetch_pages` are outstanding. Must be
+        called with ``_read_ahead_lock`` held.
+        """
+        tail = self._read_ahead_tail
+        if (len(self._read_ahead) < self.prefetch_pages and
+                tail._final_result is not _NOT_SET and tail.has_more_pages):
+            self._fetch_ahead(tail._paging_state)
+
+    def _on_read_ahead(self, _):
+        with self._read_ahead_lock:
+            self._extend_read_ahead()
+
+    def _adopt_page(self, response, page_future):
+        self._paging_state = page_future._paging_state
+        self._col_names = page_future._col_names
+        self._col_types = page_future._col_types
+        self._adopt_page_state(page_future)
+        self._deliver_final_result(response)
+
+    def _adopt_page_error(self, response, page_future):
+        self._adopt_page_state(page_future)
+        self._deliver_final_exception(response)
+
+    def _adopt_page_state(self, page_future):
+        self.coordinator_host = page_future.coordinator_host
+        self.attempted_hosts.extend(page_future.attempted_hosts)
+        self._warnings = page_future._warnings
+        self._custom_payload = page_future._custom_payload
+        self._phases = page_future._phases
+        if page_future._query_traces:
+            if not self._query_traces:
+                self._query_traces = []
+            self._query_traces.extend(page_future._query_traces)
+
     def _reprepare(self, prepare_message, host, connection, pool):
         cb = partial(self.session.submit, self._execute_after_prepare, host, connection, pool)
         request_id = self._query(host, prepare_message, cb=cb)
@@ -3713,6 +4090,8 @@ class ResponseFuture(object):
     def _set_result(self, host, connection, pool, response):
         try:
             self.coordinator_host = host
+            if self._attempt_phases is not None:
+                self._phases = self._attempt_phases.get(host)
             if pool:
                 pool.return_connection(connection)
 
@@ -3725,6 +4104,9 @@ class ResponseFuture(object):
             self._warnings = getattr(response, 'warnings', None)
             self._custom_payload = getattr(response, 'custom_payload', None)
 
+            if self._latency_trackers:
+                self._report_latency(host, response)
+
             if isinstance(response, ResultMessage):
                 if response.kind == RESULT_KIND_SET_KEYSPACE:
                     session = getattr(self, 'session', None)
@@ -3752,6 +4134,12 @@ class ResponseFuture(object):
                         self._paging_state = response.paging_state
                         self._col_types = response.col_types
                         self._col_names = results[0]
+                        if self._paging_state and self.prefetch_pages and self._read_ahead is None:
+                            self._start_read_ahead()
+                        if isinstance(results[-1], Future):
+                            # the rows are still being decoded by a DecodeProcessPool
+                            results[-1].add_done_callback(partial(self._on_decoded_rows, results[0]))
+                            return
                         results = self.row_factory(*results)
                     self._set_final_result(results)
             elif isinstance(response, ErrorMessage):
@@ -3925,11 +4313,48 @@ class ResponseFuture(object):
                 "Got unexpected response type when preparing "
                 "statement on host %s: %s" % (host, response)))
 
+    def _report_latency(self, host, response):
+        # errors the host returns without doing the work, such as
+        # Unavailable or Overloaded, say nothing about how fast it is
+        if not isinstance(response, (ResultMessage, ReadTimeoutErrorMessage, WriteTimeoutErrorMessage)):
+            return
+        sent_time = self._sent_times.get(host)
+        if sent_time is None:
+            return
+
+        latency = time.time() - sent_time
+        for tracker in self._latency_trackers:
+            try:
+                tracker.on_latency(host, self.query, latency)
+            except Exception:
+                log.exception("Error reporting latency to %s", tracker)
+
+    def _on_decoded_rows(self, colnames, decoding):
+        # the pool's thread is shared by every page being decoded, so the
+        # row factory and callbacks are run by the executor instead
+        self.session.submit(self._set_decoded_rows, colnames, decoding)
+
+    def _set_decoded_rows(self, colnames, decoding):
+        try:
+            results = self.row_factory(colnames, decoding.result())
+        except Exception as exc:
+            self._set_final_exception(exc)
+        else:
+            self._set_final_result(results)
+
     def _set_final_result(self, response):
         self._cancel_timer()
         if self._metrics is not None:
-            self._metrics.request_timer.addValue(time.time() - self._start_time)
-
+            self._metrics.on_request(time.time() - self._start_time, self.coordinator_host,
+                                     self._execution_profile_name)
+        phases = self._phases
+        if phases is not None:
+            phases['final'] = time.time()
+        self._deliver_final_result(response)
+        if phases is not None:
+            self._finish_phases(phases)
+
+    def _deliver_final_result(self, response):
         with self._callback_lock:
             self._final_result = response
             # save off current callbacks inside lock for execution outside it
@@ -3940,6 +4365,7 @@ class ResponseFuture(object):
                 partial(fn, response, *args, **kwargs)
                 for (fn, args, kwargs) in self._callbacks
             )
+            asyncio_futures, self._asyncio_futures = self._asyncio_futures, None
 
         self._event.set()
 
@@ -3947,11 +4373,27 @@ class ResponseFuture(object):
         for callback_partial in to_call:
             callback_partial()
 
+        if asyncio_futures:
+            _resolve_asyncio_futures(asyncio_futures, self, response, None)
+
     def _set_final_exception(self, response):
         self._cancel_timer()
         if self._metrics is not None:
-            self._metrics.request_timer.addValue(time.time() - self._start_time)
+            self._metrics.on_request(time.time() - self._start_time, self.coordinator_host,
+                                     self._execution_profile_name)
+        phases = self._phases
+        if phases is not None:
+            phases['final'] = time.time()
+        self._deliver_final_exception(response)
+        if phases is not None:
+            self._finish_phases(phases)
+
+    def _finish_phases(self, phases):
+        phases['done'] = time.time()
+        if self._metrics is not None:
+            self._metrics.on_request_phases(self.phase_timings)
 
+    def _deliver_final_exception(self, response):
         with self._callback_lock:
             self._final_exception = response
             # save off current errbacks inside lock for execution outside it --
@@ -3962,12 +4404,16 @@ class ResponseFuture(object):
                 partial(fn, response, *args, **kwargs)
                 for (fn, args, kwargs) in self._errbacks
             )
+            asyncio_futures, self._asyncio_futures = self._asyncio_futures, None
         self._event.set()
 
         # apply each callback
         for callback_partial in to_call:
             callback_partial()
 
+        if asyncio_futures:
+            _resolve_asyncio_futures(asyncio_futures, self, None, response)
+
     def _retry(self, reuse_connection, consistency_level, host):
         if self._final_exception:
             # the connection probably broke while we were waiting
@@ -4163,6 +4609,29 @@ class ResponseFuture(object):
         self.add_callback(callback, *callback_args, **(callback_kwargs or {}))
         self.add_errback(errback, *errback_args, **(errback_kwargs or {}))
 
+    def _asyncio_future(self, loop=None):
+        """
+        Returns an :class:`asyncio.Future` on `loop` (the current event loop
+        by default) for the :class:`.ResultSet` of the page in flight, or the
+        page already received.
+        """
+        if loop is None:
+            import asyncio
+            loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        with self._callback_lock:
+            result, exception = self._final_result, self._final_exception
+            if result is _NOT_SET and exception is None:
+                if self._asyncio_futures is None:
+                    self._asyncio_futures = []
+                self._asyncio_futures.append((loop, future))
+                return future
+        _resolve_asyncio_futures(((loop, future),), self, result, exception)
+        return future
+
+    def __await__(self):
+        return self._asyncio_future().__await__()
+
     def clear_callbacks(self):
         with self._callback_lock:
             self._callbacks = []
@@ -4205,6 +4674,9 @@ class ResultSet(object):
     be fetched transparently.  However, note that it *is* possible for
     an :class:`Exception` to be raised while fetching the next page, just
     like you might see on a normal call to ``session.execute()``.
+
+    Rows can also be consumed with ``async for`` (see :meth:`.Session.execute_asyncio`),
+    in which case further pages are fetched without blocking the event loop.
     """
 
     def __init__(self, response_future, initial_response):
@@ -4252,6 +4724,52 @@ class ResultSet(object):
 
     __next__ = next
 
+    def __aiter__(self):
+        self._page_iter = iter(self._current_rows)
+        return self
+
+    def __anext__(self):
+        """
+        Returns an awaitable for the next row, fetching the next page without
+        blocking the event loop when the current one is exhausted.
+        """
+        import asyncio
+        loop = asyncio.get_event_loop()
+        row_future = loop.create_future()
+        try:
+            row_future.set_result(next(self._page_iter))
+        except StopIteration:
+            if not self.response_future.has_more_pages:
+                if not self._list_mode:
+                    self._current_rows = []
+                raise StopAsyncIteration
+            self._fetch_next_page_asyncio(loop, row_future)
+        return row_future
+
+    def _fetch_next_page_asyncio(self, loop, row_future):
+        self.response_future.start_fetching_next_page()
+        page_future = self.response_future._asyncio_future(loop)
+        page_future.add_done_callback(partial(self._on_asyncio_page, loop, row_future))
+
+    def _on_asyncio_page(self, loop, row_future, page_future):
+        if row_future.done():  # cancelled by the application
+            return
+        if page_future.exception() is not None:
+            row_future.set_exception(page_future.exception())
+            return
+
+        self._current_rows = page_future.result()._current_rows
+        self._page_iter = iter(self._current_rows)
+        try:
+            row_future.set_result(next(self._page_iter))
+        except StopIteration:
+            # pages may be empty without being the last one
+            if self.response_future.has_more_pages:
+                self._fetch_next_page_asyncio(loop, row_future)
+            else:
+                self._current_rows = []
+                row_future.set_exception(StopAsyncIteration())
+
     def fetch_next_page(self):
         """
         Manually, synchronously fetch the next page. Supplied for manually retrieving pages
@@ -0,0 +1,427 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides an optional protocol parser that decodes each page of
+results column by column into contiguous buffers, without creating a Python
+object per cell.
+
+The buffers follow the Apache Arrow columnar layout:
+
+    - a validity bitmap (least significant bit first, 1 meaning non-null)
+    - for fixed-width types, a data buffer of native-endian values
+    - for variable-width types, int32 offsets and a data buffer holding the
+      concatenated values
+
+so they can be handed to Arrow (see :meth:`Column.to_arrow`), NumPy or
+anything else supporting the buffer protocol without copying.
+"""
+
+include "ioutils.pyx"
+
+cimport cython
+from libc.stdint cimport int32_t, uint8_t, uint32_t
+from libc.string cimport memcpy
+from cpython.bytearray cimport PyByteArray_AS_STRING, PyByteArray_Resize
+
+from cassandra.bytesio cimport BytesIOReader
+from cassandra.deserializers cimport Deserializer, from_binary
+from cassandra.parsing cimport ParseDesc, ColumnParser
+
+import struct
+
+from cassandra import cqltypes, util
+from cassandra.marshal import int32_pack
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+
+# Column layouts
+DEF FIXED = 0       # fixed-width values, swapped to native byte order
+DEF BOOLEAN = 1     # bit-packed, like the validity bitmap
+DEF UUID = 2        # 16 bytes, as sent
+DEF DATE = 3        # int32 days since the epoch
+DEF VARIABLE = 4    # int32 offsets into the concatenated values
+DEF DECIMAL = 5     # int32 scales, plus the unscaled varints as VARIABLE
+DEF OBJECT = 6      # deserialized Python objects, for all other types
+
+_layout_names = ('fixed', 'boolean', 'uuid', 'date', 'variable', 'decimal', 'object')
+
+_fixed_widths = {
+    cqltypes.LongType: 8,
+    cqltypes.CounterColumnType: 8,
+    cqltypes.DateType: 8,
+    cqltypes.TimestampType: 8,
+    cqltypes.TimeType: 8,
+    cqltypes.Int32Type: 4,
+    cqltypes.ShortType: 2,
+    cqltypes.ByteType: 1,
+    cqltypes.FloatType: 4,
+    cqltypes.DoubleType: 8,
+}
+
+_layouts = {
+    cqltypes.BooleanType: (BOOLEAN, 1),
+    cqltypes.UUIDType: (UUID, 16),
+    cqltypes.TimeUUIDType: (UUID, 16),
+    cqltypes.SimpleDateType: (DATE, 4),
+    cqltypes.UTF8Type: (VARIABLE, 0),
+    cqltypes.VarcharType: (VARIABLE, 0),
+    cqltypes.AsciiType: (VARIABLE, 0),
+    cqltypes.BytesType: (VARIABLE, 0),
+    cqltypes.DecimalType: (DECIMAL, 0),
+}
+_layouts.update((cqltype, (FIXED, width)) for cqltype, width in _fixed_widths.items())
+
+
+cdef class ColumnarParser(ColumnParser):
+    """Decode a ResultMessage into a :class:`ColumnBatch`"""
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cpdef parse_rows(self, BytesIOReader reader, ParseDesc desc):
+        cdef Py_ssize_t i, j, rowcount
+        cdef Buffer buf
+        cdef list builders
+
+        rowcount = read_int(reader)
+        builders = [_ColumnBuilder(coltype, desc.deserializers[j], rowcount, desc.protocol_version)
+                    for j, coltype in enumerate(desc.coltypes)]
+
+        for i in range(rowcount):
+            for j in range(desc.rowsize):
+                get_buf(reader, &buf)
+                (<_ColumnBuilder> builders[j]).append(&buf, i)
+
+        return ColumnBatch(desc.colnames, [builder.finish() for builder in builders], rowcount)
+
+
+cdef inline void set_bit(bytearray bitmap, Py_ssize_t i):
+    PyByteArray_AS_STRING(bitmap)[i >> 3] |= <char> (1 << (i & 7))
+
+
+cdef inline void copy_to_native(char *dst, char *src, Py_ssize_t size):
+    cdef Py_ssize_t i
+    if is_little_endian:
+        for i in range(size):
+            dst[i] = src[size - i - 1]
+    else:
+        memcpy(dst, src, size)
+
+
+cdef class _ColumnBuilder:
+    """Accumulates the cells of one column"""
+
+    cdef object cqltype
+    cdef Deserializer deserializer
+    cdef int protocol_version
+    cdef int layout
+    cdef Py_ssize_t width
+    cdef Py_ssize_t length
+    cdef Py_ssize_t null_count
+    cdef Py_ssize_t data_size
+    cdef bytearray validity
+    cdef bytearray data
+    cdef bytearray offsets
+    cdef bytearray scales
+    cdef list values
+
+    def __init__(self, cqltype, Deserializer deserializer, Py_ssize_t rowcount, int protocol_version):
+        self.cqltype = cqltype
+        self.deserializer = deserializer
+        self.protocol_version = protocol_version
+        self.layout, self.width = _layouts.get(cqltype, (OBJECT, 0))
+        self.length = rowcount
+        self.null_count = 0
+        self.data_size = 0
+        self.validity = bytearray((rowcount + 7) // 8)
+
+        if self.layout == BOOLEAN:
+            self.data = bytearray((rowcount + 7) // 8)
+        elif self.layout == VARIABLE or self.layout == DECIMAL:
+            self.data = bytearray(rowcount * 16)
+            self.offsets = bytearray((rowcount + 1) * 4)
+            if self.layout == DECIMAL:
+                self.scales = bytearray(rowcount * 4)
+        elif self.layout == OBJECT:
+            self.values = [None] * rowcount
+        else:
+            self.data = bytearray(rowcount * self.width)
+
+    cdef int append(self, Buffer *buf, Py_ssize_t i) except -1:
+        cdef int32_t *offsets
+        cdef Buffer unscaled
+
+        if self.layout == OBJECT:
+            val = from_binary(self.deserializer, buf, self.protocol_version)
+            if val is None:
+                self.null_count += 1
+            else:
+                self.values[i] = val
+                set_bit(self.validity, i)
+            return 0
+
+        if self.layout == VARIABLE or self.layout == DECIMAL:
+            offsets = <int32_t *> PyByteArray_AS_STRING(self.offsets)
+            offsets[i + 1] = offsets[i]
+
+        # Empty values of non-string types decode to None, as in the
+        # row-based parsers
+        if buf.size < 0 or (buf.size == 0 and self.layout != VARIABLE):
+            self.null_count += 1
+            return 0
+
+        if self.layout == VARIABLE:
+            self.append_data(buf, i)
+        elif self.layout == DECIMAL:
+            if buf.size < 4:
+                raise ValueError("Invalid decimal value of %d bytes" % (buf.size,))
+            (<int32_t *> PyByteArray_AS_STRING(self.scales))[i] = unpack_num[int32_t](buf)
+            from_ptr_and_size(buf.ptr + 4, buf.size - 4, &unscaled)
+            self.append_data(&unscaled, i)
+        elif buf.size != self.width:
+            raise ValueError("Expected %d bytes for a %s value, got %d" %
+                             (self.width, self.cqltype.typename, buf.size))
+        elif self.layout == FIXED:
+            copy_to_native(PyByteArray_AS_STRING(self.data) + i * self.width, buf.ptr, self.width)
+        elif self.layout == UUID:
+            memcpy(PyByteArray_AS_STRING(self.data) + i * 16, buf.ptr, 16)
+        elif self.layout == DATE:
+            (<int32_t *> PyByteArray_AS_STRING(self.data))[i] = <int32_t> (unpack_num[uint32_t](buf) - <uint32_t> 0x80000000)
+        elif self.layout == BOOLEAN:
+            if buf.ptr[0]:
+                set_bit(self.data, i)
+
+        set_bit(self.validity, i)
+        return 0
+
+    cdef int append_data(self, Buffer *buf, Py_ssize_t i) except -1:
+        cdef Py_ssize_t capacity = len(self.data)
+        cdef Py_ssize_t end = self.data_size + buf.size
+
+        if end > capacity:
+            PyByteArray_Resize(self.data, max(end, capacity * 2))
+        if buf.size:
+            memcpy(PyByteArray_AS_STRING(self.data) + self.data_size, buf.ptr, buf.size)
+        self.data_size = end
+        (<int32_t *> PyByteArray_AS_STRING(self.offsets))[i + 1] = <int32_t> end
+        return 0
+
+    def finish(self):
+        if self.layout == VARIABLE or self.layout == DECIMAL:
+            PyByteArray_Resize(self.data, self.data_size)
+        return Column(self.cqltype, _layout_names[self.layout], self.length, self.null_count,
+                      self.validity, self.data, self.offsets, self.scales, self.values,
+                      self.protocol_version)
+
+
+class Column(object):
+    """
+    One column of a :class:`ColumnBatch`.
+
+    Values are kept in the buffers described in the module documentation.
+    Indexing or iterating the column decodes them into the same Python
+    objects returned by the row-based parsers.
+    """
+
+    cqltype = None
+    """
+    The :class:`~.cqltypes._CassandraType` of the column.
+    """
+
+    layout = None
+    """
+    How the values are stored, one of:
+
+        - ``'fixed'``: native-endian values in :attr:`data` (int, bigint,
+          counter, smallint, tinyint, float, double, time, and timestamp as
+          milliseconds since the epoch)
+        - ``'boolean'``: a bitmap in :attr:`data`
+        - ``'uuid'``: 16 bytes per value in :attr:`data`
+        - ``'date'``: int32 days since the epoch in :attr:`data`
+        - ``'variable'``: text or blob values in :attr:`data`, delimited by :attr:`offsets`
+        - ``'decimal'``: int32 :attr:`scales`, and the big-endian unscaled
+          values in :attr:`data`, delimited by :attr:`offsets`
+        - ``'object'``: a list of deserialized :attr:`values`, for all other types
+    """
+
+    null_count = 0
+    """
+    The number of null values in the column.
+    """
+
+    validity = None
+    """
+    A bitmap with a set bit for each non-null value.
+    """
+
+    data = None
+    offsets = None
+    scales = None
+    values = None
+
+    def __init__(self, cqltype, layout, length, null_count, validity,
+                 data=None, offsets=None, scales=None, values=None, protocol_version=4):
+        self.cqltype = cqltype
+        self.layout = layout
+        self.null_count = null_count
+        self.validity = validity
+        self.data = data
+        self.offsets = offsets
+        self.scales = scales
+        self.values = values
+        self._length = length
+        self._protocol_version = protocol_version
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("Column index out of range")
+        if self.layout == 'object':
+            return self.values[i]
+        if not self.validity[i >> 3] & (1 << (i & 7)):
+            return None
+
+        if self.layout == 'boolean':
+            return bool(self.data[i >> 3] & (1 << (i & 7)))
+        if self.layout == 'date':
+            return util.Date(struct.unpack_from('=i', self.data, i * 4)[0])
+        if self.layout == 'fixed':
+            width = _fixed_widths[self.cqltype]
+            raw = bytes(self.data[i * width:(i + 1) * width])
+            if util.is_little_endian:
+                raw = raw[::-1]
+        elif self.layout == 'uuid':
+            raw = bytes(self.data[i * 16:(i + 1) * 16])
+        else:
+            start, end = struct.unpack_from('=ii', self.offsets, i * 4)
+            raw = bytes(self.data[start:end])
+            if self.layout == 'decimal':
+                raw = int32_pack(struct.unpack_from('=i', self.scales, i * 4)[0]) + raw
+        return self.cqltype.deserialize(raw, self._protocol_version)
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+    def to_pylist(self):
+        """
+        Returns the values of the column as a list of Python objects.
+        """
+        return list(self)
+
+    def to_arrow(self):
+        """
+        Returns the column as a ``pyarrow.Array``. The buffers are shared
+        rather than copied, except for decimal columns and the
+        ``'object'`` layout, which are converted from their Python values.
+
+        Requires ``pyarrow``.
+        """
+        import pyarrow as pa
+
+        arrow_type = _arrow_type(pa, self.cqltype)
+        if arrow_type is None:
+            return pa.array(self.to_pylist())
+
+        buffers = [pa.py_buffer(self.validity)]
+        if self.offsets is not None:
+            buffers.append(pa.py_buffer(self.offsets))
+        buffers.append(pa.py_buffer(self.data))
+        return pa.Array.from_buffers(arrow_type, len(self), buffers, null_count=self.null_count)
+
+
+def _arrow_type(pa, cqltype):
+    if cqltype in (cqltypes.LongType, cqltypes.CounterColumnType):
+        return pa.int64()
+    if cqltype is cqltypes.Int32Type:
+        return pa.int32()
+    if cqltype is cqltypes.ShortType:
+        return pa.int16()
+    if cqltype is cqltypes.ByteType:
+        return pa.int8()
+    if cqltype is cqltypes.FloatType:
+        return pa.float32()
+    if cqltype is cqltypes.DoubleType:
+        return pa.float64()
+    if cqltype in (cqltypes.DateType, cqltypes.TimestampType):
+        return pa.timestamp('ms')
+    if cqltype is cqltypes.TimeType:
+        return pa.time64('ns')
+    if cqltype is cqltypes.SimpleDateType:
+        return pa.date32()
+    if cqltype is cqltypes.BooleanType:
+        return pa.bool_()
+    if cqltype in (cqltypes.UUIDType, cqltypes.TimeUUIDType):
+        return pa.binary(16)
+    if cqltype in (cqltypes.UTF8Type, cqltypes.VarcharType, cqltypes.AsciiType):
+        return pa.string()
+    if cqltype is cqltypes.BytesType:
+        return pa.binary()
+    return None
+
+
+class ColumnBatch(Mapping):
+    """
+    A page of results, decoded by column. This is a mapping of column
+    names to :class:`Column` objects.
+    """
+
+    column_names = None
+    """
+    The names of the columns, in the order they were selected.
+    """
+
+    num_rows = 0
+    """
+    The number of rows in the page.
+    """
+
+    def __init__(self, column_names, columns, num_rows):
+        self.column_names = list(column_names)
+        self.columns = columns
+        self.num_rows = num_rows
+        self._columns_by_name = dict(zip(self.column_names, columns))
+
+    def __getitem__(self, name):
+        return self._columns_by_name[name]
+
+    def __iter__(self):
+        return iter(self.column_names)
+
+    def __len__(self):
+        return len(self.column_names)
+
+    def to_pydict(self):
+        """
+        Returns a dict mapping each column name to a list of its values.
+        """
+        return dict((name, column.to_pylist()) for name, column in zip(self.column_names, self.columns))
+
+    def to_arrow(self):
+        """
+        Returns the page as a ``pyarrow.RecordBatch``. See :meth:`Column.to_arrow`.
+
+        Requires ``pyarrow``.
+        """
+        import pyarrow as pa
+        return pa.RecordBatch.from_arrays([column.to_arrow() for column in self.columns],
+                                          names=self.column_names)
@@ -13,15 +13,19 @@
 # limitations under the License.
 
 
-from collections import namedtuple
+from collections import defaultdict, namedtuple
+from copy import copy
 from heapq import heappush, heappop
 from itertools import cycle
 import six
-from six.moves import xrange, zip
+from six.moves import xrange, zip, zip_longest
 from threading import Condition
 import sys
 
-from cassandra.cluster import ResultSet
+from cassandra.cluster import ResultSet, EXEC_PROFILE_DEFAULT
+from cassandra.metadata import protect_name
+from cassandra.query import (BatchStatement, BatchType, BoundStatement, PreparedStatement,
+                             SimpleStatement, UNSET_VALUE)
 
 import logging
 log = logging.getLogger(__name__)
@@ -29,10 +33,12 @@ log = logging.getLogger(__name__)
 
 ExecutionResult = namedtuple('ExecutionResult', ['success', 'result_or_exc'])
 
-def execute_concurrent(session, statements_and_parameters, concurrency=100, raise_on_first_error=True, results_generator=False):
+def execute_concurrent(session, statements_and_parameters, concurrency=100, raise_on_first_error=True, results_generator=False, ordered=True):
     """
     Executes a sequence of (statement, parameters) tuples concurrently.  Each
-    ``parameters`` item must be a sequence or :const:`None`.
+    ``parameters`` item must be a sequence or :const:`None`. The sequence may
+    be any iterable, including an unbounded generator; it is consumed lazily,
+    as requests are started.
 
     The `concurrency` parameter controls how many statements will be executed
     concurrently.  When :attr:`.Cluster.protocol_version` is set to 1 or 2,
@@ -63,6 +69,13 @@ def execute_concurrent(session, statements_and_parameters, concurrency=100, rais
     an :class:`Exception`.  If ``success`` is :const:`True`, ``result_or_exc``
     will be the query result.
 
+    If `ordered` is :const:`False`, a generator of ``(index, ExecutionResult)`` tuples is
+    returned instead (regardless of `results_generator`), yielded as each request completes.
+    ``index`` is the position of the statement in `statements_and_parameters`. The next
+    statement is only started once a result has been consumed, so at most `concurrency`
+    results are in flight or waiting to be consumed at any time. This is the mode to use
+    for very large or unbounded inputs.
+
     Example usage::
 
         select_statement = session.prepare("SELECT * FROM users WHERE id=?")
@@ -91,7 +104,12 @@ def execute_concurrent(session, statements_and_parameters, concurrency=100, rais
     if not statements_and_parameters:
         return []
 
-    executor = ConcurrentExecutorGenResults(session, statements_and_parameters) if results_generator else ConcurrentExecutorListResults(session, statements_and_parameters)
+    if not ordered:
+        executor = ConcurrentExecutorUnorderedResults(session, statements_and_parameters)
+    elif results_generator:
+        executor = ConcurrentExecutorGenResults(session, statements_and_parameters)
+    else:
+        executor = ConcurrentExecutorListResults(session, statements_and_parameters)
     return executor.execute(concurrency, raise_on_first_error)
 
 
@@ -193,6 +211,33 @@ class ConcurrentExecutorGenResults(_ConcurrentExecutor):
                     self._current += 1
 
 
+class ConcurrentExecutorUnorderedResults(_ConcurrentExecutor):
+
+    def _put_result(self, result, idx, success):
+        # the next statement is started by the consumer, not here, so
+        # completed results can't pile up faster than they are consumed
+        with self._condition:
+            self._results_queue.append((idx, ExecutionResult(success, result)))
+            self._condition.notify()
+
+    def _results(self):
+        with self._condition:
+            while self._current < self._exec_count:
+                while not self._results_queue:
+                    self._condition.wait()
+                completed, self._results_queue = self._results_queue, []
+                for res in completed:
+                    self._current += 1
+                    self._execute_next()
+                    try:
+                        self._condition.release()
+                        if self._fail_fast and not res[1].success:
+                            self._raise(res[1].result_or_exc)
+                        yield res
+                    finally:
+                        self._condition.acquire()
+
+
 class ConcurrentExecutorListResults(_ConcurrentExecutor):
 
     _exception = None
@@ -237,3 +282,238 @@ def execute_concurrent_with_args(session, statement, parameters, *args, **kwargs
         execute_concurrent_with_args(session, statement, parameters, concurrency=50)
     """
     return execute_concurrent(session, zip(cycle((statement,)), parameters), *args, **kwargs)
+
+
+
+def execute_concurrent_batched(session, statements_and_parameters, max_batch_size=100, max_batch_bytes=5120,
+                               consistency_level=None, **kwargs):
+    """
+    Like :meth:`~cassandra.concurrent.execute_concurrent()`, but first groups
+    the (statement, parameters) tuples into per-partition ``UNLOGGED`` batches.
+
+    Statements are grouped by keyspace and :attr:`~.Statement.routing_key`, so
+    each batch writes to a single partition and a token-aware load balancing
+    policy routes it to one of that partition's replicas. This cuts round trips
+    for bulk loads without the coordinator overhead of multi-partition batches.
+    Batches are interleaved by replica so that concurrent requests are spread
+    over the cluster.
+
+    A batch holds at most `max_batch_size` statements and at most
+    `max_batch_bytes` of bound values (the default matches Cassandra's
+    ``batch_size_warn_threshold_in_kb``), unless a single statement is larger.
+    Statements without a routing key, and partitions with a single statement,
+    are executed on their own.
+
+    If `consistency_level` is given, it is set on every batch and statement
+    executed; statements passed as strings are wrapped in a
+    :class:`~.SimpleStatement` for this, and other statements are copied
+    rather than changed. Otherwise only statements with the same consistency
+    level and serial consistency level are batched together, and each batch
+    takes the levels of its statements. In either case statements are only
+    batched with others that have the same :attr:`~.Statement.is_idempotent`,
+    :attr:`~.Statement.retry_policy` and :attr:`~.Statement.custom_payload`,
+    and each batch takes these from its statements.
+
+    Other keyword arguments are passed on to :meth:`~cassandra.concurrent.execute_concurrent()`.
+    One result is returned for each batch or statement that was executed;
+    these are not in the order of `statements_and_parameters`.
+
+    Example usage::
+
+        insert = session.prepare("INSERT INTO events (device_id, ts, value) VALUES (?, ?, ?)")
+        execute_concurrent_batched(session, ((insert, event) for event in events), concurrency=50)
+    """
+    if max_batch_size <= 0:
+        raise ValueError("max_batch_size must be greater than 0")
+    statements = _group_by_partition(session, statements_and_parameters, max_batch_size,
+                                     max_batch_bytes, consistency_level)
+    return execute_concurrent(session, statements, **kwargs)
+
+
+def _group_by_partition(session, statements_and_parameters, max_batch_size, max_batch_bytes, consistency_level):
+    partitions = {}
+    unbatched = []
+    for statement, parameters in statements_and_parameters:
+        if isinstance(statement, PreparedStatement):
+            statement, parameters = statement.bind(() if parameters is None else parameters), None
+        elif consistency_level is not None:
+            statement = SimpleStatement(statement) if isinstance(statement, six.string_types) else copy(statement)
+        if consistency_level is not None:
+            statement.consistency_level = consistency_level
+
+        routing_key = getattr(statement, 'routing_key', None)
+        if not routing_key or parameters:
+            unbatched.append((statement, parameters))
+        else:
+            # a batch has a single set of these for all of its statements
+            payload = statement.custom_payload
+            options = (statement.consistency_level, statement.serial_consistency_level,
+                       statement.is_idempotent, statement.retry_policy,
+                       tuple(sorted(payload.items())) if payload else None)
+            partitions.setdefault((statement.keyspace, routing_key, options), []).append(statement)
+
+    routing_keys_by_ks = defaultdict(set)
+    for keyspace, routing_key, _ in partitions:
+        routing_keys_by_ks[keyspace].add(routing_key)
+    primary_replicas = {}
+    for keyspace, routing_keys in six.iteritems(routing_keys_by_ks):
+        routing_keys = list(routing_keys)
+        all_replicas = session.cluster.metadata.get_replicas_for_keys(keyspace, routing_keys)
+        for routing_key, replicas in zip(routing_keys, all_replicas):
+            primary_replicas[keyspace, routing_key] = replicas[0] if replicas else None
+
+    by_replica = defaultdict(list)
+    for (keyspace, routing_key, _), statements in six.iteritems(partitions):
+        batches = by_replica[primary_replicas[keyspace, routing_key]]
+
+        group, group_bytes = [], 0
+        for statement in statements:
+            size = sum(len(v) for v in statement.values if v is not None and v is not UNSET_VALUE) \
+                if isinstance(statement, BoundStatement) else 0
+            if group and (len(group) >= max_batch_size or group_bytes + size > max_batch_bytes):
+                batches.append(_batch_or_statement(group, session))
+                group, group_bytes = [], 0
+            group.append(statement)
+            group_bytes += size
+        batches.append(_batch_or_statement(group, session))
+
+    return [s for batches in zip_longest(*by_replica.values())
+            for s in batches if s is not None] + unbatched
+
+
+def _batch_or_statement(statements, session):
+    if len(statements) == 1:
+        return statements[0], None
+    first = statements[0]
+    batch = BatchStatement(BatchType.UNLOGGED, retry_policy=first.retry_policy,
+                           consistency_level=first.consistency_level,
+                           serial_consistency_level=first.serial_consistency_level, session=session,
+                           custom_payload=dict(first.custom_payload) if first.custom_payload else None)
+    batch.is_idempotent = first.is_idempotent
+    for statement in statements:
+        batch.add(statement)
+    return batch, None
+
+
+class ConcurrentTokenRangeScan(object):
+    """
+    Reads a whole table as one paged query per token range of the ring (see
+    :meth:`.Session.scan_table`). Each query is routed by its range, so with
+    :class:`~.TokenAwarePolicy` it is served by a replica of that range.
+    """
+
+    def __init__(self, session, keyspace, table, columns=None, fetch_size=None,
+                 consistency_level=None, execution_profile=EXEC_PROFILE_DEFAULT):
+        metadata = session.cluster.metadata
+        token_map = metadata.token_map
+        if not token_map:
+            raise ValueError("Token range scans require token metadata (see Cluster.token_metadata_enabled)")
+        ks_meta = metadata.keyspaces.get(keyspace)
+        table_meta = ks_meta.tables.get(table) if ks_meta else None
+        if table_meta is None:
+            raise ValueError("Table %s.%s was not found in the cluster metadata" % (keyspace, table))
+
+        self.session = session
+        self.fetch_size = fetch_size
+        self.consistency_level = consistency_level
+        self.execution_profile = execution_profile
+        self._token_map = token_map
+
+        # prepared up front: statements are bound while holding the lock the
+        # response callbacks need
+        token = "token(%s)" % ', '.join(protect_name(c.name) for c in table_meta.partition_key)
+        select = "SELECT %s FROM %s.%s WHERE " % (
+            ', '.join(protect_name(c) for c in columns) if columns else '*',
+            protect_name(keyspace), protect_name(table))
+        self._first_range = session.prepare(select + "%s <= ?" % (token,))
+        self._last_range = session.prepare(select + "%s > ?" % (token,))
+        self._range = session.prepare(select + "%s > ? AND %s <= ?" % (token, token))
+
+        self._condition = Condition()
+        self._pages = []
+        self._in_flight = 0
+
+    def token_ranges(self):
+        """
+        Returns the ``(start, end)`` token ranges to scan, interleaved by owner
+        so that concurrent queries are spread over the cluster.
+        """
+        token_map = self._token_map
+        ring = token_map.ring
+        by_owner = defaultdict(list)
+        for start, end in token_map.token_ranges():
+            by_owner[token_map.token_to_host_owner.get(end if end is not None else ring[0])].append((start, end))
+        return [r for ranges in zip_longest(*by_owner.values()) for r in ranges if r is not None]
+
+    def _statement(self, start, end):
+        if start is None:
+            prepared, values = self._first_range, (end.value,)
+        elif end is None:
+            prepared, values = self._last_range, (start.value,)
+        else:
+            prepared, values = self._range, (start.value, end.value)
+
+        # ranges exclude their start, so the token map resolves the start to
+        # the range owner; the open-ended ranges are owned like the last one
+        routing_token = start if start is not None else self._token_map.ring[-1]
+        statement = BoundStatement(prepared, routing_key=routing_token).bind(values)
+        if self.fetch_size is not None:
+            statement.fetch_size = self.fetch_size
+        if self.consistency_level is not None:
+            statement.consistency_level = self.consistency_level
+        return statement
+
+    def execute(self, concurrency):
+        self._statements = (self._statement(start, end) for start, end in self.token_ranges())
+        self._pages = []
+        self._in_flight = 0
+        with self._condition:
+            for n in xrange(concurrency):
+                if not self._execute_next():
+                    break
+        return self._results()
+
+    def _execute_next(self):
+        # lock must be held
+        try:
+            statement = next(self._statements)
+        except StopIteration:
+            return False
+        self._in_flight += 1
+        future = self.session.execute_async(statement, execution_profile=self.execution_profile)
+        future.add_callbacks(
+            callback=self._on_page, callback_args=(future,),
+            errback=self._on_error)
+        return True
+
+    def _on_page(self, rows, future):
+        with self._condition:
+            self._pages.append((future, rows))
+            self._condition.notify()
+
+    def _on_error(self, exc):
+        with self._condition:
+            self._pages.append((None, exc))
+            self._condition.notify()
+
+    def _results(self):
+        with self._condition:
+            while self._in_flight:
+                while not self._pages:
+                    self._condition.wait()
+                future, rows = self._pages.pop(0)
+                if future is None:
+                    raise rows
+                # one buffered page per range: the next one is only requested
+                # once this one is handed out
+                if future.has_more_pages:
+                    future.start_fetching_next_page()
+                else:
+                    self._in_flight -= 1
+                    self._execute_next()
+                try:
+                    self._condition.release()
+                    for row in rows:
+                        yield row
+                finally:
+                    self._condition.acquire()
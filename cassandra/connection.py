@@ -16,15 +16,14 @@ from __future__ import absolute_import  # to enable import io from stdlib
 from collections import defaultdict, deque
 import errno
 from functools import wraps, partial
-from heapq import heappush, heappop
-import io
 import logging
+import math
 import six
 from six.moves import range
 import socket
 import struct
 import sys
-from threading import Thread, Event, RLock
+from threading import Thread, Event, Lock, RLock
 import time
 
 try:
@@ -77,6 +76,9 @@ else:
         return int32_pack(len(byts)) + lz4_block.compress(byts)[4:]
 
     def lz4_decompress(byts):
+        # frame bodies arrive as views into the connection read buffer
+        if isinstance(byts, memoryview):
+            byts = byts.tobytes()
         # flip from big-endian to little-endian
         return lz4_block.decompress(byts[3::-1] + byts[4:])
 
@@ -89,6 +91,8 @@ except ImportError:
 else:
     # work around apparently buggy snappy decompress
     def decompress(byts):
+        if isinstance(byts, memoryview):
+            byts = byts.tobytes()
         if byts == '\x00':
             return ''
         return snappy.decompress(byts)
@@ -188,11 +192,81 @@ def defunct_on_error(f):
 
 DEFAULT_CQL_VERSION = '3.0.0'
 
-if six.PY3:
-    def int_from_buf_item(i):
-        return i
-else:
-    int_from_buf_item = ord
+class _ReadBuffer(object):
+    """
+    Growable receive buffer shared by all reactor implementations.
+
+    Incoming bytes are appended at the tail of a preallocated ``bytearray``
+    and frames are consumed from the head. Frame bodies are handed out as
+    ``memoryview`` slices, so they are not copied on their way to the
+    decoder; a slice is only valid until the next call to :meth:`write`.
+    Space freed by consumed frames is reclaimed lazily, by moving the unread
+    tail to the front only when more room is needed.
+    """
+
+    initial_size = 65536
+
+    # capacity above which an emptied buffer is reallocated at initial_size,
+    # so that one large result page does not pin memory for the connection lifetime
+    max_idle_size = 1048576
+
+    def __init__(self, initial_size=None):
+        if initial_size:
+            self.initial_size = initial_size
+        self._buf = bytearray(self.initial_size)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def write(self, data):
+        size = len(data)
+        if not size:
+            return
+        end = self._end
+        if end + size > len(self._buf):
+            self._make_room(size)
+            end = self._end
+        self._buf[end:end + size] = data
+        self._end = end + size
+
+    def _make_room(self, size):
+        unread = self._end - self._start
+        capacity = len(self._buf)
+        if unread + size <= capacity:
+            # compact in place
+            self._buf[:unread] = self._buf[self._start:self._end]
+        else:
+            while capacity < unread + size:
+                capacity *= 2
+            new_buf = bytearray(capacity)
+            new_buf[:unread] = self._buf[self._start:self._end]
+            self._buf = new_buf
+        self._start = 0
+        self._end = unread
+
+    def byte_at(self, offset):
+        return self._buf[self._start + offset]
+
+    def unpack_from(self, st, offset):
+        return st.unpack_from(self._buf, self._start + offset)
+
+    def view(self, start, end):
+        """
+        Returns a ``memoryview`` over unread bytes ``[start, end)``, relative to the head.
+        """
+        return memoryview(self._buf)[self._start + start:self._start + end]
+
+    def consume(self, size):
+        self._start += size
+        if self._start >= self._end:
+            self._start = self._end = 0
+            if len(self._buf) > self.max_idle_size:
+                self._buf = bytearray(self.initial_size)
+
+    def getvalue(self):
+        return bytes(self._buf[self._start:self._end])
 
 
 class Connection(object):
@@ -202,6 +276,11 @@ class Connection(object):
     in_buffer_size = 4096
     out_buffer_size = 4096
 
+    # Max number of queued buffers flushed by a single write. When writes are not
+    # gathered (see _gather_writes), small buffers are instead joined until they
+    # reach out_buffer_size.
+    max_write_batch = 128
+
     cql_version = None
     no_compact = False
     protocol_version = ProtocolVersion.MAX_SUPPORTED
@@ -214,10 +293,6 @@ class Connection(object):
     ssl_options = None
     last_error = None
 
-    # The current number of operations that are in flight. More precisely,
-    # the number of request IDs that are currently in use.
-    in_flight = 0
-
     # Max concurrent requests allowed per connection. This is set optimistically high, allowing
     # all request ids to be used in protocol version 3+. Normally concurrency would be controlled
     # at a higher level by the application or concurrent.execute_concurrent. This attribute
@@ -226,7 +301,9 @@ class Connection(object):
 
     # A set of available request IDs.  When using the v3 protocol or higher,
     # this will not initially include all request IDs in order to save memory,
-    # but the set will grow if it is exhausted.
+    # but the set will grow if it is exhausted. Request IDs are taken from
+    # and returned to it without holding the lock, since deque.popleft()
+    # and deque.append() are atomic.
     request_ids = None
 
     # Tracks the highest used request ID in order to help with growing the
@@ -257,6 +334,10 @@ class Connection(object):
 
     _check_hostname = False
 
+    # Use socket.sendmsg to flush several queued frames with one system call.
+    # Not available on Python 2, Windows, or SSL sockets.
+    _gather_writes = hasattr(socket.socket, 'sendmsg')
+
     def __init__(self, host='127.0.0.1', port=9042, authenticator=None,
                  ssl_options=None, sockopts=None, compression=True,
                  cql_version=None, protocol_version=ProtocolVersion.MAX_SUPPORTED, is_control_connection=False,
@@ -276,9 +357,11 @@ class Connection(object):
         self.no_compact = no_compact
         self._push_watchers = defaultdict(set)
         self._requests = {}
-        self._iobuf = io.BytesIO()
+        self._request_timings = {}
+        self._iobuf = _ReadBuffer()
 
         if ssl_options:
+            self._gather_writes = False
             self._check_hostname = bool(self.ssl_options.pop('check_hostname', False))
             if self._check_hostname:
                 if not getattr(ssl, 'match_hostname', None):
@@ -297,6 +380,10 @@ class Connection(object):
             self.request_ids = deque(range(self.max_request_id + 1))
             self.highest_request_id = self.max_request_id
 
+        # one entry per request in flight; like request_ids, it is only
+        # appended to and popped from, so it needs no lock
+        self._in_flight = deque()
+
         self.lock = RLock()
         self.connected_event = Event()
 
@@ -402,6 +489,7 @@ class Connection(object):
         with self.lock:
             requests = self._requests
             self._requests = {}
+            self._request_timings = {}
 
         if not requests:
             return
@@ -437,18 +525,55 @@ class Connection(object):
             t.daemon = True
             t.start()
 
+    @property
+    def in_flight(self):
+        """
+        The number of requests in flight on this connection, counted from
+        :meth:`borrow_request_id` until :meth:`release_request`.
+        """
+        return len(self._in_flight)
+
     def get_request_id(self):
         """
-        This must be called while self.lock is held.
+        Returns a free request ID, or :const:`None` if all of them are in use.
+        The lock is only taken when the set of request IDs has to grow.
         """
         try:
             return self.request_ids.popleft()
         except IndexError:
-            new_request_id = self.highest_request_id + 1
-            # in_flight checks should guarantee this
-            assert new_request_id <= self.max_request_id
-            self.highest_request_id = new_request_id
-            return self.highest_request_id
+            with self.lock:
+                # another thread may have grown the set already
+                try:
+                    return self.request_ids.popleft()
+                except IndexError:
+                    pass
+                if self.highest_request_id >= self.max_request_id:
+                    return None
+                self.highest_request_id += 1
+                return self.highest_request_id
+
+    def borrow_request_id(self):
+        """
+        Returns a free request ID for a new request and counts the request
+        in :attr:`in_flight` until :meth:`release_request` is called, or
+        returns :const:`None` if all request IDs are in use.
+        """
+        request_id = self.get_request_id()
+        if request_id is not None:
+            self._in_flight.append(None)
+        return request_id
+
+    def release_request(self):
+        """
+        Stops counting a request in :attr:`in_flight`. Its request ID is
+        freed separately, when the response arrives or the request times out.
+        Returns the number of requests still in flight.
+        """
+        try:
+            self._in_flight.pop()
+        except IndexError:
+            pass
+        return len(self._in_flight)
 
     def handle_pushed(self, response):
         log.debug("Message pushed from server: %r", response)
@@ -458,7 +583,13 @@ class Connection(object):
             except Exception:
                 log.exception("Pushed event handler errored, ignoring:")
 
-    def send_msg(self, msg, request_id, cb, encoder=ProtocolHandler.encode_message, decoder=ProtocolHandler.decode_message, result_metadata=None):
+    def send_msg(self, msg, request_id, cb, encoder=ProtocolHandler.encode_message, decoder=ProtocolHandler.decode_message, result_metadata=None,
+                 timings=None):
+        """
+        If `timings` is a dict, the times at which the request was encoded,
+        and at which its response was received and decoded, are recorded in
+        it under the keys ``'encoded'``, ``'received'`` and ``'decoded'``.
+        """
         if self.is_defunct:
             raise ConnectionShutdown("Connection to %s is defunct" % self.host)
         elif self.is_closed:
@@ -467,10 +598,61 @@ class Connection(object):
         # queue the decoder function with the request
         # this allows us to inject custom functions per request to encode, decode messages
         self._requests[request_id] = (cb, decoder, result_metadata)
+        if timings is not None:
+            self._request_timings[request_id] = timings
+        elif self._request_timings:
+            # left behind by a timed out request which used this stream id
+            self._request_timings.pop(request_id, None)
         msg = encoder(msg, request_id, self.protocol_version, compressor=self.compressor, allow_beta_protocol_version=self.allow_beta_protocol_version)
+        if timings is not None:
+            # before pushing, since the event loop may write the request and
+            # read its response before push() returns
+            timings['encoded'] = time.time()
         self.push(msg)
         return len(msg)
 
+    def _write_batch(self, pending):
+        """
+        Returns buffers from the head of the ``pending`` write queue, to be
+        flushed with one call to :meth:`_send_buffers`. The buffers are not
+        removed from the queue; see :meth:`_consume_sent`.
+
+        This must be called while the queue lock is held.
+        """
+        batch = []
+        size = 0
+        for buf in pending:
+            batch.append(buf)
+            size += len(buf)
+            if len(batch) >= self.max_write_batch or (size >= self.out_buffer_size and not self._gather_writes):
+                break
+        return batch
+
+    def _send_buffers(self, sock, buffers):
+        """
+        Writes ``buffers`` to ``sock`` with a single send, returning the number of bytes sent.
+        """
+        if len(buffers) == 1:
+            return sock.send(buffers[0])
+        if self._gather_writes:
+            return sock.sendmsg(buffers)
+        return sock.send(b''.join(b.tobytes() if isinstance(b, memoryview) else b for b in buffers))
+
+    @staticmethod
+    def _consume_sent(pending, sent):
+        """
+        Removes ``sent`` bytes from the head of the ``pending`` write queue.
+
+        This must be called while the queue lock is held.
+        """
+        while sent and pending:
+            size = len(pending[0])
+            if sent < size:
+                pending[0] = memoryview(pending[0])[sent:]
+                return
+            pending.popleft()
+            sent -= size
+
     def wait_for_response(self, msg, timeout=None):
         return self.wait_for_responses(msg, timeout=timeout)[0]
 
@@ -493,10 +675,13 @@ class Connection(object):
         messages_sent = 0
         while True:
             needed = len(msgs) - messages_sent
-            with self.lock:
-                available = min(needed, self.max_request_id - self.in_flight + 1)
-                request_ids = [self.get_request_id() for _ in range(available)]
-                self.in_flight += available
+            request_ids = []
+            while len(request_ids) < needed:
+                request_id = self.borrow_request_id()
+                if request_id is None:
+                    break
+                request_ids.append(request_id)
+            available = len(request_ids)
 
             for i, request_id in enumerate(request_ids):
                 self.send_msg(msgs[messages_sent + i],
@@ -546,25 +731,24 @@ class Connection(object):
 
     @defunct_on_error
     def _read_frame_header(self):
-        buf = self._iobuf.getvalue()
+        buf = self._iobuf
         pos = len(buf)
         if pos:
-            version = int_from_buf_item(buf[0]) & PROTOCOL_VERSION_MASK
+            version = buf.byte_at(0) & PROTOCOL_VERSION_MASK
             if version > ProtocolVersion.MAX_SUPPORTED:
                 raise ProtocolError("This version of the driver does not support protocol version %d" % version)
             frame_header = frame_header_v3 if version >= 3 else frame_header_v1_v2
             # this frame header struct is everything after the version byte
             header_size = frame_header.size + 1
             if pos >= header_size:
-                flags, stream, op, body_len = frame_header.unpack_from(buf, 1)
+                flags, stream, op, body_len = buf.unpack_from(frame_header, 1)
                 if body_len < 0:
                     raise ProtocolError("Received negative body length: %r" % body_len)
                 self._current_frame = _Frame(version, flags, stream, op, header_size, body_len + header_size)
         return pos
 
     def _reset_frame(self):
-        self._iobuf = io.BytesIO(self._iobuf.read())
-        self._iobuf.seek(0, 2)  # io.SEEK_END == 2 (constant not present in 2.6)
+        self._iobuf.consume(self._current_frame.end_pos)
         self._current_frame = None
 
     def process_io_buffer(self):
@@ -572,7 +756,7 @@ class Connection(object):
             if not self._current_frame:
                 pos = self._read_frame_header()
             else:
-                pos = self._iobuf.tell()
+                pos = len(self._iobuf)
 
             if not self._current_frame or pos < self._current_frame.end_pos:
                 # we don't have a complete header yet or we
@@ -581,8 +765,7 @@ class Connection(object):
                 return
             else:
                 frame = self._current_frame
-                self._iobuf.seek(frame.body_offset)
-                msg = self._iobuf.read(frame.end_pos - frame.body_offset)
+                msg = self._iobuf.view(frame.body_offset, frame.end_pos)
                 self.process_msg(frame, msg)
                 self._reset_frame()
 
@@ -590,6 +773,7 @@ class Connection(object):
     def process_msg(self, header, body):
         self.msg_received = True
         stream_id = header.stream
+        timings = None
         if stream_id < 0:
             callback = None
             decoder = ProtocolHandler.decode_message
@@ -602,12 +786,18 @@ class Connection(object):
             except KeyError:
                 return
 
-            with self.lock:
-                self.request_ids.append(stream_id)
+            if self._request_timings:
+                timings = self._request_timings.pop(stream_id, None)
+                if timings is not None:
+                    timings['received'] = time.time()
+
+            self.request_ids.append(stream_id)
 
         try:
             response = decoder(header.version, self.user_type_map, stream_id,
                                header.flags, header.opcode, body, self.decompressor, result_metadata)
+            if timings is not None:
+                timings['decoded'] = time.time()
         except Exception as exc:
             log.exception("Error decoding response from Cassandra. "
                           "%s; buffer: %r", header, self._iobuf.getvalue())
@@ -827,29 +1017,30 @@ class Connection(object):
         two arguments: this connection and an Exception if an error
         occurred, otherwise :const:`None`.
 
-        This method will always increment :attr:`.in_flight` attribute, even if
+        This method will always count a request in :attr:`.in_flight`, even if
         it doesn't need to make a request, just to maintain an
         ":attr:`.in_flight` is incremented" invariant.
         """
-        # Here we increment in_flight unconditionally, whether we need to issue
+        # Here we borrow a request id unconditionally, whether we need to issue
         # a request or not. This is bad, but allows callers -- specifically
         # _set_keyspace_for_all_conns -- to assume that we increment
         # self.in_flight during this call. This allows the passed callback to
         # safely call HostConnection{Pool,}.return_connection on this
         # Connection.
         #
-        # We use a busy wait on the lock here because:
+        # We use a busy wait here because:
         # - we'll only spin if the connection is at max capacity, which is very
         #   unlikely for a set_keyspace call
         # - it allows us to avoid signaling a condition every time a request completes
         while True:
-            with self.lock:
-                if self.in_flight < self.max_request_id:
-                    self.in_flight += 1
-                    break
+            request_id = self.borrow_request_id()
+            if request_id is not None:
+                break
             time.sleep(0.001)
 
         if not keyspace or keyspace == self.keyspace:
+            # keep the request counted in in_flight, but free its id
+            self.request_ids.append(request_id)
             callback(self, None)
             return
 
@@ -866,10 +1057,6 @@ class Connection(object):
                 callback(self, self.defunct(ConnectionException(
                     "Problem while setting keyspace: %r" % (result,), self.host)))
 
-        # We've incremented self.in_flight above, so we "have permission" to
-        # acquire a new request id
-        request_id = self.get_request_id()
-
         self.send_msg(query, request_id, process_result)
 
     @property
@@ -901,8 +1088,7 @@ class ResponseWaiter(object):
         self.event = Event()
 
     def got_response(self, response, index):
-        with self.connection.lock:
-            self.connection.in_flight -= 1
+        self.connection.release_request()
         if isinstance(response, Exception):
             if hasattr(response, 'to_exception'):
                 response = response.to_exception()
@@ -948,13 +1134,12 @@ class HeartbeatFuture(object):
         self.owner = owner
         log.debug("Sending options message heartbeat on idle connection (%s) %s",
                   id(connection), connection.host)
-        with connection.lock:
-            if connection.in_flight <= connection.max_request_id:
-                connection.in_flight += 1
-                connection.send_msg(OptionsMessage(), connection.get_request_id(), self._options_callback)
-            else:
-                self._exception = Exception("Failed to send heartbeat because connection 'in_flight' exceeds threshold")
-                self._event.set()
+        request_id = connection.borrow_request_id()
+        if request_id is not None:
+            connection.send_msg(OptionsMessage(), request_id, self._options_callback)
+        else:
+            self._exception = Exception("Failed to send heartbeat because connection 'in_flight' exceeds threshold")
+            self._event.set()
 
     def wait(self, timeout):
         self._event.wait(timeout)
@@ -1027,9 +1212,7 @@ class ConnectionHeartbeat(Thread):
                     connection = f.connection
                     try:
                         f.wait(timeout)
-                        # TODO: move this, along with connection locks in pool, down into Connection
-                        with connection.lock:
-                            connection.in_flight -= 1
+                        connection.release_request()
                         connection.reset_idle()
                     except Exception as e:
                         log.warning("Heartbeat failed for connection (%s) to %s",
@@ -1066,6 +1249,11 @@ class Timer(object):
 
     canceled = False
 
+    # the TimerManager holding this timer, and the wheel slot it is in
+    # while it is scheduled
+    _manager = None
+    _slot = None
+
     def __init__(self, timeout, callback):
         self.end = time.time() + timeout
         self.callback = callback
@@ -1075,6 +1263,9 @@ class Timer(object):
 
     def cancel(self):
         self.canceled = True
+        manager = self._manager
+        if manager is not None:
+            manager._remove_timer(self)
 
     def finish(self, time_now):
         if self.canceled:
@@ -1088,16 +1279,89 @@ class Timer(object):
 
 
 class TimerManager(object):
+    """
+    Runs the timers of an event loop.
+
+    Timers are kept in a hierarchical timing wheel: the first wheel has a
+    slot for each tick of :attr:`resolution` seconds, and each of the
+    following wheels has a slot for a full turn of the wheel before it.
+    Timers in the outer wheels move to the inner ones as their end comes
+    closer. Adding and cancelling a timer take constant time, and cancelled
+    timers are removed right away, so the cost of request timeouts does not
+    grow with the number of requests in flight.
+
+    A timer runs on the first call to :meth:`service_timeouts` after the
+    tick it ends in, so up to one tick late, but never early.
+    """
+
+    resolution = 0.01
+    """
+    The length of a tick, in seconds.
+    """
+
+    _wheel_bits = 6
+    _wheel_count = 4
 
     def __init__(self):
-        self._queue = []
-        self._new_timers = []
+        self._lock = Lock()
+        self._wheels = [[set() for _ in range(1 << self._wheel_bits)]
+                        for _ in range(self._wheel_count)]
+        # timers which were already due when they were added
+        self._due = set()
+        self._timer_count = 0
+        # the last tick serviced
+        self._tick = int(time.time() / self.resolution)
+        self._next_end = None
 
     def add_timer(self, timer):
         """
         called from client thread with a Timer object
         """
-        self._new_timers.append((timer.end, timer))
+        tick = int(math.ceil(timer.end / self.resolution))
+        with self._lock:
+            if not self._timer_count:
+                # nothing to move along, so skip the ticks since the last service
+                self._tick = max(self._tick, int(time.time() / self.resolution))
+            timer._tick = tick
+            timer._manager = self
+            self._schedule(timer)
+            self._timer_count += 1
+
+            next_end = timer.end if timer._slot is self._due else tick * self.resolution
+            if self._next_end is None or next_end < self._next_end:
+                self._next_end = next_end
+
+    def _remove_timer(self, timer):
+        with self._lock:
+            slot = timer._slot
+            if slot is not None:
+                slot.discard(timer)
+                timer._slot = None
+                self._timer_count -= 1
+
+    def _schedule(self, timer):
+        tick = timer._tick
+        delta = tick - self._tick
+        if delta <= 0:
+            slot = self._due
+        else:
+            bits = self._wheel_bits
+            level = 0
+            while delta >> (bits * (level + 1)) and level < self._wheel_count - 1:
+                level += 1
+            if delta >> (bits * (level + 1)):
+                # beyond the last wheel; it is put back when that slot comes up
+                tick = self._tick + (1 << (bits * (level + 1))) - 1
+            slot = self._wheels[level][(tick >> (bits * level)) & ((1 << bits) - 1)]
+        slot.add(timer)
+        timer._slot = slot
+
+    def _take(self, slot, expired):
+        for timer in slot:
+            timer._slot = None
+            expired.append(timer)
+        self._timer_count -= len(slot)
+        slot.clear()
 
     def service_timeouts(self):
         """
@@ -1105,27 +1369,67 @@ class TimerManager(object):
         Called from the event thread
         :return: next end time, or None
         """
-        queue = self._queue
-        if self._new_timers:
-            new_timers = self._new_timers
-            while new_timers:
-                heappush(queue, new_timers.pop())
-
-        if queue:
-            now = time.time()
-            while queue:
-                try:
-                    timer = queue[0][1]
-                    if timer.finish(now):
-                        heappop(queue)
-                    else:
-                        return timer.end
-                except Exception:
-                    log.exception("Exception while servicing timeout callback: ")
+        now = time.time()
+        expired = []
+        with self._lock:
+            target = int(now / self.resolution)
+            advanced = self._tick < target
+            self._advance(target, expired)
+            next_end = self._next_end
+            if advanced or expired or not self._timer_count or (next_end is not None and next_end <= now):
+                self._next_end = self._find_next_end()
+
+        for timer in expired:
+            try:
+                if not timer.finish(now):
+                    # only when the clock is off by a rounding error
+                    self.add_timer(timer)
+            except Exception:
+                log.exception("Exception while servicing timeout callback: ")
+
+        return self._next_end
+
+    def _advance(self, target, expired):
+        wheels = self._wheels
+        bits = self._wheel_bits
+        mask = (1 << bits) - 1
+        if self._due:
+            self._take(self._due, expired)
+        while self._tick < target and self._timer_count:
+            self._tick += 1
+            tick = self._tick
+            # move the timers of the outer wheels which end before the next
+            # turn of the inner wheels, outermost first
+            for level in range(self._wheel_count - 1, 0, -1):
+                if not tick & ((1 << (bits * level)) - 1):
+                    slot = wheels[level][(tick >> (bits * level)) & mask]
+                    timers = list(slot)
+                    slot.clear()
+                    for timer in timers:
+                        self._schedule(timer)
+            self._take(wheels[0][tick & mask], expired)
+            if self._due:
+                self._take(self._due, expired)
+        self._tick = max(self._tick, target)
+
+    def _find_next_end(self):
+        if not self._timer_count:
+            return None
+        if self._due:
+            return min(timer.end for timer in self._due)
+
+        # the next timer in the first wheel, or else the next time the
+        # outer wheels move timers into it
+        first = self._wheels[0]
+        mask = (1 << self._wheel_bits) - 1
+        turn = (self._tick | mask) + 1
+        for tick in range(self._tick + 1, turn):
+            if first[tick & mask]:
+                break
+        else:
+            tick = turn
+        return tick * self.resolution
 
     @property
     def next_timeout(self):
-        try:
-            return self._queue[0][0]
-        except IndexError:
-            pass
+        return self._next_end
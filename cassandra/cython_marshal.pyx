@@ -19,6 +19,7 @@ import six
 from libc.stdint cimport (int8_t, int16_t, int32_t, int64_t,
                           uint8_t, uint16_t, uint32_t, uint64_t)
 from libc.string cimport memcpy
+from cpython.bytes cimport PyBytes_FromStringAndSize
 from cassandra.buffer cimport Buffer, buf_read, to_bytes
 
 cdef bint is_little_endian
@@ -55,6 +56,22 @@ cdef inline num_t unpack_num(Buffer *buf, num_t *dummy=NULL): # dummy pointer be
 
     return ret
 
+cdef inline bytes pack_num(num_t val):
+    """
+    Copy to a new bytes object, conditionally swapping to network byte order
+    """
+    cdef Py_ssize_t i
+    cdef char out[8]
+    cdef char *src = <char*> &val
+
+    if is_little_endian:
+        for i in range(sizeof(num_t)):
+            out[i] = src[sizeof(num_t) - i - 1]
+    else:
+        memcpy(out, src, sizeof(num_t))
+
+    return PyBytes_FromStringAndSize(out, sizeof(num_t))
+
 cdef varint_unpack(Buffer *term):
     """Unpack a variable-sized integer"""
     if PY3:
@@ -0,0 +1,287 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides an optional protocol handler that decodes result pages
+in a pool of worker processes, so that decoding large results is not limited
+to the one core the GIL allows a process.
+
+The encoded rows of each page are copied into shared memory on the event
+loop thread and decoded by a worker with the Cython columnar parser. The
+worker writes the column buffers back into shared memory, so no rows or
+values are pickled on the way in or out.
+
+Requires the driver to be built with Cython and Python 3.8 or later.
+"""
+
+from __future__ import absolute_import
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import multiprocessing
+import os
+
+from cassandra import cqltypes
+from cassandra.cython_deps import HAVE_CYTHON
+from cassandra.marshal import int32_pack
+from cassandra.protocol import ResultMessage, _ProtocolHandler, read_int
+
+if HAVE_CYTHON:
+    from cassandra.bytesio import BytesIOReader
+    from cassandra.columnar_parser import Column, ColumnarParser, ColumnBatch, _layouts
+    from cassandra.deserializers import make_deserializers
+    from cassandra.parsing import ParseDesc
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+_BUFFER_NAMES = ('validity', 'data', 'offsets', 'scales')
+
+
+class DecodeProcessPool(object):
+    """
+    A pool of processes which decode result pages into
+    :class:`~.columnar_parser.ColumnBatch` objects.
+
+    Results are decoded by the pool when :attr:`protocol_handler` is set as
+    the :attr:`.Session.client_protocol_handler`::
+
+        >>> from cassandra.decode_pool import DecodeProcessPool
+        >>> from cassandra.query import tuple_factory
+        >>> pool = DecodeProcessPool(processes=4)
+        >>> session.client_protocol_handler = pool.protocol_handler
+        >>> session.row_factory = tuple_factory
+        >>> for batch in session.execute("SELECT * FROM events"):
+        ...     process(batch.to_arrow())
+
+    Each page is returned as a :class:`~.columnar_parser.ColumnBatch`,
+    as with the :class:`~.protocol.ColumnarProtocolHandler`. Columns of types
+    without a columnar layout (collections, tuples, user types, etc.) are
+    deserialized in the driver process when the page arrives; user types are
+    mapped to the classes registered with :meth:`.Cluster.register_user_type`.
+
+    The worker processes are started by a fork server (or spawned where fork
+    servers are not available) when the pool is created, never forked from
+    a running driver.
+
+    The pool is not shut down with the cluster; call :meth:`shutdown` when it
+    is no longer used.
+    """
+
+    min_size = 65536
+    """
+    Pages whose rows take fewer bytes than this are decoded on the event loop
+    thread, since handing them to a worker costs more than decoding them.
+    """
+
+    protocol_handler = None
+    """
+    The protocol handler class which sends result pages to this pool.
+    """
+
+    def __init__(self, processes=None, min_size=None):
+        if shared_memory is None:
+            raise ImportError("DecodeProcessPool requires Python 3.8 or later")
+        if not HAVE_CYTHON:
+            raise ImportError("DecodeProcessPool requires the driver to be built with Cython")
+
+        if min_size is not None:
+            self.min_size = min_size
+
+        # forking a process whose other threads may hold locks can deadlock
+        # the child, which would also inherit every open socket
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+        else:
+            context = multiprocessing.get_context('spawn')
+        processes = processes or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(processes, mp_context=context)
+        # the workers are otherwise started by the first pages submitted,
+        # on the event loop thread
+        for job in [self._executor.submit(_start_worker) for _ in range(processes)]:
+            job.result()
+
+        # the executor's result thread is shared by every page, so pages are
+        # finished on a thread of their own
+        self._dispatcher = ThreadPoolExecutor(1)
+        self.protocol_handler = _decode_pool_protocol_handler(self)
+
+    def shutdown(self, wait=True):
+        """
+        Shuts down the worker processes. Pages already submitted are still
+        decoded if `wait` is true.
+        """
+        self._executor.shutdown(wait)
+        self._dispatcher.shutdown(wait)
+
+    def decode_rows(self, f, rowcount, colnames, coltypes, protocol_version):
+        """
+        Reads the encoded rows of a page from `f`. Returns the decoded
+        :class:`~.columnar_parser.ColumnBatch`, or a :class:`concurrent.futures.Future`
+        for it if the page is sent to a worker.
+        """
+        # only types with a columnar layout are decoded by the workers;
+        # the others come back as raw values
+        layout_types = [coltype.cassname if coltype in _layouts else None for coltype in coltypes]
+        rows = f.getbuffer()[f.tell():]
+        try:
+            if len(rows) < self.min_size:
+                batch = _decode_columns(bytes(rows), rowcount, colnames, layout_types, protocol_version)
+                return _finish_batch(batch, coltypes, protocol_version)
+
+            shm = shared_memory.SharedMemory(create=True, size=max(len(rows), 1))
+            try:
+                shm.buf[:len(rows)] = rows
+                job = self._executor.submit(_decode_shared_rows, shm.name, len(rows),
+                                            rowcount, colnames, layout_types, protocol_version)
+            except Exception:
+                _release(shm)
+                raise
+        finally:
+            rows.release()
+
+        future = Future()
+        job.add_done_callback(partial(self._on_decoded, future, shm, colnames, layout_types,
+                                      coltypes, protocol_version))
+        return future
+
+    def _on_decoded(self, future, shm, *args):
+        # runs on the executor's result thread
+        _release(shm)
+        finish = partial(_finish_decoded, future, *args)
+        try:
+            self._dispatcher.submit(finish)
+        except RuntimeError:
+            # the pool was shut down without waiting
+            finish()
+
+
+def _decode_pool_protocol_handler(pool):
+
+    class _DecodePoolResultMessage(ResultMessage):
+
+        @classmethod
+        def recv_results_rows(cls, f, protocol_version, user_type_map, result_metadata):
+            paging_state, column_metadata, result_metadata_id = cls.recv_results_metadata(f, user_type_map)
+            column_metadata = column_metadata or result_metadata
+            rowcount = read_int(f)
+            colnames = [c[2] for c in column_metadata]
+            coltypes = [c[3] for c in column_metadata]
+            rows = pool.decode_rows(f, rowcount, colnames, coltypes, protocol_version)
+            return paging_state, coltypes, (colnames, rows), result_metadata_id
+
+    class DecodePoolProtocolHandler(_ProtocolHandler):
+        """
+        Sends result pages to a :class:`DecodeProcessPool`.
+        """
+
+        message_types_by_opcode = _ProtocolHandler.message_types_by_opcode.copy()
+        message_types_by_opcode[_DecodePoolResultMessage.opcode] = _DecodePoolResultMessage
+
+    return DecodePoolProtocolHandler
+
+
+def _release(shm):
+    shm.close()
+    shm.unlink()
+
+
+def _layout_coltypes(layout_types):
+    return [cqltypes.lookup_casstype(name) if name else cqltypes.BytesType for name in layout_types]
+
+
+def _decode_columns(rows, rowcount, colnames, layout_types, protocol_version):
+    coltypes = _layout_coltypes(layout_types)
+    desc = ParseDesc(colnames, coltypes, make_deserializers(coltypes), protocol_version)
+    return ColumnarParser().parse_rows(BytesIOReader(int32_pack(rowcount) + rows), desc)
+
+
+def _decode_shared_rows(name, size, rowcount, colnames, layout_types, protocol_version):
+    """
+    Runs in the worker processes. Returns the name of the shared memory
+    holding the column buffers, and the position of each buffer in it.
+    """
+    shm = shared_memory.SharedMemory(name)
+    try:
+        rows = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    batch = _decode_columns(rows, rowcount, colnames, layout_types, protocol_version)
+
+    buffers = [[getattr(column, buffer_name) for buffer_name in _BUFFER_NAMES] for column in batch.columns]
+    total = sum(len(buf) for column_buffers in buffers for buf in column_buffers if buf is not None)
+    out = shared_memory.SharedMemory(create=True, size=max(total, 1))
+    try:
+        pos = 0
+        columns = []
+        for column, column_buffers in zip(batch.columns, buffers):
+            spans = []
+            for buf in column_buffers:
+                if buf is None:
+                    spans.append(None)
+                else:
+                    out.buf[pos:pos + len(buf)] = buf
+                    spans.append((pos, len(buf)))
+                    pos += len(buf)
+            columns.append((column.layout, column.null_count, spans))
+    except Exception:
+        _release(out)
+        raise
+    out.close()
+    return out.name, batch.num_rows, columns
+
+
+def _start_worker():
+    pass
+
+
+def _finish_decoded(future, colnames, layout_types, coltypes, protocol_version, job):
+    try:
+        out_name, num_rows, columns = job.result()
+        out = shared_memory.SharedMemory(out_name)
+        try:
+            decoded = []
+            for (layout, null_count, spans), coltype in zip(columns, _layout_coltypes(layout_types)):
+                buffers = [None if span is None else bytearray(out.buf[span[0]:span[0] + span[1]])
+                           for span in spans]
+                decoded.append(Column(coltype, layout, num_rows, null_count, *buffers,
+                                      protocol_version=protocol_version))
+        finally:
+            _release(out)
+        batch = _finish_batch(ColumnBatch(colnames, decoded, num_rows), coltypes, protocol_version)
+    except Exception as exc:
+        future.set_exception(exc)
+    else:
+        future.set_result(batch)
+
+
+def _finish_batch(batch, coltypes, protocol_version):
+    """
+    Deserializes the values of the columns which were decoded as raw
+    bytes, and sets the column types.
+    """
+    columns = []
+    for column, coltype in zip(batch.columns, coltypes):
+        if coltype not in _layouts:
+            values = [None if raw is None else coltype.from_binary(raw, protocol_version)
+                      for raw in column]
+            null_count = sum(1 for value in values if value is None)
+            column = Column(coltype, 'object', len(values), null_count, column.validity,
+                            values=values, protocol_version=protocol_version)
+        else:
+            column.cqltype = coltype
+        columns.append(column)
+    return ColumnBatch(batch.column_names, columns, batch.num_rows)
@@ -155,28 +155,25 @@ class AsyncioConnection(Connection):
             self.connected_event.set()
 
     def push(self, data):
-        buff_size = self.out_buffer_size
-        if len(data) > buff_size:
-            for i in range(0, len(data), buff_size):
-                self._push_chunk(data[i:i + buff_size])
-        else:
-            self._push_chunk(data)
-
-    def _push_chunk(self, chunk):
         if self._loop_thread.ident != get_ident():
             asyncio.run_coroutine_threadsafe(
-                self._write_queue.put(chunk),
+                self._write_queue.put(data),
                 loop=self._loop
             )
         else:
             # avoid races/hangs by just scheduling this, not using threadsafe
-            self._loop.create_task(self._write_queue.put(chunk))
+            self._loop.create_task(self._write_queue.put(data))
 
     @asyncio.coroutine
     def handle_write(self):
         while True:
             try:
-                next_msg = yield from self._write_queue.get()
+                # coalesce everything queued since the last write into one
+                # send; the loop has no gathering variant of sock_sendall
+                batch = [(yield from self._write_queue.get())]
+                while len(batch) < self.max_write_batch and not self._write_queue.empty():
+                    batch.append(self._write_queue.get_nowait())
+                next_msg = batch[0] if len(batch) == 1 else b''.join(batch)
                 if next_msg:
                     yield from self._loop.sock_sendall(self._socket, next_msg)
             except socket.error as err:
@@ -207,7 +204,7 @@ class AsyncioConnection(Connection):
             except asyncio.CancelledError:
                 return
 
-            if buf and self._iobuf.tell():
+            if buf and len(self._iobuf):
                 self.process_io_buffer()
             else:
                 log.debug("Connection %s closed by server", self)
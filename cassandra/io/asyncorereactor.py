@@ -23,8 +23,6 @@ import time
 import weakref
 import sys
 
-from six.moves import range
-
 try:
     from weakref import WeakSet
 except ImportError:
@@ -395,28 +393,23 @@ class AsyncoreConnection(Connection, asyncore.dispatcher):
     def handle_write(self):
         while True:
             with self.deque_lock:
-                try:
-                    next_msg = self.deque.popleft()
-                except IndexError:
+                if not self.deque:
                     self._writable = False
                     return
+                batch = self._write_batch(self.deque)
 
             try:
-                sent = self.send(next_msg)
+                sent = self._send_buffers(self.socket, batch)
                 self._readable = True
             except socket.error as err:
-                if (err.args[0] in NONBLOCKING):
-                    with self.deque_lock:
-                        self.deque.appendleft(next_msg)
-                else:
+                if err.args[0] not in NONBLOCKING:
                     self.defunct(err)
                 return
-            else:
-                if sent < len(next_msg):
-                    with self.deque_lock:
-                        self.deque.appendleft(next_msg[sent:])
-                    if sent == 0:
-                        return
+
+            if not sent:
+                return
+            with self.deque_lock:
+                self._consume_sent(self.deque, sent)
 
     def handle_read(self):
         try:
@@ -434,22 +427,14 @@ class AsyncoreConnection(Connection, asyncore.dispatcher):
                 self.defunct(err)
                 return
 
-        if self._iobuf.tell():
+        if len(self._iobuf):
             self.process_io_buffer()
             if not self._requests and not self.is_control_connection:
                 self._readable = False
 
     def push(self, data):
-        sabs = self.out_buffer_size
-        if len(data) > sabs:
-            chunks = []
-            for i in range(0, len(data), sabs):
-                chunks.append(data[i:i + sabs])
-        else:
-            chunks = [data]
-
         with self.deque_lock:
-            self.deque.extend(chunks)
+            self.deque.append(data)
             self._writable = True
         self._loop.wake_loop()
 
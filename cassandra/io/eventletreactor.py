@@ -142,7 +142,7 @@ class EventletConnection(Connection):
             except GreenletExit:  # graceful greenthread exit
                 return
 
-            if buf and self._iobuf.tell():
+            if buf and len(self._iobuf):
                 self.process_io_buffer()
             else:
                 log.debug("Connection %s closed by server", self)
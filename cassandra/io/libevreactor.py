@@ -22,8 +22,6 @@ from threading import Lock, Thread
 import time
 import weakref
 
-from six.moves import range
-
 from cassandra.connection import (Connection, ConnectionShutdown,
                                   NONBLOCKING, Timer, TimerManager)
 try:
@@ -306,25 +304,22 @@ class LibevConnection(Connection):
             return
 
         while True:
-            try:
-                with self._deque_lock:
-                    next_msg = self.deque.popleft()
-            except IndexError:
-                return
+            with self._deque_lock:
+                if not self.deque:
+                    return
+                batch = self._write_batch(self.deque)
 
             try:
-                sent = self._socket.send(next_msg)
+                sent = self._send_buffers(self._socket, batch)
             except socket.error as err:
-                if (err.args[0] in NONBLOCKING):
-                    with self._deque_lock:
-                        self.deque.appendleft(next_msg)
-                else:
+                if err.args[0] not in NONBLOCKING:
                     self.defunct(err)
                 return
-            else:
-                if sent < len(next_msg):
-                    with self._deque_lock:
-                        self.deque.appendleft(next_msg[sent:])
+
+            if not sent:
+                return
+            with self._deque_lock:
+                self._consume_sent(self.deque, sent)
 
     def handle_read(self, watcher, revents, errno=None):
         if revents & libev.EV_ERROR:
@@ -350,21 +345,13 @@ class LibevConnection(Connection):
                 self.defunct(err)
                 return
 
-        if self._iobuf.tell():
+        if len(self._iobuf):
             self.process_io_buffer()
         else:
             log.debug("Connection %s closed by server", self)
             self.close()
 
     def push(self, data):
-        sabs = self.out_buffer_size
-        if len(data) > sabs:
-            chunks = []
-            for i in range(0, len(data), sabs):
-                chunks.append(data[i:i + sabs])
-        else:
-            chunks = [data]
-
         with self._deque_lock:
-            self.deque.extend(chunks)
+            self.deque.append(data)
             self._libevloop.notify()
@@ -0,0 +1,390 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import atexit
+from collections import deque
+from functools import partial
+from itertools import count
+import logging
+import os
+import socket
+import ssl
+from threading import Lock, Thread
+import time
+import weakref
+
+from cassandra.connection import (Connection, ConnectionShutdown,
+                                  NONBLOCKING, Timer, TimerManager)
+try:
+    import selectors
+except ImportError:
+    raise ImportError(
+        "The selectors module was not found. SelectorsConnection requires "
+        "Python 3.4 or later.")
+
+
+log = logging.getLogger(__name__)
+
+_READ = selectors.EVENT_READ
+_READ_WRITE = selectors.EVENT_READ | selectors.EVENT_WRITE
+
+
+def _cleanup(loop_weakref):
+    try:
+        loop = loop_weakref()
+    except ReferenceError:
+        return
+    if loop is not None:
+        loop._cleanup()
+
+
+class SelectorsLoop(object):
+    """
+    An event loop over a :class:`selectors.DefaultSelector` (epoll, kqueue,
+    etc. depending on the platform).
+
+    The selector is only changed on the event loop thread. Other threads
+    queue the changes they need and wake the loop through a socket pair,
+    so each pass of the loop only looks at the connections which changed,
+    and a connection is only watched for writing while it has data queued.
+    """
+
+    def __init__(self, name="cassandra_driver_event_loop"):
+        self._pid = os.getpid()
+        self._name = name
+        self._selector = selectors.DefaultSelector()
+
+        self._started = False
+        self._shutdown = False
+        self._lock = Lock()
+        self._lock_thread = Lock()
+
+        self._thread = None
+
+        # connections waiting to be registered, unregistered, and watched
+        # for writing; appended to by any thread, consumed by the loop
+        self._new_conns = deque()
+        self._closed_conns = deque()
+        self._write_requests = deque()
+
+        self._timers = TimerManager()
+
+        self._notified = False
+        self._waker, self._wakee = socket.socketpair()
+        self._waker.setblocking(0)
+        self._wakee.setblocking(0)
+        self._selector.register(self._wakee, _READ, None)
+
+        atexit.register(partial(_cleanup, weakref.ref(self)))
+
+    def maybe_start(self):
+        should_start = False
+        with self._lock:
+            if not self._started:
+                log.debug("Starting selectors event loop")
+                self._started = True
+                should_start = True
+
+        if should_start:
+            with self._lock_thread:
+                if not self._shutdown:
+                    self._thread = Thread(target=self._run_loop, name=self._name)
+                    self._thread.daemon = True
+                    self._thread.start()
+
+    def _run_loop(self):
+        selector = self._selector
+        while not self._shutdown:
+            self._apply_changes()
+
+            next_end = self._timers.service_timeouts()
+            timeout = max(next_end - time.time(), 0) if next_end else None
+            try:
+                events = selector.select(timeout)
+            except Exception:
+                if self._shutdown:
+                    break
+                log.exception("Error polling for events in the selectors event loop")
+                continue
+
+            for key, mask in events:
+                conn = key.data
+                if conn is None:
+                    self._drain_wakeups()
+                    continue
+                try:
+                    conn.handle_events(mask)
+                except Exception:
+                    log.exception("Unhandled error handling events for %s", conn)
+
+        log.debug("Selectors event loop ended")
+
+    def _apply_changes(self):
+        # unregister before registering, in case a new socket reuses the
+        # file descriptor of a closed one
+        closed_conns = self._closed_conns
+        while closed_conns:
+            conn = closed_conns.popleft()
+            try:
+                self._selector.unregister(conn._socket)
+            except (KeyError, ValueError):
+                pass
+
+        new_conns = self._new_conns
+        while new_conns:
+            conn = new_conns.popleft()
+            if conn.is_closed:
+                continue
+            try:
+                self._selector.register(conn._socket, _READ, conn)
+                conn._events = _READ
+            except (KeyError, ValueError, OSError) as exc:
+                conn.defunct(exc)
+
+        write_requests = self._write_requests
+        while write_requests:
+            self.set_events(write_requests.popleft(), _READ_WRITE)
+
+    def set_events(self, conn, events):
+        """
+        Changes the events `conn` is watched for. Must be called on the
+        event loop thread.
+        """
+        if conn._events == events or conn.is_closed:
+            return
+        try:
+            self._selector.modify(conn._socket, events, conn)
+            conn._events = events
+        except (KeyError, ValueError):
+            # not registered yet, or already unregistered
+            pass
+
+    def notify(self):
+        if not self._notified:
+            self._notified = True
+            try:
+                self._waker.send(b'x')
+            except socket.error:
+                # the loop has plenty of wakeups waiting already
+                pass
+
+    def _drain_wakeups(self):
+        # cleared before the queued changes are applied, so that no change
+        # queued after this is left waiting for another wakeup
+        self._notified = False
+        try:
+            while self._wakee.recv(4096):
+                pass
+        except socket.error:
+            pass
+
+    def _cleanup(self):
+        self._shutdown = True
+        if not self._thread:
+            return
+
+        self.notify()
+
+        # PYTHON-752 Thread might have just been created and not started
+        with self._lock_thread:
+            self._thread.join(timeout=1.0)
+
+        if self._thread.is_alive():
+            log.warning(
+                "Event loop thread could not be joined, so shutdown may not be clean. "
+                "Please call Cluster.shutdown() to avoid this.")
+
+        log.debug("Event loop thread was joined")
+
+        conns = [key.data for key in tuple(self._selector.get_map().values()) if key.data is not None]
+        for conn in conns + list(self._new_conns):
+            conn.close()
+        self._timers.service_timeouts()
+
+    def add_timer(self, timer):
+        self._timers.add_timer(timer)
+        self.notify()  # wake up in case this timer is earlier
+
+    def connection_created(self, conn):
+        self._new_conns.append(conn)
+        self.notify()
+
+    def connection_destroyed(self, conn):
+        self._closed_conns.append(conn)
+        self.notify()
+
+    def want_write(self, conn):
+        self._write_requests.append(conn)
+        self.notify()
+
+
+class SelectorsConnection(Connection):
+    """
+    An implementation of :class:`.Connection` that uses the ``selectors``
+    module in the Python standard library for its event loop. It uses the
+    best mechanism the platform has (epoll on Linux, kqueue on BSD and
+    macOS), and does not need the libev extension.
+    """
+
+    event_loops = 1
+    """
+    The number of event loop threads. Connections are assigned to the loops
+    in turn, and each loop runs its own timers, so that reading, decoding
+    and dispatching responses is not limited to one thread. This is mostly
+    useful when the driver is built with Cython, which releases the GIL
+    during parts of decoding.
+
+    This must be set before the first :class:`.Cluster` connects::
+
+        >>> from cassandra.io.selectorsreactor import SelectorsConnection
+        >>> SelectorsConnection.event_loops = 4
+        >>> cluster = Cluster(connection_class=SelectorsConnection)
+    """
+
+    _selectorsloops = ()
+    _loop_counter = count()
+
+    _selectorsloop = None
+    _events = 0
+    _writing = False
+    _socket = None
+
+    @classmethod
+    def initialize_reactor(cls):
+        if not cls._selectorsloops:
+            cls._start_loops()
+        else:
+            if cls._selectorsloops[0]._pid != os.getpid():
+                log.debug("Detected fork, clearing and reinitializing reactor state")
+                cls.handle_fork()
+                cls._start_loops()
+
+    @classmethod
+    def _start_loops(cls):
+        if cls.event_loops < 1:
+            raise ValueError("SelectorsConnection.event_loops must be at least 1")
+        if cls.event_loops == 1:
+            cls._selectorsloops = (SelectorsLoop(),)
+        else:
+            cls._selectorsloops = tuple(SelectorsLoop("cassandra_driver_event_loop_%d" % i)
+                                        for i in range(cls.event_loops))
+        cls._selectorsloop = cls._selectorsloops[0]
+
+    @classmethod
+    def handle_fork(cls):
+        for loop in cls._selectorsloops:
+            loop._cleanup()
+        cls._selectorsloops = ()
+        cls._selectorsloop = None
+
+    @classmethod
+    def _next_loop(cls):
+        loops = cls._selectorsloops
+        if len(loops) == 1:
+            return loops[0]
+        return loops[next(cls._loop_counter) % len(loops)]
+
+    @classmethod
+    def create_timer(cls, timeout, callback):
+        timer = Timer(timeout, callback)
+        cls._next_loop().add_timer(timer)
+        return timer
+
+    def __init__(self, *args, **kwargs):
+        Connection.__init__(self, *args, **kwargs)
+
+        self.deque = deque()
+        self._deque_lock = Lock()
+        self._connect_socket()
+        self._socket.setblocking(0)
+
+        self._selectorsloop = self._next_loop()
+        self._selectorsloop.connection_created(self)
+
+        # start the event loop if needed
+        self._selectorsloop.maybe_start()
+
+        self._send_options_message()
+
+    def close(self):
+        with self.lock:
+            if self.is_closed:
+                return
+            self.is_closed = True
+
+        log.debug("Closing connection (%s) to %s", id(self), self.host)
+        self._selectorsloop.connection_destroyed(self)
+        self._socket.close()
+        log.debug("Closed socket to %s", self.host)
+
+        # don't leave in-progress operations hanging
+        if not self.is_defunct:
+            self.error_all_requests(
+                ConnectionShutdown("Connection to %s was closed" % self.host))
+
+    def handle_events(self, mask):
+        if mask & selectors.EVENT_WRITE:
+            self.handle_write()
+        if mask & selectors.EVENT_READ and not self.is_closed:
+            self.handle_read()
+
+    def handle_write(self):
+        while True:
+            with self._deque_lock:
+                if not self.deque:
+                    self._writing = False
+                    self._selectorsloop.set_events(self, _READ)
+                    return
+                batch = self._write_batch(self.deque)
+
+            try:
+                sent = self._send_buffers(self._socket, batch)
+            except socket.error as err:
+                if err.args[0] not in NONBLOCKING:
+                    self.defunct(err)
+                return
+
+            if not sent:
+                return
+            with self._deque_lock:
+                self._consume_sent(self.deque, sent)
+
+    def handle_read(self):
+        try:
+            while True:
+                buf = self._socket.recv(self.in_buffer_size)
+                self._iobuf.write(buf)
+                if len(buf) < self.in_buffer_size:
+                    break
+        except socket.error as err:
+            if isinstance(err, ssl.SSLError):
+                if err.args[0] not in (ssl.SSL_ERROR_WANT_READ, ssl.SSL_ERROR_WANT_WRITE):
+                    self.defunct(err)
+                    return
+            elif err.args[0] not in NONBLOCKING:
+                self.defunct(err)
+                return
+
+        if len(self._iobuf):
+            self.process_io_buffer()
+        else:
+            log.debug("Connection %s closed by server", self)
+            self.close()
+
+    def push(self, data):
+        with self._deque_lock:
+            self.deque.append(data)
+            if self._writing:
+                return
+            self._writing = True
+        self._selectorsloop.want_write(self)
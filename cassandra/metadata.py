@@ -12,17 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from array import array
 from binascii import unhexlify
-from bisect import bisect_right
-from collections import defaultdict, Mapping
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple, Mapping
 from functools import total_ordering
 from hashlib import md5
-from itertools import islice, cycle
 import json
 import logging
 import re
 import six
-from six.moves import zip
+from six.moves import xrange, zip
 import sys
 from threading import RLock
 import struct
@@ -287,22 +287,43 @@ class Metadata(object):
                 token_to_host_owner[token] = host
 
         all_tokens = sorted(ring)
-        self.token_map = TokenMap(
+        new_token_map = TokenMap(
             token_class, token_to_host_owner, all_tokens, self)
+        if self.token_map:
+            new_token_map.update_from(self.token_map)
+        self.token_map = new_token_map
 
     def get_replicas(self, keyspace, key):
         """
         Returns a list of :class:`.Host` instances that are replicas for a given
-        partition key.
+        partition key. `key` may also be a :class:`.Token`, which is used as is.
         """
         t = self.token_map
         if not t:
             return []
+        if isinstance(key, Token):
+            return t.get_replicas(keyspace, key)
         try:
             return t.get_replicas(keyspace, t.token_class.from_key(key))
         except NoMurmur3:
             return []
 
+    def get_replicas_for_keys(self, keyspace, keys):
+        """
+        Like :meth:`.get_replicas`, but looks up a sequence of partition keys
+        (or :class:`.Token` instances) at once. Returns a list with the
+        replicas for each key, in the same order.
+        """
+        t = self.token_map
+        if not t:
+            return [[] for _ in keys]
+        from_key = t.token_class.from_key
+        try:
+            tokens = [key if isinstance(key, Token) else from_key(key) for key in keys]
+        except NoMurmur3:
+            return [[] for _ in keys]
+        return t.get_replicas_for_tokens(keyspace, tokens)
+
     def can_support_partitioner(self):
         if self.partitioner.endswith('Murmur3Partitioner') and murmur3 is None:
             return False
@@ -348,6 +369,11 @@ def trim_if_startswith(s, prefix):
 
 _replication_strategies = {}
 
+# How a ring differs from the one a replica map was made for. `changed_points`
+# are the indexes into the new ring of tokens that were added or changed owner,
+# and of the tokens following removed ones.
+_RingChange = namedtuple('_RingChange', ['old_token_to_host_owner', 'old_ring', 'changed_points', 'removed_tokens'])
+
 
 class ReplicationStrategyTypeType(type):
     def __new__(metacls, name, bases, dct):
@@ -385,6 +411,46 @@ class _ReplicationStrategy(object):
     def make_token_replica_map(self, token_to_host_owner, ring):
         raise NotImplementedError()
 
+    def update_token_replica_map(self, replica_map, token_to_host_owner, ring, ring_change):
+        """
+        Returns the replica map for `ring`, given the `replica_map` made for
+        the ring before `ring_change`.
+
+        Strategies that can compute the replicas of a single token (see
+        :meth:`_replicas_at`) only recompute the entries around the changes;
+        others build a new map.
+        """
+        return self.make_token_replica_map(token_to_host_owner, ring)
+
+    def _update_entries(self, replica_map, token_to_host_owner, ring, ring_change, context=None):
+        """
+        Recomputes the entries of `replica_map` whose walk around the ring
+        reaches one of the changed points. Walking back from a change, an
+        entry whose walk stops short of it means the ones before do too.
+        """
+        num_tokens = len(ring)
+        new_map = dict(replica_map)
+        for token in ring_change.removed_tokens:
+            new_map.pop(token, None)
+        reaches = {}
+        for point in ring_change.changed_points:
+            for distance in xrange(num_tokens):
+                i = (point - distance) % num_tokens
+                reach = reaches.get(i)
+                if reach is None:
+                    new_map[ring[i]], reach = self._replicas_at(token_to_host_owner, ring, i, context)
+                    reaches[i] = reach
+                if reach <= distance:
+                    break
+        return new_map
+
+    def _replicas_at(self, token_to_host_owner, ring, i, context):
+        """
+        Returns the replicas for the token at index `i` of the ring, and
+        how many ring positions, starting from `i`, were walked to find them.
+        """
+        raise NotImplementedError()
+
     def export_for_schema(self):
         raise NotImplementedError()
 
@@ -441,17 +507,22 @@ class SimpleStrategy(ReplicationStrategy):
     def make_token_replica_map(self, token_to_host_owner, ring):
         replica_map = {}
         for i in range(len(ring)):
-            j, hosts = 0, list()
-            while len(hosts) < self.replication_factor and j < len(ring):
-                token = ring[(i + j) % len(ring)]
-                host = token_to_host_owner[token]
-                if host not in hosts:
-                    hosts.append(host)
-                j += 1
-
-            replica_map[ring[i]] = hosts
+            replica_map[ring[i]], _ = self._replicas_at(token_to_host_owner, ring, i, None)
         return replica_map
 
+    def update_token_replica_map(self, replica_map, token_to_host_owner, ring, ring_change):
+        return self._update_entries(replica_map, token_to_host_owner, ring, ring_change)
+
+    def _replicas_at(self, token_to_host_owner, ring, i, context):
+        j, hosts = 0, list()
+        while len(hosts) < self.replication_factor and j < len(ring):
+            token = ring[(i + j) % len(ring)]
+            host = token_to_host_owner[token]
+            if host not in hosts:
+                hosts.append(host)
+            j += 1
+        return hosts, j
+
     def export_for_schema(self):
         """
         Returns a string version of these replication options which are
@@ -479,20 +550,7 @@ class NetworkTopologyStrategy(ReplicationStrategy):
             (str(k), int(v)) for k, v in dc_replication_factors.items())
 
     def make_token_replica_map(self, token_to_host_owner, ring):
-        dc_rf_map = dict((dc, int(rf))
-                         for dc, rf in self.dc_replication_factors.items() if rf > 0)
-
-        # build a map of DCs to lists of indexes into `ring` for tokens that
-        # belong to that DC
-        dc_to_token_offset = defaultdict(list)
-        dc_racks = defaultdict(set)
-        hosts_per_dc = defaultdict(set)
-        for i, token in enumerate(ring):
-            host = token_to_host_owner[token]
-            dc_to_token_offset[host.datacenter].append(i)
-            if host.datacenter and host.rack:
-                dc_racks[host.datacenter].add(host.rack)
-                hosts_per_dc[host.datacenter].add(host)
+        dc_rf_map, dc_to_token_offset, dc_racks, hosts_per_dc = self._ring_layout(token_to_host_owner, ring)
 
         # A map of DCs to an index into the dc_to_token_offset value for that dc.
         # This is how we keep track of advancing around the ring for each DC.
@@ -516,38 +574,120 @@ class NetworkTopologyStrategy(ReplicationStrategy):
                     index += 1
                 dc_to_current_index[dc] = index
 
-                replicas_remaining = dc_rf_map[dc]
-                replicas_this_dc = 0
-                skipped_hosts = []
-                racks_placed = set()
-                racks_this_dc = dc_racks[dc]
-                hosts_this_dc = len(hosts_per_dc[dc])
-                for token_offset in islice(cycle(token_offsets), index, index + num_tokens):
-                    host = token_to_host_owner[ring[token_offset]]
-                    if replicas_remaining == 0 or replicas_this_dc == hosts_this_dc:
-                        break
+                self._add_dc_replicas(replicas, token_to_host_owner, ring, token_offsets, index,
+                                      dc_rf_map[dc], dc_racks[dc], len(hosts_per_dc[dc]))
 
-                    if host in replicas:
-                        continue
+        return replica_map
 
-                    if host.rack in racks_placed and len(racks_placed) < len(racks_this_dc):
-                        skipped_hosts.append(host)
-                        continue
+    def update_token_replica_map(self, replica_map, token_to_host_owner, ring, ring_change):
+        hosts = set(token_to_host_owner.values())
+        if any(not host.rack for host in hosts):
+            # hosts without a rack don't count towards the racks of their DC,
+            # and their placement isn't local to the changes
+            return self.make_token_replica_map(token_to_host_owner, ring)
+        old_hosts = set(ring_change.old_token_to_host_owner.values())
+        if (self._layout_key(token_to_host_owner, ring, hosts) !=
+                self._layout_key(ring_change.old_token_to_host_owner, ring_change.old_ring, old_hosts)):
+            # DCs, racks or small DCs changed, which can affect any entry
+            return self.make_token_replica_map(token_to_host_owner, ring)
+        layout = self._ring_layout(token_to_host_owner, ring, hosts)
+        return self._update_entries(replica_map, token_to_host_owner, ring, ring_change, layout)
+
+    def _ring_layout(self, token_to_host_owner, ring, hosts=None):
+        dc_rf_map = dict((dc, int(rf))
+                         for dc, rf in self.dc_replication_factors.items() if rf > 0)
 
-                    replicas.append(host)
-                    replicas_this_dc += 1
-                    replicas_remaining -= 1
-                    racks_placed.add(host.rack)
+        # build a map of DCs to lists of indexes into `ring` for tokens that
+        # belong to that DC
+        dc_to_token_offset = OrderedDict()
+        for i, token in enumerate(ring):
+            dc_to_token_offset.setdefault(token_to_host_owner[token].datacenter, []).append(i)
 
-                    if len(racks_placed) == len(racks_this_dc):
-                        for host in skipped_hosts:
-                            if replicas_remaining == 0:
-                                break
-                            replicas.append(host)
-                            replicas_remaining -= 1
-                        del skipped_hosts[:]
+        dc_racks, hosts_per_dc = self._dc_racks_and_hosts(
+            hosts if hosts is not None else set(token_to_host_owner.values()))
+        return dc_rf_map, dc_to_token_offset, dc_racks, hosts_per_dc
 
-        return replica_map
+    @staticmethod
+    def _dc_racks_and_hosts(hosts):
+        dc_racks = defaultdict(set)
+        hosts_per_dc = defaultdict(set)
+        for host in hosts:
+            if host.datacenter and host.rack:
+                dc_racks[host.datacenter].add(host.rack)
+                hosts_per_dc[host.datacenter].add(host)
+        return dc_racks, hosts_per_dc
+
+    def _layout_key(self, token_to_host_owner, ring, hosts):
+        # what every entry depends on: the order DCs first appear in the ring,
+        # the racks, and the number of hosts in DCs with no more hosts than replicas
+        dc_racks, hosts_per_dc = self._dc_racks_and_hosts(hosts)
+        datacenters = set(host.datacenter for host in hosts)
+        dc_order = []
+        for token in ring:
+            if len(dc_order) == len(datacenters):
+                break
+            datacenter = token_to_host_owner[token].datacenter
+            if datacenter not in dc_order:
+                dc_order.append(datacenter)
+        return (dc_order, dict(dc_racks),
+                dict((dc, min(len(hosts_per_dc[dc]), rf + 1)) for dc, rf in self.dc_replication_factors.items()))
+
+    def _replicas_at(self, token_to_host_owner, ring, i, layout):
+        dc_rf_map, dc_to_token_offset, dc_racks, hosts_per_dc = layout
+        replicas = []
+        reach = 1
+        for dc, token_offsets in dc_to_token_offset.items():
+            if dc not in dc_rf_map:
+                continue
+            last = self._add_dc_replicas(replicas, token_to_host_owner, ring, token_offsets,
+                                         bisect_left(token_offsets, i), dc_rf_map[dc],
+                                         dc_racks[dc], len(hosts_per_dc[dc]))
+            if last is not None:
+                reach = max(reach, (last - i) % len(ring) + 1)
+        return replicas, reach
+
+    @staticmethod
+    def _add_dc_replicas(replicas, token_to_host_owner, ring, token_offsets, index, replicas_remaining,
+                         racks_this_dc, hosts_this_dc):
+        """
+        Adds the replicas from one DC, walking the DC's tokens from `index`.
+        Returns the offset of the last token that was looked at.
+        """
+        num_tokens = len(token_offsets)
+        replicas_this_dc = 0
+        skipped_hosts = []
+        racks_placed = set()
+        last = None
+        for k in xrange(index, index + num_tokens):
+            # walk the DC's tokens from index, wrapping around the ring
+            token_offset = token_offsets[k % num_tokens]
+            host = token_to_host_owner[ring[token_offset]]
+            if replicas_remaining == 0 or replicas_this_dc == hosts_this_dc:
+                break
+            last = token_offset
+
+            if host in replicas:
+                continue
+
+            if host.rack in racks_placed and len(racks_placed) < len(racks_this_dc):
+                # vnodes of the same host may come up more than once
+                if host not in skipped_hosts:
+                    skipped_hosts.append(host)
+                continue
+
+            replicas.append(host)
+            replicas_this_dc += 1
+            replicas_remaining -= 1
+            racks_placed.add(host.rack)
+
+            if len(racks_placed) == len(racks_this_dc):
+                for host in skipped_hosts:
+                    if replicas_remaining == 0:
+                        break
+                    replicas.append(host)
+                    replicas_remaining -= 1
+                del skipped_hosts[:]
+        return last
 
     def export_for_schema(self):
         """
@@ -1441,15 +1581,45 @@ class TokenMap(object):
 
     _metadata = None
 
+    _ring_values = None
+    # the value of each ring token, for lookups without Token comparisons
+
+    _replicas_by_ks = None
+    # keyspace name to the replicas of each ring token, in ring order
+
+    _replica_maps = None
+    # (strategy, replica map, replicas in ring order), shared by the
+    # keyspaces with equal replication strategies
+
+    _host_locations = None
+    # the (datacenter, rack) of each host when the map was made
+
     def __init__(self, token_class, token_to_host_owner, all_tokens, metadata):
         self.token_class = token_class
         self.ring = all_tokens
         self.token_to_host_owner = token_to_host_owner
+        self._ring_values = self._make_ring_values(token_class, all_tokens)
+        self._host_locations = dict((host, (host.datacenter, host.rack))
+                                    for host in set(token_to_host_owner.values()))
 
         self.tokens_to_hosts_by_ks = {}
+        self._replicas_by_ks = {}
+        self._replica_maps = []
         self._metadata = metadata
         self._rebuild_lock = RLock()
 
+    @staticmethod
+    def _make_ring_values(token_class, ring):
+        values = [token.value for token in ring]
+        if issubclass(token_class, Murmur3Token) and _int64_typecode:
+            # 8 bytes per token instead of a boxed int, and bisected in C;
+            # each probe still creates an int from the stored value
+            try:
+                return array(_int64_typecode, values)
+            except OverflowError:
+                pass
+        return values
+
     def rebuild_keyspace(self, keyspace, build_if_absent=False):
         with self._rebuild_lock:
             try:
@@ -1457,45 +1627,142 @@ class TokenMap(object):
                 if (build_if_absent and current is None) or (not build_if_absent and current is not None):
                     ks_meta = self._metadata.keyspaces.get(keyspace)
                     if ks_meta:
-                        replica_map = self.replica_map_for_keyspace(self._metadata.keyspaces[keyspace])
+                        strategy = ks_meta.replication_strategy
+                        replica_map, replicas = self._replica_maps_for_strategy(strategy) if strategy else (None, None)
+                        self._replicas_by_ks[keyspace] = replicas
                         self.tokens_to_hosts_by_ks[keyspace] = replica_map
             except Exception:
                 # should not happen normally, but we don't want to blow up queries because of unexpected meta state
                 # bypass until new map is generated
                 self.tokens_to_hosts_by_ks[keyspace] = {}
+                self._replicas_by_ks[keyspace] = []
                 log.exception("Failed creating a token map for keyspace '%s' with %s. PLEASE REPORT THIS: https://datastax-oss.atlassian.net/projects/PYTHON", keyspace, self.token_to_host_owner)
 
     def replica_map_for_keyspace(self, ks_metadata):
         strategy = ks_metadata.replication_strategy
         if strategy:
-            return strategy.make_token_replica_map(self.token_to_host_owner, self.ring)
+            return self._replica_maps_for_strategy(strategy)[0]
         else:
             return None
 
+    def _replica_maps_for_strategy(self, strategy):
+        with self._rebuild_lock:
+            maps = self._find_replica_maps(strategy)
+            if maps is None:
+                maps = self._add_replica_map(
+                    strategy, strategy.make_token_replica_map(self.token_to_host_owner, self.ring))
+            return maps
+
+    def _find_replica_maps(self, strategy):
+        for known_strategy, replica_map, replicas in self._replica_maps:
+            if known_strategy == strategy:
+                return replica_map, replicas
+        return None
+
+    def _add_replica_map(self, strategy, replica_map):
+        replicas = [replica_map[token] for token in self.ring] if replica_map else []
+        self._replica_maps.append((strategy, replica_map, replicas))
+        return replica_map, replicas
+
+    def update_from(self, previous):
+        """
+        Takes over the keyspace replica maps of `previous`, the map of the ring
+        before a topology change, recomputing only the entries affected by
+        the tokens that changed. Keyspaces which can't be updated this way
+        are built when they are next needed.
+        For internal use only.
+        """
+        if previous.token_class is not self.token_class or not self.ring:
+            return
+        if any((host.datacenter, host.rack) != location for host, location in six.iteritems(previous._host_locations)):
+            # nodes moved, so the placement of any replica may change
+            return
+        ring_change = self._ring_change(previous)
+        if len(ring_change.changed_points) > len(self.ring) // 2:
+            return
+
+        with self._rebuild_lock:
+            try:
+                for keyspace in list(previous.tokens_to_hosts_by_ks):
+                    ks_meta = self._metadata.keyspaces.get(keyspace)
+                    strategy = ks_meta.replication_strategy if ks_meta else None
+                    if not strategy:
+                        continue
+                    if self._find_replica_maps(strategy) is None:
+                        previous_maps = previous._find_replica_maps(strategy)
+                        if previous_maps is None or previous_maps[0] is None:
+                            continue
+                        replica_map = previous_maps[0]
+                        if ring_change.changed_points:
+                            replica_map = strategy.update_token_replica_map(
+                                replica_map, self.token_to_host_owner, self.ring, ring_change)
+                        self._add_replica_map(strategy, replica_map)
+                    self.rebuild_keyspace(keyspace, build_if_absent=True)
+            except Exception:
+                log.exception("Failed updating the token map, keyspace maps will be rebuilt")
+                self._replica_maps = []
+                self._replicas_by_ks = {}
+                self.tokens_to_hosts_by_ks = {}
+
+    def _ring_change(self, previous):
+        owners, previous_owners = self.token_to_host_owner, previous.token_to_host_owner
+        points = set(i for i, token in enumerate(self.ring) if previous_owners.get(token) is not owners[token])
+        removed_tokens = [token for token in previous.ring if token not in owners]
+        # the ranges of the tokens following removed ones grew
+        points.update(bisect_left(self._ring_values, token.value) % len(self.ring) for token in removed_tokens)
+        return _RingChange(previous_owners, previous.ring, sorted(points), removed_tokens)
+
     def remove_keyspace(self, keyspace):
         self.tokens_to_hosts_by_ks.pop(keyspace, None)
+        self._replicas_by_ks.pop(keyspace, None)
+
+    def token_ranges(self):
+        """
+        Splits the ring into the ranges owned by each token, as a list of
+        ``(start, end)`` pairs of :class:`.Token` instances. A range excludes
+        its start and includes its end. The range wrapping around the ring is
+        split in two, with :const:`None` standing for the partitioner's
+        minimum and maximum.
+        """
+        ring = self.ring
+        if not ring:
+            return []
+        return [(None, ring[0])] + list(zip(ring, ring[1:])) + [(ring[-1], None)]
 
     def get_replicas(self, keyspace, token):
         """
         Get  a set of :class:`.Host` instances representing all of the
         replica nodes for a given :class:`.Token`.
         """
-        tokens_to_hosts = self.tokens_to_hosts_by_ks.get(keyspace, None)
-        if tokens_to_hosts is None:
-            self.rebuild_keyspace(keyspace, build_if_absent=True)
-            tokens_to_hosts = self.tokens_to_hosts_by_ks.get(keyspace, None)
-
-        if tokens_to_hosts:
+        replicas = self._keyspace_replicas(keyspace)
+        if replicas:
             # token range ownership is exclusive on the LHS (the start token), so
             # we use bisect_right, which, in the case of a tie/exact match,
             # picks an insertion point to the right of the existing match
-            point = bisect_right(self.ring, token)
-            if point == len(self.ring):
-                return tokens_to_hosts[self.ring[0]]
-            else:
-                return tokens_to_hosts[self.ring[point]]
+            point = bisect_right(self._ring_values, token.value)
+            return replicas[point] if point < len(replicas) else replicas[0]
         return []
 
+    def get_replicas_for_tokens(self, keyspace, tokens):
+        """
+        Like :meth:`.get_replicas`, for a sequence of :class:`.Token` instances.
+        Returns a list with the replicas for each token, in the same order.
+        """
+        replicas = self._keyspace_replicas(keyspace)
+        if not replicas:
+            return [[] for _ in tokens]
+        ring_values = self._ring_values
+        # point 0 and point len(ring) are both owned by the first token
+        replicas = replicas + replicas[:1]
+        return [replicas[bisect_right(ring_values, token.value)] for token in tokens]
+
+    def _keyspace_replicas(self, keyspace):
+        replicas = self._replicas_by_ks.get(keyspace, None)
+        if replicas is None:
+            self.rebuild_keyspace(keyspace, build_if_absent=True)
+            replicas = self._replicas_by_ks.get(keyspace, None)
+        return replicas
+
 
 @total_ordering
 class Token(object):
@@ -1535,6 +1802,20 @@ MIN_LONG = -(2 ** 63)
 MAX_LONG = (2 ** 63) - 1
 
 
+def _find_int64_typecode():
+    # 'q' is not available on Python 2, where 'l' is 64 bits on most platforms
+    for code in ('q', 'l'):
+        try:
+            if array(code).itemsize == 8:
+                return code
+        except ValueError:
+            pass
+
+
+# array typecode for Murmur3 token values
+_int64_typecode = _find_int64_typecode()
+
+
 class NoMurmur3(Exception):
     pass
 
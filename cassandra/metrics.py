@@ -14,13 +14,14 @@
 
 from itertools import chain
 import logging
+from threading import Lock, current_thread, local
+
+from cassandra.util import LatencyHistogram
 
 try:
     from greplin import scales
 except ImportError:
-    raise ImportError(
-        "The scales library is required for metrics support: "
-        "https://pypi.python.org/pypi/scales")
+    scales = None
 
 log = logging.getLogger(__name__)
 
@@ -116,6 +117,11 @@ class Metrics(object):
     _stats_counter = 0
 
     def __init__(self, cluster_proxy):
+        if scales is None:
+            raise ImportError(
+                "The scales library is required for metrics support: "
+                "https://pypi.python.org/pypi/scales")
+
         log.debug("Starting metric capture")
 
         self.stats_name = 'cassandra-{0}'.format(str(self._stats_counter))
@@ -155,6 +161,18 @@ class Metrics(object):
         self.connected_to = self.stats.connected_to
         self.open_connections = self.stats.open_connections
 
+    def on_request(self, latency, host=None, profile=None):
+        self.request_timer.addValue(latency)
+
+    def on_pool_borrow(self, latency, host=None):
+        pass
+
+    def on_queue_wait(self, latency):
+        pass
+
+    def on_request_phases(self, phases):
+        pass
+
     def on_connection_error(self):
         self.stats.connection_errors += 1
 
@@ -199,3 +217,247 @@ class Metrics(object):
         del scales._Stats.stats[self.stats_name]
         self.stats_name = stats_name
         scales._Stats.stats[self.stats_name] = stats
+
+
+class HistogramMetrics(object):
+    """
+    A collection of timers and counters for performance metrics, which
+    does not depend on the scales library. Set it as the
+    :attr:`.Cluster.metrics_class` to use it:
+
+    .. code-block:: python
+
+        from cassandra.metrics import HistogramMetrics
+        cluster = Cluster(metrics_enabled=True, metrics_class=HistogramMetrics)
+
+    Each thread records latencies in its own :class:`~.util.LatencyHistogram`
+    and increments its own counters, so recording takes no locks. They are
+    merged when the metrics are read with :meth:`get_stats`. Once a thread
+    has ended, its metrics are folded into the totals of ended threads.
+
+    Timer metrics are represented as floating point seconds.
+    """
+
+    def __init__(self, cluster_proxy):
+        log.debug("Starting metric capture")
+        self._cluster = cluster_proxy
+        self._local = local()
+        self._lock = Lock()
+        # (thread, stats) of the threads which recorded metrics
+        self._thread_stats = []
+        # the metrics of threads which have ended
+        self._retired = _ThreadStats()
+        self._exporters = []
+
+    def _stats(self):
+        try:
+            return self._local.stats
+        except AttributeError:
+            stats = self._local.stats = _ThreadStats()
+            with self._lock:
+                self._sweep()
+                self._thread_stats.append((current_thread(), stats))
+            return stats
+
+    def _sweep(self):
+        # called with the lock held; an ended thread records nothing more
+        alive = []
+        for thread, stats in self._thread_stats:
+            if thread.is_alive():
+                alive.append((thread, stats))
+            else:
+                self._retired.merge(stats)
+        self._thread_stats = alive
+
+    def _count(self, name):
+        counters = self._stats().counters
+        counters[name] = counters.get(name, 0) + 1
+
+    def on_request(self, latency, host=None, profile=None):
+        histograms = self._stats().histograms
+        _record(histograms, 'request_timer', latency)
+        if host is not None:
+            _record(histograms, ('host', host), latency)
+        if profile is not None:
+            _record(histograms, ('profile', profile), latency)
+
+    def on_pool_borrow(self, latency, host=None):
+        _record(self._stats().histograms, 'pool_borrow_timer', latency)
+
+    def on_queue_wait(self, latency):
+        _record(self._stats().histograms, 'queue_wait_timer', latency)
+
+    def on_request_phases(self, phases):
+        histograms = self._stats().histograms
+        for name, latency in phases.items():
+            _record(histograms, ('phase', name), latency)
+
+    def on_connection_error(self):
+        self._count('connection_errors')
+
+    def on_write_timeout(self):
+        self._count('write_timeouts')
+
+    def on_read_timeout(self):
+        self._count('read_timeouts')
+
+    def on_unavailable(self):
+        self._count('unavailables')
+
+    def on_other_error(self):
+        self._count('other_errors')
+
+    def on_ignore(self):
+        self._count('ignores')
+
+    def on_retry(self):
+        self._count('retries')
+
+    def get_stats(self):
+        """
+        Returns a dict of the metrics recorded so far by all threads:
+
+          * request_timer - latencies of requests, as a dict with the keys
+            of a :class:`.Metrics` request timer
+          * host_request_timers - a dict of request timers by the address
+            of the coordinator that returned the final response
+          * profile_request_timers - a dict of request timers by execution
+            profile name
+          * pool_borrow_timer - time spent borrowing a connection from a pool
+          * queue_wait_timer - time from the creation of a request until it
+            was sent to the first host, including the time spent finding a
+            connection that could take it
+          * phase_timers - a dict of timers by request phase, for sessions
+            with :attr:`.Session.request_phase_timing` enabled; see
+            :attr:`.ResponseFuture.phase_timings`
+          * connection_errors, write_timeouts, read_timeouts, unavailables,
+            other_errors, retries, ignores - counters, as in :class:`.Metrics`
+          * known_hosts, connected_to, open_connections - gauges, as in :class:`.Metrics`
+          * in_flight - the number of requests in flight on all connections
+        """
+        totals = _ThreadStats()
+        totals.counters = dict((name, 0) for name in _COUNTERS)
+        with self._lock:
+            self._sweep()
+            totals.merge(self._retired)
+            thread_stats = [stats for _, stats in self._thread_stats]
+
+        for stats in thread_stats:
+            totals.merge(stats)
+        histograms, counters = totals.histograms, totals.counters
+
+        result = {
+            'request_timer': _timer_stats(histograms.get('request_timer')),
+            'pool_borrow_timer': _timer_stats(histograms.get('pool_borrow_timer')),
+            'queue_wait_timer': _timer_stats(histograms.get('queue_wait_timer')),
+            'host_request_timers': dict((key[1].address, _timer_stats(histogram))
+                                        for key, histogram in histograms.items() if key[0] == 'host'),
+            'profile_request_timers': dict((key[1], _timer_stats(histogram))
+                                           for key, histogram in histograms.items() if key[0] == 'profile'),
+            'phase_timers': dict((key[1], _timer_stats(histogram))
+                                 for key, histogram in histograms.items() if key[0] == 'phase')}
+        result.update(counters)
+
+        cluster = self._cluster
+        sessions = tuple(cluster.sessions)
+        result['known_hosts'] = len(cluster.metadata.all_hosts())
+        result['connected_to'] = len(set(chain.from_iterable(s._pools.keys() for s in sessions)))
+        result['open_connections'] = sum(sum(p.open_count for p in s._pools.values()) for s in sessions)
+        result['in_flight'] = sum(sum(p.in_flight for p in s._pools.values()) for s in sessions)
+        return result
+
+    def add_exporter(self, exporter, interval=60.0):
+        """
+        Registers a :class:`.MetricsExporter` which is passed the result of
+        :meth:`get_stats` every `interval` seconds, on the cluster's executor
+        threads. If `interval` is :const:`None`, the exporter is only called
+        by :meth:`export`.
+        """
+        with self._lock:
+            self._exporters.append(exporter)
+        if interval is not None:
+            self._cluster.scheduler.schedule(interval, self._export_periodically, exporter, interval)
+
+    def remove_exporter(self, exporter):
+        """
+        Removes a registered :class:`.MetricsExporter`.
+        """
+        with self._lock:
+            self._exporters.remove(exporter)
+
+    def export(self):
+        """
+        Passes the current metrics to all registered exporters.
+        """
+        with self._lock:
+            exporters = list(self._exporters)
+        if exporters:
+            stats = self.get_stats()
+            for exporter in exporters:
+                self._export(exporter, stats)
+
+    def _export(self, exporter, stats):
+        try:
+            exporter.export(stats)
+        except Exception:
+            log.exception("Error exporting metrics to %s", exporter)
+
+    def _export_periodically(self, exporter, interval):
+        with self._lock:
+            if exporter not in self._exporters:
+                return
+        self._export(exporter, self.get_stats())
+        self._cluster.scheduler.schedule(interval, self._export_periodically, exporter, interval)
+
+
+class MetricsExporter(object):
+    """
+    Interface for sending the metrics collected by :class:`.HistogramMetrics`
+    to a monitoring system. Register instances with
+    :meth:`.HistogramMetrics.add_exporter`.
+    """
+
+    def export(self, stats):
+        """
+        Called with the dict returned by :meth:`.HistogramMetrics.get_stats`.
+        """
+        raise NotImplementedError()
+
+
+_COUNTERS = ('connection_errors', 'write_timeouts', 'read_timeouts', 'unavailables',
+             'other_errors', 'retries', 'ignores')
+
+_PERCENTILES = (('median', 50), ('75percentile', 75), ('95percentile', 95),
+                ('98percentile', 98), ('99percentile', 99), ('999percentile', 99.9))
+
+
+class _ThreadStats(object):
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+
+    def merge(self, other):
+        for key, histogram in list(other.histograms.items()):
+            merged = self.histograms.get(key)
+            if merged is None:
+                merged = self.histograms[key] = LatencyHistogram()
+            merged.merge(histogram)
+        for name, n in list(other.counters.items()):
+            self.counters[name] = self.counters.get(name, 0) + n
+
+
+def _record(histograms, key, latency):
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = LatencyHistogram()
+    histogram.add(latency)
+
+
+def _timer_stats(histogram):
+    if histogram is None or not histogram.count:
+        return {'count': 0}
+    stats = dict((name, histogram.percentile(percentile)) for name, percentile in _PERCENTILES)
+    stats.update(count=histogram.count, mean=histogram.mean(),
+                 min=histogram.percentile(0), max=histogram.percentile(100))
+    return stats
@@ -14,11 +14,14 @@
 
 from itertools import islice, cycle, groupby, repeat
 import logging
+from math import log1p
 from random import randint, shuffle
 from threading import Lock
 import socket
+import time
 
 from cassandra import ConsistencyLevel, OperationTimedOut
+from cassandra.util import LatencyHistogram
 
 log = logging.getLogger(__name__)
 
@@ -81,6 +84,23 @@ class HostStateListener(object):
         raise NotImplementedError()
 
 
+class LatencyTracker(object):
+    """
+    Receives the latency of requests to each host. Instances are
+    registered with :meth:`.Cluster.register_latency_tracker`.
+    """
+
+    def on_latency(self, host, query, latency):
+        """
+        Called when `host` responds to a request for `query`, with the
+        `latency` in seconds since the request was sent to that host.
+        `query` may be :const:`None` for internal requests.
+
+        This is called on the event loop thread, and should return quickly.
+        """
+        raise NotImplementedError()
+
+
 class LoadBalancingPolicy(HostStateListener):
     """
     Load balancing policies are used to decide how to distribute
@@ -307,7 +327,16 @@ class DCAwareRoundRobinPolicy(LoadBalancingPolicy):
         self.on_down(host)
 
 
-class TokenAwarePolicy(LoadBalancingPolicy):
+def _decayed_average(average, age, latency, scale):
+    # the weight of the previous average decays with its age
+    delay = age / scale
+    if delay <= 0:
+        return average
+    weight = log1p(delay) / delay
+    return (1.0 - weight) * latency + weight * average
+
+
+class TokenAwarePolicy(LoadBalancingPolicy, LatencyTracker):
     """
     A :class:`.LoadBalancingPolicy` wrapper that adds token awareness to
     a child policy.
@@ -322,21 +351,47 @@ class TokenAwarePolicy(LoadBalancingPolicy):
 
     If no :attr:`~.Statement.routing_key` is set on the query, the child
     policy's query plan will be used as is.
+
+    If :attr:`.power_of_two_choices` is truthy, the less loaded of two
+    random local replicas is tried first.
     """
 
     _child_policy = None
+    _cluster = None
     _cluster_metadata = None
     shuffle_replicas = False
     """
     Yield local replicas in a random order.
     """
 
-    def __init__(self, child_policy, shuffle_replicas=False):
+    power_of_two_choices = False
+    """
+    Compare the load of two random local replicas, and yield the less loaded
+    one first, followed by the other local replicas in a random order. The
+    load of a replica is the number of requests in flight to it from all
+    sessions of the cluster, weighted by its recent average latency. This
+    spreads requests for hot partitions away from replicas that are busy or
+    slow.
+    """
+
+    latency_scale = 0.1
+    """
+    The time constant, in seconds, of the moving average of replica
+    latencies used by :attr:`.power_of_two_choices`.
+    """
+
+    def __init__(self, child_policy, shuffle_replicas=False, power_of_two_choices=False):
         self._child_policy = child_policy
         self.shuffle_replicas = shuffle_replicas
+        self.power_of_two_choices = power_of_two_choices
+        # host -> (average latency, time of last measurement)
+        self._latencies = {}
 
     def populate(self, cluster, hosts):
+        self._cluster = cluster
         self._cluster_metadata = cluster.metadata
+        if self.power_of_two_choices:
+            cluster.register_latency_tracker(self)
         self._child_policy.populate(cluster, hosts)
 
     def check_supported(self):
@@ -368,12 +423,20 @@ class TokenAwarePolicy(LoadBalancingPolicy):
                     yield host
             else:
                 replicas = self._cluster_metadata.get_replicas(keyspace, routing_key)
-                if self.shuffle_replicas:
-                    shuffle(replicas)
-                for replica in replicas:
-                    if replica.is_up and \
-                            child.distance(replica) == HostDistance.LOCAL:
+                if self.power_of_two_choices:
+                    local_replicas = [r for r in replicas if r.is_up and child.distance(r) == HostDistance.LOCAL]
+                    shuffle(local_replicas)
+                    if len(local_replicas) > 1 and self._less_loaded(local_replicas[1], local_replicas[0]):
+                        local_replicas[0], local_replicas[1] = local_replicas[1], local_replicas[0]
+                    for replica in local_replicas:
                         yield replica
+                else:
+                    if self.shuffle_replicas:
+                        shuffle(replicas)
+                    for replica in replicas:
+                        if replica.is_up and \
+                                child.distance(replica) == HostDistance.LOCAL:
+                            yield replica
 
                 for host in child.make_query_plan(keyspace, query):
                     # skip if we've already listed this host
@@ -381,6 +444,30 @@ class TokenAwarePolicy(LoadBalancingPolicy):
                             child.distance(host) == HostDistance.REMOTE:
                         yield host
 
+    def on_latency(self, host, query, latency):
+        now = time.time()
+        # not thread-safe, but a lost update only drops one sample
+        previous = self._latencies.get(host)
+        if previous is not None:
+            latency = _decayed_average(previous[0], now - previous[1], latency, self.latency_scale)
+        self._latencies[host] = (latency, now)
+
+    def _in_flight(self, host):
+        in_flight = 0
+        for session in tuple(self._cluster.sessions):
+            pool = session._pools.get(host)
+            if pool:
+                in_flight += pool.in_flight
+        return in_flight
+
+    def _less_loaded(self, host, other):
+        in_flight, other_in_flight = self._in_flight(host), self._in_flight(other)
+        latency, other_latency = self._latencies.get(host), self._latencies.get(other)
+        if latency is None or other_latency is None:
+            return in_flight < other_in_flight
+        # a new request waits for those in flight, so weight them by latency
+        return (in_flight + 1) * latency[0] < (other_in_flight + 1) * other_latency[0]
+
     def on_up(self, *args, **kwargs):
         return self._child_policy.on_up(*args, **kwargs)
 
@@ -390,8 +477,9 @@ class TokenAwarePolicy(LoadBalancingPolicy):
     def on_add(self, *args, **kwargs):
         return self._child_policy.on_add(*args, **kwargs)
 
-    def on_remove(self, *args, **kwargs):
-        return self._child_policy.on_remove(*args, **kwargs)
+    def on_remove(self, host, *args, **kwargs):
+        self._latencies.pop(host, None)
+        return self._child_policy.on_remove(host, *args, **kwargs)
 
 
 class WhiteListRoundRobinPolicy(RoundRobinPolicy):
@@ -553,6 +641,156 @@ class HostFilterPolicy(LoadBalancingPolicy):
         return self._child_policy.check_supported()
 
 
+class LatencyAwarePolicy(LoadBalancingPolicy, LatencyTracker):
+    """
+    A :class:`.LoadBalancingPolicy` wrapper that moves hosts which are
+    markedly slower than the fastest host to the end of the child policy's
+    query plans.
+
+    The policy keeps a moving average of the latency of each host. A host
+    is considered slow when its average exceeds :attr:`exclusion_threshold`
+    times the lowest average among all hosts. Slow hosts are still used
+    once every faster host in a query plan has been tried, and are given
+    their normal share of requests again once their average recovers, or
+    once they have had no response for :attr:`retry_period` seconds.
+
+    To favor fast replicas, wrap the token aware policy rather than the
+    other way around:
+
+    .. code-block:: python
+
+        cluster = Cluster(load_balancing_policy=LatencyAwarePolicy(
+            TokenAwarePolicy(DCAwareRoundRobinPolicy(local_dc='dc1'))))
+
+    Latencies are recorded from the responses to requests made through any
+    :class:`.Session` of the cluster the policy is populated with.
+    """
+
+    exclusion_threshold = 2.0
+    """
+    How many times slower than the fastest host a host must be to be
+    moved to the end of query plans.
+    """
+
+    scale = 0.1
+    """
+    The time constant, in seconds, of the moving average. The older a
+    host's average is when a new latency is recorded, the less weight it
+    keeps.
+    """
+
+    retry_period = 10.0
+    """
+    The number of seconds after which a slow host is used normally again
+    if no latency has been recorded for it, so that its average can be
+    refreshed.
+    """
+
+    update_rate = 0.1
+    """
+    The minimum number of seconds between computations of the lowest
+    average latency.
+    """
+
+    min_measured = 50
+    """
+    The number of latencies that must be recorded for a host before it can
+    be considered slow.
+    """
+
+    _min_average = None
+    _min_average_time = 0
+
+    def __init__(self, child_policy, exclusion_threshold=2.0, scale=0.1, retry_period=10.0,
+                 update_rate=0.1, min_measured=50):
+        super(LatencyAwarePolicy, self).__init__()
+        self._child_policy = child_policy
+        self.exclusion_threshold = exclusion_threshold
+        self.scale = scale
+        self.retry_period = retry_period
+        self.update_rate = update_rate
+        self.min_measured = min_measured
+        # host -> (average, number measured, time of last measurement)
+        self._latencies = {}
+
+    def populate(self, cluster, hosts):
+        cluster.register_latency_tracker(self)
+        self._child_policy.populate(cluster, hosts)
+
+    def check_supported(self):
+        return self._child_policy.check_supported()
+
+    def distance(self, host):
+        return self._child_policy.distance(host)
+
+    def on_latency(self, host, query, latency):
+        now = time.time()
+        # not thread-safe, but a lost update only drops one sample
+        previous = self._latencies.get(host)
+        if previous is None:
+            self._latencies[host] = (latency, 1, now)
+            return
+
+        average, measured, last = previous
+        average = _decayed_average(average, now - last, latency, self.scale)
+        self._latencies[host] = (average, measured + 1, now)
+
+    def host_latency(self, host):
+        """
+        Returns the average latency of `host` in seconds, or :const:`None`
+        if none has been recorded.
+        """
+        stats = self._latencies.get(host)
+        return stats[0] if stats else None
+
+    def make_query_plan(self, working_keyspace=None, query=None):
+        child_plan = self._child_policy.make_query_plan(working_keyspace, query)
+        now = time.time()
+        min_average = self._get_min_average(now)
+        if min_average is None:
+            for host in child_plan:
+                yield host
+            return
+
+        limit = min_average * self.exclusion_threshold
+        slow_hosts = []
+        for host in child_plan:
+            stats = self._latencies.get(host)
+            if stats and stats[0] > limit and stats[1] >= self.min_measured and \
+                    now - stats[2] <= self.retry_period:
+                slow_hosts.append(host)
+            else:
+                yield host
+
+        for host in slow_hosts:
+            yield host
+
+    def _get_min_average(self, now):
+        if now - self._min_average_time >= self.update_rate:
+            min_average = None
+            for average, measured, last in list(self._latencies.values()):
+                if measured >= self.min_measured and now - last <= self.retry_period and \
+                        (min_average is None or average < min_average):
+                    min_average = average
+            self._min_average = min_average
+            self._min_average_time = now
+        return self._min_average
+
+    def on_up(self, host):
+        return self._child_policy.on_up(host)
+
+    def on_down(self, host):
+        self._latencies.pop(host, None)
+        return self._child_policy.on_down(host)
+
+    def on_add(self, host):
+        return self._child_policy.on_add(host)
+
+    def on_remove(self, host):
+        self._latencies.pop(host, None)
+        return self._child_policy.on_remove(host)
+
+
 class ConvictionPolicy(object):
     """
     A policy which decides when hosts should be considered down
@@ -1105,3 +1343,136 @@ class ConstantSpeculativeExecutionPolicy(SpeculativeExecutionPolicy):
 
     def new_plan(self, keyspace, statement):
         return self.ConstantSpeculativeExecutionPlan(self.delay, self.max_attempts)
+
+
+class PercentileSpeculativeExecutionPolicy(SpeculativeExecutionPolicy, LatencyTracker):
+    """
+    A speculative execution policy that sends a new query once the request
+    has taken longer than the **percentile** of recent latencies, for a
+    maximum of **max_attempts** speculative executions.
+
+    Latencies are kept over a sliding window of between **window** / 2 and
+    **window** seconds. Bound statements use the latencies of their prepared
+    statement once **min_samples** have been recorded for it; other
+    statements use the latencies of all requests. No speculative executions
+    are made until **min_samples** latencies have been recorded.
+
+    Speculative executions are limited to a **budget** fraction of the
+    requests made over the window, so that a slow cluster does not receive
+    many more requests than usual.
+
+    The policy records latencies from the responses to requests using the
+    :class:`.ExecutionProfile` it is set on, once that profile is added to a
+    :class:`.Cluster`.
+    """
+
+    _refresh_interval = 1.0
+
+    def __init__(self, percentile=99.0, max_attempts=1, budget=0.1, window=60.0, min_samples=100):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.max_attempts = max_attempts
+        self.budget = budget
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = Lock()
+        self._current = _LatencyWindow()
+        self._previous = _LatencyWindow()
+        self._window_start = time.time()
+        # key -> (delay, time computed)
+        self._delays = {}
+
+    class PercentileSpeculativeExecutionPlan(SpeculativeExecutionPlan):
+        def __init__(self, policy, key):
+            self.policy = policy
+            self.key = key
+            self.remaining = policy.max_attempts
+            self.started = False
+
+        def next_execution(self, host):
+            if self.started:
+                # called again once the previous speculative execution is sent
+                self.policy._current.speculative_executions += 1
+            self.started = True
+
+            if self.remaining <= 0:
+                return -1
+            delay = self.policy._delay(self.key)
+            if delay < 0:
+                return -1
+            self.remaining -= 1
+            return delay
+
+    def new_plan(self, keyspace, statement):
+        self._rotate(time.time())
+        self._current.requests += 1
+        return self.PercentileSpeculativeExecutionPlan(self, _statement_key(statement))
+
+    def on_latency(self, host, query, latency):
+        if query is None:
+            return
+        self._rotate(time.time())
+        # not thread-safe, but a lost update only drops one sample
+        current = self._current
+        current.latencies.add(latency)
+        key = _statement_key(query)
+        if key is not None:
+            histogram = current.statement_latencies.get(key)
+            if histogram is None:
+                histogram = current.statement_latencies[key] = LatencyHistogram()
+            histogram.add(latency)
+
+    def _rotate(self, now):
+        if now - self._window_start >= self.window / 2:
+            with self._lock:
+                if now - self._window_start >= self.window / 2:
+                    self._previous, self._current = self._current, _LatencyWindow()
+                    self._window_start = now
+                    self._delays = {}
+
+    def _delay(self, key):
+        current, previous = self._current, self._previous
+        requests = current.requests + previous.requests
+        speculative_executions = current.speculative_executions + previous.speculative_executions
+        if speculative_executions >= self.budget * requests:
+            return -1
+
+        now = time.time()
+        cached = self._delays.get(key)
+        if cached is not None and now - cached[1] < self._refresh_interval:
+            return cached[0]
+
+        delay = -1
+        if key is not None:
+            delay = self._percentile(current.statement_latencies.get(key),
+                                     previous.statement_latencies.get(key))
+        if delay < 0:
+            delay = self._percentile(current.latencies, previous.latencies)
+        self._delays[key] = (delay, now)
+        return delay
+
+    def _percentile(self, *histograms):
+        merged = LatencyHistogram()
+        for histogram in histograms:
+            if histogram is not None:
+                merged.merge(histogram)
+        if merged.count < self.min_samples:
+            return -1
+        return merged.percentile(self.percentile)
+
+
+class _LatencyWindow(object):
+
+    requests = 0
+    speculative_executions = 0
+
+    def __init__(self):
+        self.latencies = LatencyHistogram()
+        self.statement_latencies = {}
+
+
+def _statement_key(statement):
+    # only prepared statements are keyed, since there is a bounded number of them
+    prepared_statement = getattr(statement, 'prepared_statement', None)
+    return prepared_statement.query_id if prepared_statement is not None else None
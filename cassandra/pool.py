@@ -300,6 +300,10 @@ class HostConnection(object):
     When using v3 of the native protocol, this is used instead of a connection
     pool per host (HostConnectionPool) due to the increased in-flight capacity
     of individual connections.
+
+    The number of connections it holds is set with
+    :meth:`.Cluster.set_host_connections`; requests are sent on the one with
+    the fewest in flight.
     """
 
     host = None
@@ -308,9 +312,13 @@ class HostConnection(object):
     shutdown_on_error = False
 
     _session = None
-    _connection = None
+    _connections = ()
     _lock = None
     _keyspace = None
+    _opens_connections = False
+    _scheduled_for_creation = 0
+    _next_trash_allowed_at = 0
+    _waiters = 0
 
     def __init__(self, host, host_distance, session):
         self.host = host
@@ -318,8 +326,10 @@ class HostConnection(object):
         self._session = weakref.proxy(session)
         self._lock = Lock()
         # this is used in conjunction with the connection streams. Not using the connection lock because the connection can be replaced in the lifetime of the pool.
+        # It is only notified when _waiters shows that a borrower is waiting on it.
         self._stream_available_condition = Condition(self._lock)
         self._is_replacing = False
+        self._trash = set()
 
         if host_distance == HostDistance.IGNORED:
             log.debug("Not opening connection to ignored host %s", self.host)
@@ -328,11 +338,23 @@ class HostConnection(object):
             log.debug("Not opening connection to remote host %s", self.host)
             return
 
-        log.debug("Initializing connection for host %s", self.host)
-        self._connection = session.cluster.connection_factory(host.address)
+        self._opens_connections = True
+        core_conns, _ = session.cluster.get_host_connections(host_distance)
+        log.debug("Initializing %d connection(s) for host %s", core_conns, self.host)
         self._keyspace = session.keyspace
-        if self._keyspace:
-            self._connection.set_keyspace_blocking(self._keyspace)
+        connections = []
+        try:
+            for _ in range(core_conns):
+                conn = session.cluster.connection_factory(host.address)
+                connections.append(conn)
+                if self._keyspace:
+                    conn.set_keyspace_blocking(self._keyspace)
+        except Exception:
+            for conn in connections:
+                conn.close()
+            raise
+        self._connections = tuple(connections)
+        self._next_trash_allowed_at = time.time()
         log.debug("Finished initializing connection for host %s", self.host)
 
     def borrow_connection(self, timeout):
@@ -340,31 +362,92 @@ class HostConnection(object):
             raise ConnectionException(
                 "Pool for %s is shutdown" % (self.host,), self.host)
 
-        conn = self._connection
-        if not conn:
+        if not self._connections:
             raise NoConnectionsAvailable()
 
         start = time.time()
         remaining = timeout
         while True:
-            with conn.lock:
-                if conn.in_flight <= conn.max_request_id:
-                    conn.in_flight += 1
-                    return conn, conn.get_request_id()
+            conns = self._connections
+            if conns:
+                conn = min(conns, key=lambda c: c.in_flight) if len(conns) > 1 else conns[0]
+                request_id = conn.borrow_request_id()
+                if request_id is not None:
+                    # connections are removed by replacing the tuple, before
+                    # checking whether they are idle
+                    if self._connections is conns or conn in self._connections:
+                        break
+                    conn.request_ids.append(request_id)
+                    self.return_connection(conn)
+                    continue
             if timeout is not None:
                 remaining = timeout - time.time() + start
                 if remaining < 0:
-                    break
+                    raise NoConnectionsAvailable("All request IDs are currently in use")
             with self._stream_available_condition:
-                self._stream_available_condition.wait(remaining)
+                self._waiters += 1
+                try:
+                    self._stream_available_condition.wait(remaining)
+                finally:
+                    self._waiters -= 1
+
+        # the least busy connection is at the threshold, so all of them are
+        cluster = self._session.cluster
+        if conn.in_flight >= cluster.new_connection_threshold and \
+                len(conns) < cluster.get_host_connections(self.host_distance)[1]:
+            self._maybe_spawn_new_connection()
 
-        raise NoConnectionsAvailable("All request IDs are currently in use")
+        return conn, request_id
+
+    def _maybe_spawn_new_connection(self):
+        _, max_conns = self._session.cluster.get_host_connections(self.host_distance)
+        with self._lock:
+            if self.is_shutdown or self._scheduled_for_creation >= _MAX_SIMULTANEOUS_CREATION:
+                return
+            if len(self._connections) + self._scheduled_for_creation >= max_conns:
+                return
+            self._scheduled_for_creation += 1
+
+        log.debug("Submitting task for creation of new Connection to %s", self.host)
+        self._session.submit(self._create_new_connection)
+
+    def _create_new_connection(self):
+        conn = None
+        try:
+            conn = self._session.cluster.connection_factory(self.host.address)
+            if self._keyspace:
+                conn.set_keyspace_blocking(self._keyspace)
+        except (ConnectionException, socket.error) as exc:
+            log.warning("Failed to create new connection to %s: %s", self.host, exc)
+        except Exception:
+            log.exception("Unexpectedly failed to create new connection")
+
+        with self._lock:
+            self._scheduled_for_creation -= 1
+            if conn is not None and not self.is_shutdown:
+                self._connections = self._connections + (conn,)
+                self._next_trash_allowed_at = time.time() + _MIN_TRASH_INTERVAL
+                self._stream_available_condition.notify()
+                log.debug("Added new connection (%s) for host %s", id(conn), self.host)
+                return
+
+        if conn is not None:
+            conn.close()
 
     def return_connection(self, connection):
-        with connection.lock:
-            connection.in_flight -= 1
-        with self._stream_available_condition:
-            self._stream_available_condition.notify()
+        in_flight = connection.release_request()
+        if self._waiters:
+            with self._stream_available_condition:
+                self._stream_available_condition.notify()
+
+        connections = self._connections
+        if connection not in connections:
+            # trashed, replaced, or the pool is shut down
+            if in_flight == 0:
+                with self._lock:
+                    self._trash.discard(connection)
+                connection.close()
+            return
 
         if connection.is_defunct or connection.is_closed:
             if connection.signaled_error and not self.shutdown_on_error:
@@ -385,12 +468,38 @@ class HostConnection(object):
             if is_down:
                 self.shutdown()
             else:
-                self._connection = None
                 with self._lock:
+                    self._connections = tuple(c for c in self._connections if c is not connection)
                     if self._is_replacing:
                         return
                     self._is_replacing = True
                     self._session.submit(self._replace, connection)
+        elif len(connections) > 1 and time.time() >= self._next_trash_allowed_at:
+            cluster = self._session.cluster
+            core_conns, _ = cluster.get_host_connections(self.host_distance)
+            # trim back once the others could carry the load at half the
+            # threshold, so that connections are not opened and closed in turn
+            if len(connections) > core_conns and \
+                    self.in_flight * 2 <= (len(connections) - 1) * cluster.new_connection_threshold:
+                self._maybe_trash_connection(connection)
+
+    def _maybe_trash_connection(self, connection):
+        core_conns, _ = self._session.cluster.get_host_connections(self.host_distance)
+        with self._lock:
+            if connection not in self._connections or len(self._connections) <= core_conns:
+                return
+            self._connections = tuple(c for c in self._connections if c is not connection)
+            self._next_trash_allowed_at = time.time() + _MIN_TRASH_INTERVAL
+
+            # borrowers check that the connection is still in the pool after
+            # counting their request, so none is added once this sees zero
+            if connection.in_flight == 0:
+                log.debug("Skipping trash and closing unused connection (%s) to %s", id(connection), self.host)
+                connection.close()
+                return
+
+            self._trash.add(connection)
+        log.debug("Trashed connection (%s) to %s", id(connection), self.host)
 
     def _replace(self, connection):
         with self._lock:
@@ -402,14 +511,22 @@ class HostConnection(object):
             conn = self._session.cluster.connection_factory(self.host.address)
             if self._keyspace:
                 conn.set_keyspace_blocking(self._keyspace)
-            self._connection = conn
         except Exception:
             log.warning("Failed reconnecting %s. Retrying." % (self.host.address,))
             self._session.submit(self._replace, connection)
         else:
+            core_conns, _ = self._session.cluster.get_host_connections(self.host_distance)
             with self._lock:
-                self._is_replacing = False
-                self._stream_available_condition.notify()
+                if not self.is_shutdown:
+                    self._connections = self._connections + (conn,)
+                    self._stream_available_condition.notify()
+                    if len(self._connections) < core_conns:
+                        # more than one connection was lost
+                        self._session.submit(self._replace, connection)
+                        return
+                    self._is_replacing = False
+                    return
+            conn.close()
 
     def shutdown(self):
         with self._lock:
@@ -418,37 +535,70 @@ class HostConnection(object):
             else:
                 self.is_shutdown = True
             self._stream_available_condition.notify_all()
+            connections, self._connections = self._connections, ()
+            trash, self._trash = self._trash, set()
 
-        if self._connection:
-            self._connection.close()
-            self._connection = None
+        for conn in connections:
+            conn.close()
+        for conn in trash:
+            conn.close()
+
+    def ensure_core_connections(self):
+        if self.is_shutdown or not self._opens_connections:
+            return
+
+        core_conns, _ = self._session.cluster.get_host_connections(self.host_distance)
+        with self._lock:
+            to_create = core_conns - (len(self._connections) + self._scheduled_for_creation)
+            for i in range(to_create):
+                self._scheduled_for_creation += 1
+                self._session.submit(self._create_new_connection)
 
     def _set_keyspace_for_all_conns(self, keyspace, callback):
-        if self.is_shutdown or not self._connection:
+        """
+        Asynchronously sets the keyspace for all connections.  When all
+        connections have been set, `callback` will be called with two
+        arguments: this pool, and a list of any errors that occurred.
+        """
+        connections = self._connections
+        if self.is_shutdown or not connections:
             return
 
+        remaining_callbacks = set(connections)
+        errors = []
+
         def connection_finished_setting_keyspace(conn, error):
             self.return_connection(conn)
-            errors = [] if not error else [error]
-            callback(self, errors)
+            remaining_callbacks.remove(conn)
+            if error:
+                errors.append(error)
+
+            if not remaining_callbacks:
+                callback(self, errors)
 
         self._keyspace = keyspace
-        self._connection.set_keyspace_async(keyspace, connection_finished_setting_keyspace)
+        for conn in connections:
+            conn.set_keyspace_async(keyspace, connection_finished_setting_keyspace)
 
     def get_connections(self):
-        c = self._connection
-        return [c] if c else []
+        return list(self._connections)
 
     def get_state(self):
-        connection = self._connection
-        open_count = 1 if connection and not (connection.is_closed or connection.is_defunct) else 0
-        in_flights = [connection.in_flight] if connection else []
-        return {'shutdown': self.is_shutdown, 'open_count': open_count, 'in_flights': in_flights}
+        connections = self._connections
+        in_flights = [c.in_flight for c in connections]
+        return {'shutdown': self.is_shutdown, 'open_count': self.open_count, 'in_flights': in_flights}
+
+    @property
+    def in_flight(self):
+        """
+        The number of requests in flight to the host. This is read without
+        locking, so it may be slightly out of date.
+        """
+        return sum(c.in_flight for c in self._connections)
 
     @property
     def open_count(self):
-        connection = self._connection
-        return 1 if connection and not (connection.is_closed or connection.is_defunct) else 0
+        return sum(1 for c in self._connections if not (c.is_closed or c.is_defunct))
 
 _MAX_SIMULTANEOUS_CREATION = 1
 _MIN_TRASH_INTERVAL = 10
@@ -467,6 +617,7 @@ class HostConnectionPool(object):
     _scheduled_for_creation = 0
     _next_trash_allowed_at = 0
     _keyspace = None
+    _waiters = 0
 
     def __init__(self, host, host_distance, session):
         self.host = host
@@ -521,22 +672,9 @@ class HostConnectionPool(object):
             max_conns = self._session.cluster.get_max_connections_per_host(self.host_distance)
 
             least_busy = min(conns, key=lambda c: c.in_flight)
-            request_id = None
-            # to avoid another thread closing this connection while
-            # trashing it (through the return_connection process), hold
-            # the connection lock from this point until we've incremented
-            # its in_flight count
-            need_to_wait = False
-            with least_busy.lock:
-                if least_busy.in_flight < least_busy.max_request_id:
-                    least_busy.in_flight += 1
-                    request_id = least_busy.get_request_id()
-                else:
-                    # once we release the lock, wait for another connection
-                    need_to_wait = True
-
-            if need_to_wait:
-                # wait_for_conn will increment in_flight on the conn
+            request_id = self._borrow_request_id(conns, least_busy)
+            if request_id is None:
+                # wait_for_conn will borrow a request id on the conn
                 least_busy, request_id = self._wait_for_conn(timeout)
 
             # if we have too many requests on this connection but we still
@@ -605,13 +743,36 @@ class HostConnectionPool(object):
                 self.open_count -= 1
             return False
 
+    def _borrow_request_id(self, conns, connection):
+        """
+        Borrows a request id on `connection`, which was chosen from `conns`.
+        Returns :const:`None` if the connection is busy, or was trashed or
+        replaced meanwhile.
+        """
+        request_id = connection.borrow_request_id()
+        if request_id is None:
+            return None
+        # connections are taken out of the pool before they are checked for
+        # requests in flight, so one still in it is not closed under this request
+        if self._connections is conns or connection in self._connections:
+            return request_id
+        connection.request_ids.append(request_id)
+        self.return_connection(connection)
+        return None
+
     def _await_available_conn(self, timeout):
         with self._conn_available_condition:
-            self._conn_available_condition.wait(timeout)
+            self._waiters += 1
+            try:
+                self._conn_available_condition.wait(timeout)
+            finally:
+                self._waiters -= 1
 
     def _signal_available_conn(self):
-        with self._conn_available_condition:
-            self._conn_available_condition.notify()
+        # most requests are returned with no borrower waiting
+        if self._waiters:
+            with self._conn_available_condition:
+                self._conn_available_condition.notify()
 
     def _signal_all_available_conn(self):
         with self._conn_available_condition:
@@ -633,19 +794,16 @@ class HostConnectionPool(object):
             conns = self._connections
             if conns:
                 least_busy = min(conns, key=lambda c: c.in_flight)
-                with least_busy.lock:
-                    if least_busy.in_flight < least_busy.max_request_id:
-                        least_busy.in_flight += 1
-                        return least_busy, least_busy.get_request_id()
+                request_id = self._borrow_request_id(conns, least_busy)
+                if request_id is not None:
+                    return least_busy, request_id
 
             remaining = timeout - (time.time() - start)
 
         raise NoConnectionsAvailable()
 
     def return_connection(self, connection):
-        with connection.lock:
-            connection.in_flight -= 1
-            in_flight = connection.in_flight
+        in_flight = connection.release_request()
 
         if connection.is_defunct or connection.is_closed:
             if not connection.signaled_error:
@@ -660,13 +818,12 @@ class HostConnectionPool(object):
                     self._replace(connection)
         else:
             if connection in self._trash:
-                with connection.lock:
-                    if connection.in_flight == 0:
-                        with self._lock:
-                            if connection in self._trash:
-                                self._trash.remove(connection)
-                        log.debug("Closing trashed connection (%s) to %s", id(connection), self.host)
-                        connection.close()
+                if in_flight == 0:
+                    with self._lock:
+                        if connection in self._trash:
+                            self._trash.remove(connection)
+                    log.debug("Closing trashed connection (%s) to %s", id(connection), self.host)
+                    connection.close()
                 return
 
             core_conns = self._session.cluster.get_core_connections_per_host(self.host_distance)
@@ -694,13 +851,12 @@ class HostConnectionPool(object):
                 new_connections.remove(connection)
                 self._connections = new_connections
 
-                with connection.lock:
-                    if connection.in_flight == 0:
-                        log.debug("Skipping trash and closing unused connection (%s) to %s", id(connection), self.host)
-                        connection.close()
+                if connection.in_flight == 0:
+                    log.debug("Skipping trash and closing unused connection (%s) to %s", id(connection), self.host)
+                    connection.close()
 
-                        # skip adding it to the trash if we're already closing it
-                        return
+                    # skip adding it to the trash if we're already closing it
+                    return
 
                 self._trash.add(connection)
 
@@ -794,3 +950,11 @@ class HostConnectionPool(object):
     def get_state(self):
         in_flights = [c.in_flight for c in self._connections]
         return {'shutdown': self.is_shutdown, 'open_count': self.open_count, 'in_flights': in_flights}
+
+    @property
+    def in_flight(self):
+        """
+        The number of requests in flight to the host. This is read without
+        locking, so it may be slightly out of date.
+        """
+        return sum(c.in_flight for c in self._connections)
@@ -13,9 +13,11 @@
 # limitations under the License.
 
 from __future__ import absolute_import  # to enable import io from stdlib
+from array import array
 from collections import namedtuple
 import logging
 import socket
+import struct
 from uuid import UUID
 
 import six
@@ -793,6 +795,70 @@ class ResultMessage(_MessageType):
         return [read_value(f) for _ in range(colcount)]
 
 
+_int32_unpack_from = struct.Struct('>i').unpack_from
+
+
+class EncodedRows(object):
+    """
+    The rows of a result page, with every value left in its encoded form.
+    Only the position of each value in the page is recorded; values are
+    deserialized by :meth:`decode` when they are asked for.
+    """
+
+    def __init__(self, f, rowcount, colnames, coltypes, protocol_version):
+        self.colnames = colnames
+        self.coltypes = coltypes
+        self.protocol_version = protocol_version
+        self._colcount = len(coltypes)
+        self._rowcount = rowcount
+
+        # one copy of the frame body, shared by all the rows of the page
+        self._buffer = buffer = f.getvalue()
+        self._offsets = offsets = array('i')
+        append, unpack_from = offsets.append, _int32_unpack_from
+        pos = f.tell()
+        for _ in range(rowcount * self._colcount):
+            append(pos)
+            size = unpack_from(buffer, pos)[0]
+            pos += 4 + size if size > 0 else 4
+        f.seek(pos)
+
+    def __len__(self):
+        return self._rowcount
+
+    def decode(self, row, column):
+        """
+        Deserializes the value of the given column of a row.
+        """
+        pos = self._offsets[row * self._colcount + column]
+        size = _int32_unpack_from(self._buffer, pos)[0]
+        value = self._buffer[pos + 4:pos + 4 + size] if size >= 0 else None
+        coltype = self.coltypes[column]
+        try:
+            return coltype.from_binary(value, self.protocol_version)
+        except Exception as e:
+            raise DriverException('Failed decoding result column "%s" of type %s: %s' % (self.colnames[column],
+                                                                                         coltype.cql_parameterized_type(),
+                                                                                         str(e)))
+
+
+class _EncodedRowsResultMessage(ResultMessage):
+    """
+    A :class:`ResultMessage` which returns the rows of a page as
+    :class:`EncodedRows`, for :func:`~.query.lazy_row_factory`.
+    """
+
+    @classmethod
+    def recv_results_rows(cls, f, protocol_version, user_type_map, result_metadata):
+        paging_state, column_metadata, result_metadata_id = cls.recv_results_metadata(f, user_type_map)
+        column_metadata = column_metadata or result_metadata
+        rowcount = read_int(f)
+        colnames = [c[2] for c in column_metadata]
+        coltypes = [c[3] for c in column_metadata]
+        rows = EncodedRows(f, rowcount, colnames, coltypes, protocol_version)
+        return paging_state, coltypes, (colnames, rows), result_metadata_id
+
+
 class PrepareMessage(_MessageType):
     opcode = 0x09
     name = 'PREPARE'
@@ -834,10 +900,16 @@ class PrepareMessage(_MessageType):
 class ExecuteMessage(_MessageType):
     opcode = 0x0A
     name = 'EXECUTE'
+
+    max_cached_prefixes = 64
+    """
+    Bound on the number of encoded prefixes kept in a ``prefix_cache``.
+    """
+
     def __init__(self, query_id, query_params, consistency_level,
                  serial_consistency_level=None, fetch_size=None,
                  paging_state=None, timestamp=None, skip_meta=False,
-                 result_metadata_id=None):
+                 result_metadata_id=None, prefix_cache=None):
         self.query_id = query_id
         self.query_params = query_params
         self.consistency_level = consistency_level
@@ -847,12 +919,13 @@ class ExecuteMessage(_MessageType):
         self.timestamp = timestamp
         self.skip_meta = skip_meta
         self.result_metadata_id = result_metadata_id
+        # optional dict shared by all executions of a prepared statement, holding the encoded
+        # bytes that precede the bound values (query id, metadata id, consistency and flags)
+        self._prefix_cache = prefix_cache
 
     def send_body(self, f, protocol_version):
-        write_string(f, self.query_id)
-        if ProtocolVersion.uses_prepared_metadata(protocol_version):
-            write_string(f, self.result_metadata_id)
         if protocol_version == 1:
+            write_string(f, self.query_id)
             if self.serial_consistency_level:
                 raise UnsupportedOperation(
                     "Serial consistency levels require the use of protocol version "
@@ -867,7 +940,6 @@ class ExecuteMessage(_MessageType):
                 write_value(f, param)
             write_consistency_level(f, self.consistency_level)
         else:
-            write_consistency_level(f, self.consistency_level)
             flags = _VALUES_FLAG
             if self.serial_consistency_level:
                 flags |= _WITH_SERIAL_CONSISTENCY_FLAG
@@ -885,10 +957,21 @@ class ExecuteMessage(_MessageType):
             if self.skip_meta:
                 flags |= _SKIP_METADATA_FLAG
 
-            if ProtocolVersion.uses_int_query_flags(protocol_version):
-                write_uint(f, flags)
+            cache = self._prefix_cache
+            if cache is None:
+                self._write_prefix(f, protocol_version, flags)
             else:
-                write_byte(f, flags)
+                key = (protocol_version, self.consistency_level, flags, self.result_metadata_id)
+                try:
+                    prefix = cache[key]
+                except KeyError:
+                    buf = io.BytesIO()
+                    self._write_prefix(buf, protocol_version, flags)
+                    prefix = buf.getvalue()
+                    if len(cache) >= self.max_cached_prefixes:
+                        cache.clear()
+                    cache[key] = prefix
+                f.write(prefix)
 
             write_short(f, len(self.query_params))
             for param in self.query_params:
@@ -902,6 +985,15 @@ class ExecuteMessage(_MessageType):
             if self.timestamp is not None:
                 write_long(f, self.timestamp)
 
+    def _write_prefix(self, f, protocol_version, flags):
+        write_string(f, self.query_id)
+        if ProtocolVersion.uses_prepared_metadata(protocol_version):
+            write_string(f, self.result_metadata_id)
+        write_consistency_level(f, self.consistency_level)
+        if ProtocolVersion.uses_int_query_flags(protocol_version):
+            write_uint(f, flags)
+        else:
+            write_byte(f, flags)
 
 
 class BatchMessage(_MessageType):
@@ -1085,11 +1177,8 @@ class _ProtocolHandler(object):
         if allow_beta_protocol_version:
             flags |= USE_BETA_FLAG
 
-        buff = io.BytesIO()
-        cls._write_header(buff, protocol_version, flags, stream_id, msg.opcode, len(body))
-        buff.write(body)
-
-        return buff.getvalue()
+        pack = v3_header_pack if protocol_version >= 3 else header_pack
+        return pack(protocol_version, flags, stream_id, msg.opcode) + int32_pack(len(body)) + body
 
     @staticmethod
     def _write_header(f, version, flags, stream_id, opcode, length):
@@ -1111,7 +1200,7 @@ class _ProtocolHandler(object):
         :param stream_id: native protocol stream id from the frame header
         :param flags: native protocol flags bitmap from the header
         :param opcode: native protocol opcode from the header
-        :param body: frame body
+        :param body: frame body; a bytes-like object that is only valid for the duration of this call
         :param decompressor: optional decompression function to inflate the body
         :return: a message decoded from the body and frame attributes
         """
@@ -1163,7 +1252,7 @@ def cython_protocol_handler(colparser):
     Given a column parser to deserialize ResultMessages, return a suitable
     Cython-based protocol handler.
 
-    There are three Cython-based protocol handlers:
+    There are four Cython-based protocol handlers:
 
         - obj_parser.ListParser
             decodes result messages into a list of tuples
@@ -1174,6 +1263,9 @@ def cython_protocol_handler(colparser):
         - numpy_parser.NumPyParser
             decodes result messages into NumPy arrays
 
+        - columnar_parser.ColumnarParser
+            decodes result messages into contiguous column buffers
+
     The default is to use obj_parser.ListParser
     """
     from cassandra.row_parser import make_recv_results_rows
@@ -1203,12 +1295,26 @@ def cython_protocol_handler(colparser):
 
 if HAVE_CYTHON:
     from cassandra.obj_parser import ListParser, LazyParser
+    from cassandra.columnar_parser import ColumnarParser
     ProtocolHandler = cython_protocol_handler(ListParser())
     LazyProtocolHandler = cython_protocol_handler(LazyParser())
+    ColumnarProtocolHandler = cython_protocol_handler(ColumnarParser())
 else:
     # Use Python-based ProtocolHandler
     ProtocolHandler = _ProtocolHandler
     LazyProtocolHandler = None
+    ColumnarProtocolHandler = None
+
+
+class EncodedRowsProtocolHandler(_ProtocolHandler):
+    """
+    Decodes result rows into :class:`EncodedRows`. This is used in place of
+    the default :class:`ProtocolHandler` when the row factory is
+    :func:`~.query.lazy_row_factory`.
+    """
+
+    message_types_by_opcode = _ProtocolHandler.message_types_by_opcode.copy()
+    message_types_by_opcode[_EncodedRowsResultMessage.opcode] = _EncodedRowsResultMessage
 
 
 if HAVE_CYTHON and HAVE_NUMPY:
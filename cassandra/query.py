@@ -27,12 +27,18 @@ import six
 from six.moves import range, zip
 
 from cassandra import ConsistencyLevel, OperationTimedOut
+from cassandra.cython_deps import HAVE_CYTHON
 from cassandra.util import unix_time_from_uuid1
 from cassandra.encoder import Encoder
 import cassandra.encoder
-from cassandra.protocol import _UNSET_VALUE
+from cassandra.protocol import _UNSET_VALUE, EncodedRows
 from cassandra.util import OrderedDict, _sanitize_identifiers
 
+if HAVE_CYTHON:
+    from cassandra.serializers import make_serializers
+else:
+    make_serializers = None
+
 import logging
 log = logging.getLogger(__name__)
 
@@ -113,9 +119,34 @@ def named_tuple_factory(colnames, rows):
     .. versionchanged:: 2.0.0
         moved from ``cassandra.decoder`` to ``cassandra.query``
     """
+    try:
+        Row = _named_tuple_classes[tuple(colnames)]
+    except KeyError:
+        Row = _cache_row_class(_named_tuple_classes, colnames, _make_named_tuple_class(colnames))
+
+    return [Row(*row) for row in rows]
+
+
+# Row classes are cached by column names, since creating them costs much
+# more than building the rows of a small page. The caches are emptied when
+# they fill up rather than evicting entries one at a time, which keeps
+# lookups lock-free.
+_ROW_CLASS_CACHE_SIZE = 1000
+
+_named_tuple_classes = {}
+
+
+def _cache_row_class(cache, colnames, row_class):
+    if len(cache) >= _ROW_CLASS_CACHE_SIZE:
+        cache.clear()
+    cache[tuple(colnames)] = row_class
+    return row_class
+
+
+def _make_named_tuple_class(colnames):
     clean_column_names = map(_clean_column_name, colnames)
     try:
-        Row = namedtuple('Row', clean_column_names)
+        return namedtuple('Row', clean_column_names)
     except Exception:
         clean_column_names = list(map(_clean_column_name, colnames))  # create list because py3 map object will be consumed by first attempt
         log.warning("Failed creating named tuple for results with column names %s (cleaned: %s) "
@@ -124,9 +155,7 @@ def named_tuple_factory(colnames, rows):
                     "Avoid this by choosing different names, using SELECT \"<col name>\" AS aliases, "
                     "or specifying a different row_factory on your Session" %
                     (colnames, clean_column_names))
-        Row = namedtuple('Row', _sanitize_identifiers(clean_column_names))
-
-    return [Row(*row) for row in rows]
+        return namedtuple('Row', _sanitize_identifiers(clean_column_names))
 
 
 def dict_factory(colnames, rows):
@@ -159,6 +188,221 @@ def ordered_dict_factory(colnames, rows):
     return [OrderedDict(zip(colnames, row)) for row in rows]
 
 
+def compact_row_factory(colnames, rows):
+    """
+    Returns each row as a :class:`.CompactRow`, an object with a slot for each
+    column. Columns can be read as attributes or by position, like a
+    namedtuple, but the row is not a tuple.
+
+    Example::
+
+        >>> from cassandra.query import compact_row_factory
+        >>> session = cluster.connect('mykeyspace')
+        >>> session.row_factory = compact_row_factory
+        >>> rows = session.execute("SELECT name, age FROM users LIMIT 1")
+        >>> user = rows[0]
+        >>> print "name: %s, age: %d" % (user.name, user.age)
+        name: Bob, age: 42
+    """
+    try:
+        Row = _compact_row_classes[tuple(colnames)]
+    except KeyError:
+        Row = _cache_row_class(_compact_row_classes, colnames, _make_compact_row_class(colnames))
+
+    return [Row(*row) for row in rows]
+
+
+_compact_row_classes = {}
+
+
+def _make_compact_row_class(colnames):
+    fields = tuple(_sanitize_identifiers([_clean_column_name(name) for name in colnames]))
+    # generate __init__ like namedtuple does; the sanitized names are
+    # always valid identifiers
+    args = ['_%d' % i for i in range(len(fields))]
+    source = "def __init__(self%s):\n    pass\n%s" % (
+        "".join(", " + arg for arg in args),
+        "".join("    self.%s = %s\n" % (field, arg) for field, arg in zip(fields, args)))
+    namespace = {}
+    exec(source, namespace)
+    return type('Row', (CompactRow,), {'__slots__': fields, '_fields': fields,
+                                       '__init__': namespace['__init__']})
+
+
+class CompactRow(object):
+    """
+    The base class of the rows returned by :func:`.compact_row_factory`.
+    """
+
+    __slots__ = ()
+
+    _fields = ()
+    """
+    The attribute names of the columns, in order.
+    """
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(getattr(self, field) for field in self._fields[index])
+        return getattr(self, self._fields[index])
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self._fields)
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, CompactRow)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, (tuple, CompactRow)):
+            return tuple(self) != tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Row(%s)" % ", ".join("%s=%r" % (field, value) for field, value in zip(self._fields, self))
+
+    def _asdict(self):
+        """
+        Returns the row as an OrderedDict of column names to values.
+        """
+        return OrderedDict(zip(self._fields, self))
+
+
+def lazy_row_factory(colnames, rows):
+    """
+    Returns each row as a :class:`.LazyRow`, which deserializes a column
+    the first time it is read. Columns that are never read are never
+    decoded, which makes this cheaper than the other row factories when
+    only a few of the selected columns are used.
+
+    Example::
+
+        >>> from cassandra.query import lazy_row_factory
+        >>> session = cluster.connect('mykeyspace')
+        >>> session.row_factory = lazy_row_factory
+        >>> rows = session.execute("SELECT * FROM users")
+        >>> for user in rows:
+        ...     print user.name  # only the name column is decoded
+
+    Rows are only decoded lazily with the default
+    :attr:`.Session.client_protocol_handler`; with other protocol handlers
+    the values are already decoded when the rows are created.
+    """
+    columns = _LazyRowColumns(colnames)
+    if isinstance(rows, EncodedRows):
+        return [LazyRow(columns, rows, i) for i in range(len(rows))]
+    return [LazyRow(columns, None, i, list(row)) for i, row in enumerate(rows)]
+
+
+class _LazyRowColumns(object):
+    """
+    The column names of a page of :class:`.LazyRow`, shared by its rows.
+    """
+
+    def __init__(self, colnames):
+        self.colnames = colnames
+        self.fields = _sanitize_identifiers([_clean_column_name(name) for name in colnames])
+        self.indexes = {}
+        for names in (colnames, self.fields):
+            for i, name in enumerate(names):
+                self.indexes.setdefault(name, i)
+
+
+_NOT_DECODED = object()
+
+
+class LazyRow(object):
+    """
+    A row returned by :func:`.lazy_row_factory`.
+
+    Like a `namedtuple <https://docs.python.org/2/library/collections.html#collections.namedtuple>`_,
+    columns can be read by position or as attributes; they can also be read
+    by column name, as with ``row['name']``. Each value is deserialized the
+    first time it is read and then cached in the row.
+    """
+
+    __slots__ = ('_columns', '_rows', '_row', '_values')
+
+    def __init__(self, columns, rows, row, values=None):
+        self._columns = columns
+        self._rows = rows
+        self._row = row
+        self._values = values
+
+    def _value(self, i):
+        values = self._values
+        if values is None:
+            values = self._values = [_NOT_DECODED] * len(self._columns.colnames)
+        value = values[i]
+        if value is _NOT_DECODED:
+            value = values[i] = self._rows.decode(self._row, i)
+        return value
+
+    @property
+    def _fields(self):
+        return tuple(self._columns.fields)
+
+    def __getattr__(self, name):
+        # slots are only looked up here when they are not set yet, as on
+        # rows being copied or unpickled
+        if name in LazyRow.__slots__ or (name.startswith('__') and name.endswith('__')):
+            raise AttributeError(name)
+        try:
+            i = self._columns.indexes[name]
+        except KeyError:
+            raise AttributeError("Row has no column %r" % (name,))
+        return self._value(i)
+
+    def __reduce__(self):
+        # decoded, so that copies do not hold on to the encoded page
+        return LazyRow, (self._columns, None, self._row, list(self))
+
+    def __getitem__(self, key):
+        if isinstance(key, six.string_types):
+            return self._value(self._columns.indexes[key])
+        if isinstance(key, slice):
+            return tuple(self._value(i) for i in range(*key.indices(len(self))))
+        size = len(self)
+        if key < 0:
+            key += size
+        if not 0 <= key < size:
+            raise IndexError("Row index out of range")
+        return self._value(key)
+
+    def __len__(self):
+        return len(self._columns.colnames)
+
+    def __iter__(self):
+        return (self._value(i) for i in range(len(self)))
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, LazyRow)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, (tuple, LazyRow)):
+            return tuple(self) != tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Row(%s)" % ", ".join("%s=%r" % (field, value) for field, value in zip(self._columns.fields, self))
+
+    def _asdict(self):
+        """
+        Returns the row as an OrderedDict of column names to values.
+        """
+        return OrderedDict(zip(self._columns.fields, self))
+
+
 FETCH_SIZE_UNSET = object()
 
 
@@ -194,6 +438,13 @@ class Statement(object):
     .. versionadded:: 2.0.0
     """
 
+    prefetch_pages = None
+    """
+    The number of pages to read ahead while paging through the results of
+    this query. If left as :const:`None`, :attr:`.Session.default_prefetch_pages`
+    is used. Has no effect when paging is disabled.
+    """
+
     keyspace = None
     """
     The string name of the keyspace this query acts on. This is used when
@@ -274,6 +525,9 @@ class Statement(object):
         If the partition key is a composite, a list or tuple must be passed in.
         Each key component should be in its packed (binary) format, so all
         components should be strings.
+
+        Queries which don't address a single partition, like token range
+        queries, may instead pass a :class:`~.metadata.Token` to route by.
         """)
 
     def _get_serial_consistency_level(self):
@@ -397,6 +651,8 @@ class PreparedStatement(object):
     result_metadata_id = None
     routing_key_indexes = None
     _routing_key_index_set = None
+    _execute_prefixes = None
+    _serializers = None
     serial_consistency_level = None
 
     def __init__(self, column_metadata, query_id, routing_key_indexes, query,
@@ -410,6 +666,13 @@ class PreparedStatement(object):
         self.result_metadata = result_metadata
         self.result_metadata_id = result_metadata_id
         self.is_idempotent = False
+        # encoded ExecuteMessage prefixes, see protocol.ExecuteMessage
+        self._execute_prefixes = {}
+        if column_metadata:
+            # anything with serialize(value, protocol_version): the compiled
+            # serializers if available, otherwise the cqltypes themselves
+            col_types = [col.type for col in column_metadata]
+            self._serializers = make_serializers(col_types) if make_serializers else col_types
 
     @classmethod
     def from_message(cls, query_id, column_metadata, pk_indexes, cluster_metadata,
@@ -564,9 +827,11 @@ class BoundStatement(Statement):
                 "Too few arguments provided to bind() (got %d, required %d for routing key)" %
                 (value_len, len(self.prepared_statement.routing_key_indexes)))
 
+        serializers = self.prepared_statement._serializers or [col.type for col in col_meta]
+
         self.raw_values = values
         self.values = []
-        for value, col_spec in zip(values, col_meta):
+        for value, col_spec, serializer in zip(values, col_meta, serializers):
             if value is None:
                 self.values.append(None)
             elif value is UNSET_VALUE:
@@ -576,7 +841,7 @@ class BoundStatement(Statement):
                     raise ValueError("Attempt to bind UNSET_VALUE while using unsuitable protocol version (%d < 4)" % proto_version)
             else:
                 try:
-                    self.values.append(col_spec.type.serialize(value, proto_version))
+                    self.values.append(serializer.serialize(value, proto_version))
                 except (TypeError, struct.error) as exc:
                     actual_type = type(value)
                     message = ('Received an argument of invalid type for column "%s". '
@@ -600,12 +865,12 @@ class BoundStatement(Statement):
 
     @property
     def routing_key(self):
-        if not self.prepared_statement.routing_key_indexes:
-            return None
-
         if self._routing_key is not None:
             return self._routing_key
 
+        if not self.prepared_statement.routing_key_indexes:
+            return None
+
         routing_indexes = self.prepared_statement.routing_key_indexes
         if len(routing_indexes) == 1:
             self._routing_key = self.values[routing_indexes[0]]
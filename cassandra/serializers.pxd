@@ -0,0 +1,29 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+cdef class Serializer:
+    # The cqltypes._CassandraType corresponding to this serializer
+    cdef object cqltype
+
+    cpdef serialize(self, value, int protocol_version)
+
+
+cdef inline object to_binary(Serializer serializer,
+                             object value,
+                             int protocol_version):
+    # mirrors _CassandraType.to_binary: nested None values encode as b''
+    if value is None:
+        return b''
+    return serializer.serialize(value, protocol_version)
@@ -0,0 +1,368 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cython counterpart of the cqltypes serialize() methods, used when binding
+values to prepared statements.
+
+Each serializer handles the common exact Python types directly and defers
+anything else to the wrapped cqltype, so the results (and the exceptions
+raised for invalid values) are the same as the pure Python implementation.
+"""
+
+from libc.stdint cimport (int32_t, int64_t,
+                          INT8_MIN, INT8_MAX, INT16_MIN, INT16_MAX,
+                          INT32_MIN, INT32_MAX)
+from libc.float cimport FLT_MAX
+from libc.math cimport isinf, isnan
+from cpython.unicode cimport PyUnicode_AsUTF8String, PyUnicode_AsASCIIString
+from cpython.datetime cimport (
+    import_datetime,
+    PyDateTime_CheckExact,
+    datetime_tzinfo,
+    datetime_year,
+    datetime_month,
+    datetime_day,
+    datetime_hour,
+    datetime_minute,
+    datetime_second,
+    datetime_microsecond,
+    )
+
+include 'cython_marshal.pyx'
+
+from cassandra import cqltypes
+
+import_datetime()
+
+DEF DAY_IN_SECONDS = 86400
+
+cdef object _string_types = six.string_types
+cdef object _iteritems = six.iteritems
+
+
+cdef class Serializer:
+    """Cython-based serializer class for a cqltype"""
+
+    def __init__(self, cqltype):
+        self.cqltype = cqltype
+
+    cpdef serialize(self, value, int protocol_version):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, self.cqltype)
+
+
+cdef inline bint _as_int64(value, int64_t *out):
+    """
+    Convert exact ints which fit in 64 bits; everything else is left
+    to the cqltype so it can raise the usual errors.
+    """
+    if type(value) is not int:
+        return False
+    try:
+        out[0] = value
+    except OverflowError:
+        return False
+    return True
+
+
+cdef class SerBytesType(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        if type(value) is bytes:
+            return value
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerBooleanType(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        if value is True:
+            return b'\x01'
+        if value is False:
+            return b'\x00'
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerByteType(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        cdef int64_t val
+        if _as_int64(value, &val) and INT8_MIN <= val <= INT8_MAX:
+            return pack_num(<int8_t> val)
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerShortType(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        cdef int64_t val
+        if _as_int64(value, &val) and INT16_MIN <= val <= INT16_MAX:
+            return pack_num(<int16_t> val)
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerInt32Type(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        cdef int64_t val
+        if _as_int64(value, &val) and INT32_MIN <= val <= INT32_MAX:
+            return pack_num(<int32_t> val)
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerLongType(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        cdef int64_t val
+        if _as_int64(value, &val):
+            return pack_num(val)
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerCounterColumnType(SerLongType):
+    pass
+
+
+cdef class SerDoubleType(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        if type(value) is float:
+            return pack_num(<double> value)
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerFloatType(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        cdef double val
+        if type(value) is float:
+            val = value
+            # out of range values overflow in struct.pack; let it raise
+            if -FLT_MAX <= val <= FLT_MAX or isinf(val) or isnan(val):
+                return pack_num(<float> val)
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerAsciiType(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        if PY3 and type(value) is unicode:
+            return PyUnicode_AsASCIIString(value)
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerUTF8Type(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        if type(value) is unicode:
+            return PyUnicode_AsUTF8String(value)
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerVarcharType(SerUTF8Type):
+    pass
+
+
+cdef inline int64_t _days_from_civil(int64_t y, int64_t m, int64_t d):
+    # days since 1970-01-01 in the proleptic Gregorian calendar
+    # (only called with datetime years, which are always positive)
+    y -= m <= 2
+    cdef int64_t era = y // 400
+    cdef int64_t yoe = y - era * 400
+    cdef int64_t doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    cdef int64_t doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+cdef class SerDateType(Serializer):
+    cpdef serialize(self, value, int protocol_version):
+        cdef int64_t seconds
+        cdef double timestamp
+        if PyDateTime_CheckExact(value) and datetime_tzinfo(value) is None:
+            seconds = (_days_from_civil(datetime_year(value), datetime_month(value), datetime_day(value)) * DAY_IN_SECONDS +
+                       datetime_hour(value) * 3600 + datetime_minute(value) * 60 + datetime_second(value))
+            # same floating point steps as DateType.serialize
+            timestamp = seconds * 1e3 + datetime_microsecond(value) / 1e3
+            return pack_num(<int64_t> timestamp)
+        return self.cqltype.serialize(value, protocol_version)
+
+
+cdef class SerTimestampType(SerDateType):
+    pass
+
+
+#--------------------------------------------------------------------------
+# Parameterized types
+
+cdef class _SerSingleParamType(Serializer):
+    cdef Serializer subtype
+
+    def __init__(self, cqltype):
+        super(_SerSingleParamType, self).__init__(cqltype)
+        self.subtype = find_serializer(cqltype.subtypes[0])
+
+
+cdef class SerListType(_SerSingleParamType):
+    cpdef serialize(self, items, int protocol_version):
+        if protocol_version < 3:
+            return self.cqltype.serialize(items, protocol_version)
+        if isinstance(items, _string_types):
+            raise TypeError("Received a string for a type that expects a sequence")
+
+        cdef list parts = [pack_num(<int32_t> len(items))]
+        for item in items:
+            itembytes = to_binary(self.subtype, item, protocol_version)
+            parts.append(pack_num(<int32_t> len(itembytes)))
+            parts.append(itembytes)
+        return b''.join(parts)
+
+
+cdef class SerSetType(SerListType):
+    pass
+
+
+cdef class SerMapType(Serializer):
+    cdef Serializer key_type
+    cdef Serializer value_type
+
+    def __init__(self, cqltype):
+        super(SerMapType, self).__init__(cqltype)
+        self.key_type = find_serializer(cqltype.subtypes[0])
+        self.value_type = find_serializer(cqltype.subtypes[1])
+
+    cpdef serialize(self, themap, int protocol_version):
+        if protocol_version < 3:
+            return self.cqltype.serialize(themap, protocol_version)
+
+        cdef list parts = [pack_num(<int32_t> len(themap))]
+        try:
+            items = _iteritems(themap)
+        except AttributeError:
+            raise TypeError("Got a non-map object for a map value")
+        for key, val in items:
+            keybytes = to_binary(self.key_type, key, protocol_version)
+            valbytes = to_binary(self.value_type, val, protocol_version)
+            parts.append(pack_num(<int32_t> len(keybytes)))
+            parts.append(keybytes)
+            parts.append(pack_num(<int32_t> len(valbytes)))
+            parts.append(valbytes)
+        return b''.join(parts)
+
+
+cdef class SerTupleType(Serializer):
+    cdef list subtypes
+
+    def __init__(self, cqltype):
+        super(SerTupleType, self).__init__(cqltype)
+        self.subtypes = make_serializers(cqltype.subtypes)
+
+    cpdef serialize(self, val, int protocol_version):
+        cdef Py_ssize_t num_subtypes = len(self.subtypes)
+        if len(val) > num_subtypes:
+            raise ValueError("Expected %d items in a tuple, but got %d: %s" %
+                             (num_subtypes, len(val), val))
+
+        # collections inside tuples are always encoded with at least the
+        # version 3 format
+        cdef int proto_version = max(3, protocol_version)
+        cdef list parts = []
+        for item, subtype in zip(val, self.subtypes):
+            if item is not None:
+                packed_item = (<Serializer> subtype).serialize(item, proto_version)
+                parts.append(pack_num(<int32_t> len(packed_item)))
+                parts.append(packed_item)
+            else:
+                parts.append(pack_num(<int32_t> -1))
+        return b''.join(parts)
+
+
+cdef class SerUserType(SerTupleType):
+    cdef tuple fieldnames
+
+    def __init__(self, cqltype):
+        super(SerUserType, self).__init__(cqltype)
+        self.fieldnames = tuple(cqltype.fieldnames)
+
+    cpdef serialize(self, val, int protocol_version):
+        cdef int proto_version = max(3, protocol_version)
+        cdef list parts = []
+        cdef Py_ssize_t i
+        for i, (fieldname, subtype) in enumerate(zip(self.fieldnames, self.subtypes)):
+            # first treat as a tuple, else by custom type
+            try:
+                item = val[i]
+            except TypeError:
+                item = getattr(val, fieldname)
+
+            if item is not None:
+                packed_item = (<Serializer> subtype).serialize(item, proto_version)
+                parts.append(pack_num(<int32_t> len(packed_item)))
+                parts.append(packed_item)
+            else:
+                parts.append(pack_num(<int32_t> -1))
+        return b''.join(parts)
+
+
+cdef class SerReversedType(_SerSingleParamType):
+    cpdef serialize(self, val, int protocol_version):
+        return to_binary(self.subtype, val, protocol_version)
+
+
+cdef class SerFrozenType(_SerSingleParamType):
+    cpdef serialize(self, val, int protocol_version):
+        return to_binary(self.subtype, val, protocol_version)
+
+#--------------------------------------------------------------------------
+# Generic serialization
+
+cdef class GenericSerializer(Serializer):
+    """
+    Wrap a generic datatype for serialization
+    """
+
+    cpdef serialize(self, value, int protocol_version):
+        return self.cqltype.serialize(value, protocol_version)
+
+#--------------------------------------------------------------------------
+# Helper utilities
+
+def make_serializers(cqltypes):
+    """Create a list of Serializers for each given cqltype in cqltypes"""
+    return [find_serializer(ct) for ct in cqltypes]
+
+
+cdef dict classes = globals()
+
+cpdef Serializer find_serializer(cqltype):
+    """Find a serializer for a cqltype"""
+    name = 'Ser' + cqltype.__name__
+
+    if issubclass(cqltype, cqltypes._ParameterizedType) and not cqltype.subtypes:
+        # let the cqltype report that it can't serialize unparameterized values
+        cls = GenericSerializer
+    elif name in classes and getattr(cqltypes, cqltype.__name__, None) is cqltype:
+        # only for the builtin types; subclasses may override serialize
+        cls = classes[name]
+    elif issubclass(cqltype, cqltypes.ListType):
+        cls = SerListType
+    elif issubclass(cqltype, cqltypes.SetType):
+        cls = SerSetType
+    elif issubclass(cqltype, cqltypes.MapType):
+        cls = SerMapType
+    elif issubclass(cqltype, cqltypes.UserType):
+        # UserType is a subclass of TupleType, so should precede it
+        cls = SerUserType
+    elif issubclass(cqltype, cqltypes.TupleType):
+        cls = SerTupleType
+    elif issubclass(cqltype, cqltypes.ReversedType):
+        cls = SerReversedType
+    elif issubclass(cqltype, cqltypes.FrozenType):
+        cls = SerFrozenType
+    else:
+        cls = GenericSerializer
+
+    return cls(cqltype)
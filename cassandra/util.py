@@ -1232,3 +1232,98 @@ class Duration(object):
             abs(self.days),
             abs(self.nanoseconds)
         )
+
+
+class LatencyHistogram(object):
+    """
+    A histogram of latencies in log-linear buckets, similar to HdrHistogram.
+
+    Latencies are recorded in microseconds, in buckets whose width is at
+    most 1/16th of their lower bound, so percentiles are accurate to within
+    about 6%. Adding a value is constant time and the memory used grows with
+    the logarithm of the largest value.
+
+    This is not thread-safe; concurrent updates may lose values.
+    """
+
+    _sub_bits = 4
+
+    count = 0
+    """
+    The number of values recorded.
+    """
+
+    total = 0.0
+    """
+    The sum of the values recorded, in seconds.
+    """
+
+    def __init__(self):
+        self._counts = []
+
+    def add(self, latency):
+        """
+        Records a `latency` in seconds.
+        """
+        index = self._index(int(latency * 1e6))
+        counts = self._counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += latency
+
+    def merge(self, other):
+        """
+        Adds the values recorded by `other` to this histogram.
+        """
+        counts = self._counts
+        other_counts = other._counts
+        if len(other_counts) > len(counts):
+            counts.extend([0] * (len(other_counts) - len(counts)))
+        for i, n in enumerate(other_counts):
+            if n:
+                counts[i] += n
+        self.count += other.count
+        self.total += other.total
+
+    def clear(self):
+        self._counts = []
+        self.count = 0
+        self.total = 0.0
+
+    def mean(self):
+        """
+        Returns the mean of the recorded values in seconds, or :const:`None`
+        if nothing was recorded.
+        """
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percentile):
+        """
+        Returns the latency in seconds below which `percentile` percent of
+        the recorded values fall, or :const:`None` if nothing was recorded.
+        """
+        if not self.count:
+            return None
+        target = max(1, int(self.count * percentile / 100.0 + 0.5))
+        seen = 0
+        for index, n in enumerate(self._counts):
+            seen += n
+            if seen >= target:
+                return self._highest_value(index) / 1e6
+        return self._highest_value(len(self._counts) - 1) / 1e6
+
+    def _index(self, value):
+        sub_bits = self._sub_bits
+        if value < (2 << sub_bits):
+            return max(value, 0)
+        shift = value.bit_length() - sub_bits - 1
+        return (shift << sub_bits) + (value >> shift)
+
+    def _highest_value(self, index):
+        sub_bits = self._sub_bits
+        if index < (2 << sub_bits):
+            return index
+        shift = (index >> sub_bits) - 1
+        return ((index - (shift << sub_bits)) << shift) + (1 << shift) - 1
@@ -162,8 +162,7 @@ class HeartbeatTest(unittest.TestCase):
                     if conn._connections is not None and len(conn._connections) > 0:
                         connections.append(conn._connections)
                 else:
-                    if conn._connection is not None:
-                        connections.append(conn._connection)
+                    connections.extend(conn.get_connections())
         return connections
 
     def wait_for_connections(self, host, cluster):
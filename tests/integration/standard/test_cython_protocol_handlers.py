@@ -81,6 +81,36 @@ class CythonProtocolHandlerTest(unittest.TestCase):
 
         cluster.shutdown()
 
+    @notprotocolv1
+    @cythontest
+    def test_decode_pool_results_paged(self):
+        """
+        Test pages decoded by a DecodeProcessPool created once the cluster is connected
+        """
+        from cassandra.decode_pool import DecodeProcessPool, shared_memory
+        if shared_memory is None:
+            raise unittest.SkipTest("multiprocessing.shared_memory is not available")
+
+        cluster = Cluster(protocol_version=PROTOCOL_VERSION)
+        session = cluster.connect(keyspace="testspace")
+        # the driver's threads are running when the workers are started
+        pool = DecodeProcessPool(processes=2, min_size=0)
+        try:
+            session.row_factory = tuple_factory
+            session.client_protocol_handler = pool.protocol_handler
+            session.default_fetch_size = 2
+
+            results = session.execute("SELECT * FROM test_table")
+            self.assertTrue(results.has_more_pages)
+            rows = []
+            for batch in results:
+                self.assertLessEqual(batch.num_rows, session.default_fetch_size)
+                rows.extend(zip(*[batch[name].to_pylist() for name in batch.column_names]))
+            self.assertEqual(verify_iterator_data(self.assertEqual, rows), self.N_ITEMS)
+        finally:
+            pool.shutdown()
+            cluster.shutdown()
+
     @notprotocolv1
     @numpytest
     def test_numpy_parser(self):
@@ -0,0 +1,139 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import struct
+import uuid
+from decimal import Decimal
+
+from tests.unit.cython.utils import cyimport, cythontest
+columnar_parser = cyimport('cassandra.columnar_parser')
+bytesio = cyimport('cassandra.bytesio')
+parsing = cyimport('cassandra.parsing')
+deserializers = cyimport('cassandra.deserializers')
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest  # noqa
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from cassandra import cqltypes, util
+from cassandra.marshal import int32_pack
+
+
+def unpack(fmt, buf):
+    return list(struct.unpack('=%d%s' % (len(buf) // struct.calcsize(fmt), fmt), bytes(buf)))
+
+
+class ColumnarParserTest(unittest.TestCase):
+
+    coltypes = [cqltypes.Int32Type, cqltypes.LongType, cqltypes.DoubleType, cqltypes.BooleanType,
+                cqltypes.UTF8Type, cqltypes.BytesType, cqltypes.UUIDType, cqltypes.DateType,
+                cqltypes.SimpleDateType, cqltypes.DecimalType,
+                cqltypes.lookup_casstype('ListType(Int32Type)')]
+    colnames = ['i', 'l', 'd', 'b', 't', 'x', 'u', 'ts', 'dt', 'dec', 'lst']
+    rows = [
+        (1, 2 ** 40, 1.5, True, u'abc', b'\x00\x01', uuid.uuid4(),
+         datetime.datetime(2020, 2, 29, 13, 1, 2, 123000), util.Date(18000), Decimal('-12.345'), [1, 2]),
+        (None, None, None, None, None, None, None, None, None, None, None),
+        (-1, -2 ** 63, float('-inf'), False, u'\xe9\u4e2d', b'', uuid.uuid1(),
+         datetime.datetime(1960, 1, 1), util.Date(-5), Decimal('1E+10'), []),
+        (2 ** 31 - 1, 0, 0.0, True, u'', b'\xff' * 300, None,
+         None, None, Decimal('0.000001'), [3]),
+    ]
+
+    def parse(self, rows, protocol_version=4):
+        cells = []
+        for row in rows:
+            for coltype, value in zip(self.coltypes, row):
+                if value is None:
+                    cells.append(int32_pack(-1))
+                else:
+                    packed = coltype.serialize(value, protocol_version)
+                    cells.append(int32_pack(len(packed)) + packed)
+        reader = bytesio.BytesIOReader(int32_pack(len(rows)) + b''.join(cells))
+        desc = parsing.ParseDesc(self.colnames, self.coltypes,
+                                 deserializers.make_deserializers(self.coltypes), protocol_version)
+        return columnar_parser.ColumnarParser().parse_rows(reader, desc)
+
+    @cythontest
+    def test_parse_rows(self):
+        batch = self.parse(self.rows)
+        self.assertEqual(batch.num_rows, 4)
+        self.assertEqual(list(batch), self.colnames)
+        self.assertEqual(batch.to_pydict(), dict(
+            (name, [row[i] for row in self.rows]) for i, name in enumerate(self.colnames)))
+
+        self.assertEqual(batch['i'][-1], 2 ** 31 - 1)
+        self.assertRaises(IndexError, batch['i'].__getitem__, 4)
+
+    @cythontest
+    def test_buffers(self):
+        batch = self.parse(self.rows)
+
+        ints = batch['i']
+        self.assertEqual(ints.layout, 'fixed')
+        self.assertEqual(ints.null_count, 1)
+        self.assertEqual(bytes(ints.validity), b'\x0d')
+        self.assertEqual(unpack('i', ints.data), [1, 0, -1, 2 ** 31 - 1])
+        self.assertEqual(unpack('q', batch['ts'].data),
+                         [1582981262123, 0, -315619200000, 0])
+        self.assertEqual(unpack('i', batch['dt'].data), [18000, 0, -5, 0])
+        self.assertEqual(bytes(batch['b'].data), b'\x09')
+        self.assertEqual(bytes(batch['u'].data[:16]), self.rows[0][6].bytes)
+
+        text = batch['t']
+        self.assertEqual(text.layout, 'variable')
+        self.assertEqual(unpack('i', text.offsets), [0, 3, 3, 8, 8])
+        self.assertEqual(bytes(text.data), u'abc\xe9\u4e2d'.encode('utf8'))
+        self.assertEqual(bytes(text.validity), b'\x0d')
+
+        decimals = batch['dec']
+        self.assertEqual(decimals.layout, 'decimal')
+        self.assertEqual(unpack('i', decimals.scales), [3, 0, -10, 6])
+
+        self.assertEqual(batch['lst'].layout, 'object')
+        self.assertEqual(batch['lst'].null_count, 1)
+        self.assertEqual(batch['lst'].values, [[1, 2], None, [], [3]])
+
+    @cythontest
+    def test_no_rows(self):
+        batch = self.parse([])
+        self.assertEqual(batch.num_rows, 0)
+        self.assertEqual(batch.to_pydict(), dict((name, []) for name in self.colnames))
+
+    @cythontest
+    def test_invalid_size(self):
+        reader = bytesio.BytesIOReader(int32_pack(1) + int32_pack(2) + b'\x00\x01')
+        desc = parsing.ParseDesc(['i'], [cqltypes.Int32Type],
+                                 deserializers.make_deserializers([cqltypes.Int32Type]), 4)
+        self.assertRaises(ValueError, columnar_parser.ColumnarParser().parse_rows, reader, desc)
+
+    @cythontest
+    @unittest.skipIf(pyarrow is None, "pyarrow is not available")
+    def test_to_arrow(self):
+        record_batch = self.parse(self.rows).to_arrow()
+        self.assertEqual(record_batch.num_rows, 4)
+        self.assertEqual(record_batch.column(0).to_pylist(), [1, None, -1, 2 ** 31 - 1])
+        self.assertEqual(record_batch.column(4).to_pylist(), [u'abc', None, u'\xe9\u4e2d', u''])
+        self.assertEqual(record_batch.column(7).to_pylist(),
+                         [self.rows[0][7], None, self.rows[2][7], None])
+        self.assertEqual(record_batch.column(8).to_pylist(),
+                         [datetime.date(2019, 4, 14), None, datetime.date(1969, 12, 27), None])
+        self.assertEqual(record_batch.column(9).to_pylist(), [row[9] for row in self.rows])
@@ -0,0 +1,126 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from io import BytesIO
+
+from tests.unit.cython.utils import cyimport, cythontest
+columnar_parser = cyimport('cassandra.columnar_parser')
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest  # noqa
+
+from concurrent.futures import Future
+
+from cassandra import cqltypes
+from cassandra.decode_pool import DecodeProcessPool, shared_memory
+from cassandra.marshal import int32_pack
+from cassandra.protocol import (ResultMessage, RESULT_KIND_ROWS, write_int,
+                                write_short, write_string, write_value)
+
+
+@unittest.skipIf(shared_memory is None, "multiprocessing.shared_memory is not available")
+class DecodeProcessPoolTest(unittest.TestCase):
+
+    coltypes = [cqltypes.Int32Type, cqltypes.UTF8Type, cqltypes.lookup_casstype('ListType(Int32Type)')]
+    colnames = ['i', 't', 'lst']
+    rows = [(1, u'abc', [1, 2]),
+            (None, None, None),
+            (-1, u'', [])]
+
+    @classmethod
+    def setUpClass(cls):
+        if columnar_parser is not None:
+            cls.pool = DecodeProcessPool(processes=1, min_size=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        if columnar_parser is not None:
+            cls.pool.shutdown()
+
+    def encode_rows(self, rows):
+        body = BytesIO()
+        for row in rows:
+            for coltype, value in zip(self.coltypes, row):
+                if value is None:
+                    body.write(int32_pack(-1))
+                else:
+                    packed = coltype.serialize(value, 4)
+                    body.write(int32_pack(len(packed)) + packed)
+        body.seek(0)
+        return body
+
+    def check_batch(self, batch):
+        self.assertIsInstance(batch, columnar_parser.ColumnBatch)
+        self.assertEqual(batch.num_rows, 3)
+        self.assertEqual(batch.to_pydict(), dict(
+            (name, [row[i] for row in self.rows]) for i, name in enumerate(self.colnames)))
+        self.assertEqual(batch['i'].layout, 'fixed')
+        self.assertIs(batch['i'].cqltype, cqltypes.Int32Type)
+        self.assertEqual(batch['lst'].layout, 'object')
+        self.assertEqual(batch['lst'].null_count, 1)
+
+    @cythontest
+    def test_decode_in_worker(self):
+        result = self.pool.decode_rows(self.encode_rows(self.rows), 3, self.colnames, self.coltypes, 4)
+        self.assertIsInstance(result, Future)
+        self.check_batch(result.result(timeout=30))
+
+    @cythontest
+    def test_workers_started(self):
+        # the workers are not forked from the driver, and are all running
+        # before any page is submitted from the event loop thread
+        pool = DecodeProcessPool(processes=2)
+        try:
+            self.assertNotEqual(pool._executor._mp_context.get_start_method(), 'fork')
+            self.assertEqual(len(pool._executor._processes), 2)
+        finally:
+            pool.shutdown()
+
+    @cythontest
+    def test_decode_inline(self):
+        self.pool.min_size = 1 << 20
+        try:
+            batch = self.pool.decode_rows(self.encode_rows(self.rows), 3, self.colnames, self.coltypes, 4)
+        finally:
+            self.pool.min_size = 0
+        self.check_batch(batch)
+
+    @cythontest
+    def test_decode_error(self):
+        body = BytesIO(int32_pack(2) + b'\x00\x01')
+        result = self.pool.decode_rows(body, 1, ['i'], [cqltypes.Int32Type], 4)
+        self.assertRaises(ValueError, result.result, 30)
+
+    @cythontest
+    def test_protocol_handler(self):
+        body = BytesIO()
+        write_int(body, RESULT_KIND_ROWS)
+        write_int(body, 0x0001)  # global table spec
+        write_int(body, 2)
+        write_string(body, 'ks')
+        write_string(body, 'tbl')
+        for name, type_code in (('i', 0x0009), ('t', 0x000D)):
+            write_string(body, name)
+            write_short(body, type_code)
+        write_int(body, 1)
+        write_value(body, int32_pack(7))
+        write_value(body, b'x')
+
+        message = self.pool.protocol_handler.decode_message(4, {}, 0, 0, ResultMessage.opcode,
+                                                            body.getvalue(), None, None)
+        colnames, rows = message.results
+        self.assertEqual(colnames, ['i', 't'])
+        self.assertEqual(rows.result(timeout=30).to_pydict(), {'i': [7], 't': [u'x']})
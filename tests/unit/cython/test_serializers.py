@@ -0,0 +1,93 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import struct
+import uuid
+
+from tests.unit.cython.utils import cyimport, cythontest
+serializers = cyimport('cassandra.serializers')
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest  # noqa
+
+from cassandra import cqltypes
+from cassandra.util import sortedset
+
+
+class SerializersTest(unittest.TestCase):
+    """Compare the Cython serializers with the cqltypes they wrap"""
+
+    udt = cqltypes.UserType.make_udt_class('ks', 'test_serializers_udt', ('a', 'b'),
+                                           (cqltypes.Int32Type, cqltypes.UTF8Type))
+
+    def _check(self, cqltype, values):
+        serializer = serializers.find_serializer(cqltype)
+        for protocol_version in (2, 3, 4):
+            for value in values:
+                try:
+                    expected = cqltype.serialize(value, protocol_version)
+                except (AttributeError, TypeError, ValueError, OverflowError, struct.error) as exc:
+                    self.assertRaises(type(exc), serializer.serialize, value, protocol_version)
+                else:
+                    self.assertEqual(serializer.serialize(value, protocol_version), expected)
+
+    @cythontest
+    def test_scalars(self):
+        self._check(cqltypes.Int32Type, [0, -1, 2 ** 31 - 1, -2 ** 31, 2 ** 31, 2 ** 70, True, 1.5, 'x'])
+        self._check(cqltypes.LongType, [0, 2 ** 63 - 1, -2 ** 63, 2 ** 63, 1.0])
+        self._check(cqltypes.ShortType, [0, 2 ** 15 - 1, -2 ** 15, 2 ** 15])
+        self._check(cqltypes.ByteType, [0, 127, -128, 128])
+        self._check(cqltypes.BooleanType, [True, False, 1, 0])
+        self._check(cqltypes.DoubleType, [0.0, -1.5, 1e308, float('inf'), 3])
+        self._check(cqltypes.FloatType, [1.1, 3.4e38, 1e300, float('-inf'), 2])
+        self._check(cqltypes.UTF8Type, [u'', u'abc', u'\xe9\u4e2d', 5])
+        self._check(cqltypes.AsciiType, [u'abc'])
+        self._check(cqltypes.BytesType, [b'abc', bytearray(b'xy')])
+        self._check(cqltypes.UUIDType, [uuid.uuid4(), 'x'])
+
+    @cythontest
+    def test_timestamps(self):
+        self._check(cqltypes.DateType, [
+            datetime.datetime(2020, 2, 29, 13, 1, 2, 123456),
+            datetime.datetime(1, 1, 1),
+            datetime.datetime(9999, 12, 31, 23, 59, 59, 999999),
+            datetime.datetime(1969, 12, 31, 23, 59, 59, 500),
+            datetime.date(2020, 1, 1),
+            1234567,
+            'x'])
+
+    @cythontest
+    def test_collections(self):
+        self._check(cqltypes.lookup_casstype('ListType(Int32Type)'), [[1, 2, None], (), 'str', 5])
+        self._check(cqltypes.lookup_casstype('SetType(UTF8Type)'), [sortedset([u'a', u'b'])])
+        self._check(cqltypes.lookup_casstype('MapType(UTF8Type, ListType(Int32Type))'),
+                    [{u'a': [1], u'b': None}, {}, [1, 2]])
+        self._check(cqltypes.lookup_casstype('FrozenType(ListType(Int32Type))'), [[1, 2]])
+
+    @cythontest
+    def test_tuples_and_udts(self):
+        self._check(cqltypes.TupleType.apply_parameters([cqltypes.Int32Type, cqltypes.UTF8Type]),
+                    [(1, u'a'), (None, u'b'), (1,), (1, u'a', 3)])
+        self._check(self.udt, [(1, u'a'), (1, None), self.udt.tuple_type(3, u'x')])
+
+    @cythontest
+    def test_find_serializer(self):
+        self.assertIsInstance(serializers.find_serializer(cqltypes.Int32Type), serializers.SerInt32Type)
+        self.assertIsInstance(serializers.find_serializer(self.udt), serializers.SerUserType)
+        # unparameterized and unspecialized types defer to the cqltype
+        self.assertIsInstance(serializers.find_serializer(cqltypes.ListType), serializers.GenericSerializer)
+        self.assertIsInstance(serializers.find_serializer(cqltypes.TimeUUIDType), serializers.GenericSerializer)
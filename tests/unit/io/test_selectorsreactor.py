@@ -0,0 +1,192 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest # noqa
+
+from mock import patch, Mock
+import socket
+
+from tests import is_monkey_patched
+from tests.unit.io.utils import ReactorTestMixin, TimerTestMixin, noop_if_monkey_patched
+
+try:
+    import selectors
+    from cassandra.io.selectorsreactor import SelectorsConnection, SelectorsLoop
+except ImportError:
+    SelectorsConnection = None  # noqa
+
+
+class SelectorsConnectionTest(ReactorTestMixin, unittest.TestCase):
+
+    connection_class = SelectorsConnection
+    socket_attr_name = '_socket'
+
+    def setUp(self):
+        if is_monkey_patched():
+            raise unittest.SkipTest("Can't test selectors with monkey patching")
+        if SelectorsConnection is None:
+            raise unittest.SkipTest('selectors is not available')
+        SelectorsConnection.initialize_reactor()
+
+        # we patch here rather than as a decorator so that the Mixin can avoid
+        # specifying patch args to test methods
+        patchers = [patch(obj) for obj in
+                    ('socket.socket',
+                     'cassandra.io.selectorsreactor.SelectorsLoop.maybe_start')]
+        for p in patchers:
+            self.addCleanup(p.stop)
+        for p in patchers:
+            p.start()
+
+    def test_push_requests_write_once(self):
+        c = self.make_connection()
+        c.handle_write()
+        loop = c._selectorsloop
+        loop._write_requests.clear()
+
+        c.push(b'a')
+        c.push(b'b')
+        self.assertEqual(list(loop._write_requests), [c])
+
+        c.handle_write()
+        self.assertFalse(c._writing)
+        c.push(b'c')
+        self.assertEqual(list(loop._write_requests), [c, c])
+        loop._write_requests.clear()
+
+
+class SelectorsEventLoopsTest(unittest.TestCase):
+
+    def setUp(self):
+        if is_monkey_patched():
+            raise unittest.SkipTest("Can't test selectors with monkey patching")
+        if SelectorsConnection is None:
+            raise unittest.SkipTest('selectors is not available')
+
+        self.addCleanup(SelectorsConnection.initialize_reactor)
+        self.addCleanup(SelectorsConnection.handle_fork)
+        SelectorsConnection.handle_fork()
+        with patch.object(SelectorsConnection, 'event_loops', 2):
+            SelectorsConnection.initialize_reactor()
+
+        patchers = [patch(obj) for obj in
+                    ('socket.socket',
+                     'cassandra.io.selectorsreactor.SelectorsLoop.maybe_start')]
+        for p in patchers:
+            self.addCleanup(p.stop)
+        for p in patchers:
+            p.start()
+
+    def test_event_loops(self):
+        loops = SelectorsConnection._selectorsloops
+        self.assertEqual([loop._name for loop in loops],
+                         ['cassandra_driver_event_loop_0', 'cassandra_driver_event_loop_1'])
+
+        # connections and timers are spread over the loops in turn
+        connections = [SelectorsConnection('1.2.3.4', cql_version='3.0.1', connect_timeout=5)
+                       for _ in range(4)]
+        self.assertEqual(set(c._selectorsloop for c in connections), set(loops))
+        self.assertIsNot(connections[0]._selectorsloop, connections[1]._selectorsloop)
+
+        timers = [SelectorsConnection.create_timer(10, Mock()) for _ in range(2)]
+        for loop in loops:
+            self.assertEqual(loop._timers._timer_count, 1)
+        for timer in timers:
+            timer.cancel()
+
+
+class SelectorsLoopTest(unittest.TestCase):
+
+    def setUp(self):
+        if is_monkey_patched():
+            raise unittest.SkipTest("Can't test selectors with monkey patching")
+        if SelectorsConnection is None:
+            raise unittest.SkipTest('selectors is not available')
+
+    def test_write_interest(self):
+        loop = SelectorsLoop()
+        for resource in (loop._selector, loop._waker, loop._wakee):
+            self.addCleanup(resource.close)
+        sock, other = socket.socketpair()
+        self.addCleanup(other.close)
+        conn = Mock(_socket=sock, is_closed=False, _events=0)
+
+        loop.connection_created(conn)
+        loop._apply_changes()
+        self.assertEqual(loop._selector.get_key(sock).events, selectors.EVENT_READ)
+
+        # only watched for writing while something is queued
+        loop.want_write(conn)
+        loop._apply_changes()
+        self.assertEqual(loop._selector.get_key(sock).events, selectors.EVENT_READ | selectors.EVENT_WRITE)
+        events = loop._selector.select(0)
+        self.assertEqual([(key.data, mask) for key, mask in events if key.data is not None],
+                         [(conn, selectors.EVENT_WRITE)])
+
+        loop.set_events(conn, selectors.EVENT_READ)
+        self.assertEqual(loop._selector.get_key(sock).events, selectors.EVENT_READ)
+
+        # wakeups are coalesced until the loop drains them
+        self.assertTrue(loop._notified)
+        loop._drain_wakeups()
+        self.assertFalse(loop._notified)
+
+        conn.is_closed = True
+        sock.close()
+        loop.connection_destroyed(conn)
+        loop._apply_changes()
+        self.assertEqual([key.data for key in loop._selector.get_map().values()], [None])
+
+
+class SelectorsTimerPatcher(unittest.TestCase):
+
+    @classmethod
+    @noop_if_monkey_patched
+    def setUpClass(cls):
+        if SelectorsConnection is None:
+            raise unittest.SkipTest('selectors is not available')
+        SelectorsConnection.initialize_reactor()
+        cls.patchers = [
+            patch('socket.socket', spec=socket.socket),
+        ]
+        for p in cls.patchers:
+            p.start()
+
+    @classmethod
+    @noop_if_monkey_patched
+    def tearDownClass(cls):
+        for p in cls.patchers:
+            try:
+                p.stop()
+            except:
+                pass
+
+
+class SelectorsTimerTest(TimerTestMixin, SelectorsTimerPatcher):
+    connection_class = SelectorsConnection
+
+    @property
+    def create_timer(self):
+        return self.connection.create_timer
+
+    @property
+    def _timers(self):
+        return self.connection._selectorsloop._timers
+
+    def setUp(self):
+        if is_monkey_patched():
+            raise unittest.SkipTest("Can't test selectors with monkey patching.")
+        super(SelectorsTimerTest, self).setUp()
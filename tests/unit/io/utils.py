@@ -26,7 +26,6 @@ from mock import Mock
 
 import errno
 import math
-import os
 from socket import error as socket_error
 
 try:
@@ -176,8 +175,8 @@ class TimerTestMixin(object):
         time.sleep(.2)
         timer_manager = self._timers
         # Assert that the cancellation was honored
-        self.assertFalse(timer_manager._queue)
-        self.assertFalse(timer_manager._new_timers)
+        self.assertEqual(timer_manager._timer_count, 0)
+        self.assertIsNone(timer._slot)
         self.assertFalse(callback.was_invoked())
 
 
@@ -204,6 +203,7 @@ class ReactorTestMixin(object):
         c = self.connection_class('1.2.3.4', cql_version='3.0.1', connect_timeout=5)
         mocket = Mock()
         mocket.send.side_effect = lambda x: len(x)
+        mocket.sendmsg.side_effect = lambda buffers: sum(len(b) for b in buffers)
         self.set_socket(c, mocket)
         return c
 
@@ -268,14 +268,12 @@ class ReactorTestMixin(object):
         c.handle_read(*self.null_handle_function_args)
         self.assertEqual(c._current_frame.end_pos, 20000 + len(header))
         # the EAGAIN prevents it from reading the last 100 bytes
-        c._iobuf.seek(0, os.SEEK_END)
-        pos = c._iobuf.tell()
+        pos = len(c._iobuf)
         self.assertEqual(pos, 4096 + 4096)
 
         # now tell it to read the last 100 bytes
         c.handle_read(*self.null_handle_function_args)
-        c._iobuf.seek(0, os.SEEK_END)
-        pos = c._iobuf.tell()
+        pos = len(c._iobuf)
         self.assertEqual(pos, 4096 + 4096 + 100)
 
     def test_protocol_error(self):
@@ -366,6 +364,53 @@ class ReactorTestMixin(object):
         self.assertEqual(last_write_size,
                          len(self.get_socket(c).send.call_args[0][0]))
 
+    def test_coalesced_write(self):
+        c = self.make_connection()
+        # flush the OptionsMessage
+        c.handle_write(*self.null_handle_function_args)
+
+        sock = self.get_socket(c)
+        send_count = sock.send.call_count
+
+        frames = [six.b('a') * 10, six.b('b') * 20, six.b('c') * 30]
+        for frame in frames:
+            c.push(frame)
+        c.handle_write(*self.null_handle_function_args)
+
+        if c._gather_writes:
+            sock.sendmsg.assert_called_once_with(frames)
+            self.assertEqual(send_count, sock.send.call_count)
+        else:
+            sock.send.assert_called_with(binary_type().join(frames))
+            self.assertEqual(send_count + 1, sock.send.call_count)
+        self.assertFalse(c.deque)
+
+    def test_partial_coalesced_write(self):
+        c = self.make_connection()
+        # flush the OptionsMessage
+        c.handle_write(*self.null_handle_function_args)
+
+        written = []
+        limits = [15]
+
+        def accept(data):
+            data = memoryview(data)[:limits.pop() if limits else None].tobytes()
+            written.append(data)
+            return len(data)
+
+        sock = self.get_socket(c)
+        sock.send.side_effect = accept
+        sock.sendmsg.side_effect = lambda buffers: accept(binary_type().join(buffers))
+
+        frames = [six.b('a') * 10, six.b('b') * 20, six.b('c') * 30]
+        for frame in frames:
+            c.push(frame)
+        c.handle_write(*self.null_handle_function_args)
+
+        self.assertEqual(written[0], six.b('a') * 10 + six.b('b') * 5)
+        self.assertEqual(binary_type().join(written), binary_type().join(frames))
+        self.assertFalse(c.deque)
+
     def test_socket_error_on_read(self):
         c = self.make_connection()
 
@@ -25,7 +25,7 @@ from cassandra import ConsistencyLevel, DriverException, Timeout, Unavailable, R
 from cassandra.cluster import _Scheduler, Session, Cluster, _NOT_SET, default_lbp_factory, \
     ExecutionProfile, _ConfigMode, EXEC_PROFILE_DEFAULT, NoHostAvailable
 from cassandra.policies import HostDistance, RetryPolicy, RoundRobinPolicy, \
-    DowngradingConsistencyRetryPolicy, SimpleConvictionPolicy
+    DowngradingConsistencyRetryPolicy, SimpleConvictionPolicy, PercentileSpeculativeExecutionPolicy
 from cassandra.query import SimpleStatement, named_tuple_factory, tuple_factory
 from cassandra.pool import Host
 from tests.unit.utils import mock_session_pools
@@ -368,6 +368,19 @@ class ExecutionProfileTest(unittest.TestCase):
         # cannot add a profile added dynamically
         self.assertRaises(ValueError, cluster.add_execution_profile, 'two', ExecutionProfile())
 
+    def test_speculative_execution_latency_tracker(self):
+        policy = PercentileSpeculativeExecutionPolicy()
+        cluster = Cluster(execution_profiles={EXEC_PROFILE_DEFAULT: ExecutionProfile(speculative_execution_policy=policy)})
+        cluster.profile_manager.populate(cluster, [])
+        self.assertEqual(cluster._latency_trackers, (policy,))
+
+        # registered once, even when used by several profiles
+        cluster.add_execution_profile('two', ExecutionProfile(speculative_execution_policy=policy))
+        self.assertEqual(cluster._latency_trackers, (policy,))
+
+        cluster.unregister_latency_tracker(policy)
+        self.assertEqual(cluster._latency_trackers, ())
+
     def test_warning_on_no_lbp_with_contact_points_legacy_mode(self):
         """
         Test that users are warned when they instantiate a Cluster object in
@@ -18,7 +18,7 @@ try:
 except ImportError:
     import unittest  # noqa
 
-from itertools import cycle
+from itertools import count, cycle, islice
 from mock import Mock
 import time
 import threading
@@ -27,8 +27,15 @@ import sys
 import platform
 
 from cassandra.cluster import Cluster, Session
-from cassandra.concurrent import execute_concurrent, execute_concurrent_with_args
+from cassandra.concurrent import (execute_concurrent, execute_concurrent_with_args, execute_concurrent_batched,
+                                  ConcurrentTokenRangeScan)
+from cassandra.cqltypes import Int32Type, LongType
+from cassandra.metadata import Metadata, TokenMap, Murmur3Token, KeyspaceMetadata
 from cassandra.pool import Host
+from cassandra.protocol import ColumnMetadata
+from cassandra import ConsistencyLevel
+from cassandra.query import (BatchStatement, BatchType, BoundStatement, PreparedStatement,
+                             SimpleStatement, UNSET_VALUE)
 from cassandra.policies import SimpleConvictionPolicy
 from tests.unit.utils import mock_session_pools
 
@@ -119,6 +126,36 @@ class TimedCallableInvoker(threading.Thread):
             self._stopper.wait(.001)
         return
 
+class PagedResponseFuture(object):
+    """
+    A ResponseFuture stand-in which delivers its pages synchronously.
+    """
+
+    _query_trace = None
+    _col_names = None
+    _col_types = None
+
+    def __init__(self, statement, pages):
+        self.statement = statement
+        self._pages = list(pages)
+
+    @property
+    def has_more_pages(self):
+        return len(self._pages) > 1
+
+    def add_callbacks(self, callback, errback, callback_args=(), errback_args=()):
+        self._callback = (callback, callback_args)
+        callback(self._pages[0], *callback_args)
+
+    def clear_callbacks(self):
+        pass
+
+    def start_fetching_next_page(self):
+        self._pages.pop(0)
+        callback, callback_args = self._callback
+        callback(self._pages[0], *callback_args)
+
+
 class ConcurrencyTest((unittest.TestCase)):
 
     def test_results_ordering_forward(self):
@@ -177,6 +214,45 @@ class ConcurrencyTest((unittest.TestCase)):
         """
         self.insert_and_validate_list_generator(True, True)
 
+    def test_results_unordered_generator(self):
+        """
+        This tests ConcurrentExecutorUnorderedResults yields every statement index once when
+        queries complete out of order, with slow queries mixed in.
+        """
+        our_handler = MockResponseResponseFuture(reverse=True)
+        mock_session = Mock()
+        statements_and_params = zip(cycle(["INSERT INTO test3rf.test (k, v) VALUES (%s, 0)"]),
+                                    [(i, ) for i in range(100)])
+        mock_session.execute_async.return_value = our_handler
+
+        t = TimedCallableInvoker(our_handler, slowdown=True)
+        t.start()
+        try:
+            results = execute_concurrent(mock_session, statements_and_params, concurrency=10, ordered=False)
+            indexes = []
+            for idx, (success, result) in results:
+                self.assertTrue(success)
+                indexes.append(idx)
+            self.assertEqual(sorted(indexes), list(range(100)))
+        finally:
+            t.stop()
+
+    def test_results_unordered_generator_bounded(self):
+        """
+        This tests ConcurrentExecutorUnorderedResults consumes an unbounded statement generator lazily,
+        only starting a statement when a result has been consumed.
+        """
+        mock_session = Mock()
+        future = Mock(has_more_pages=False)
+        future.add_callbacks.side_effect = lambda callback, errback, callback_args, errback_args: callback([], *callback_args)
+        mock_session.execute_async.return_value = future
+
+        statements_and_params = (("INSERT INTO test3rf.test (k, v) VALUES (%s, 0)", (i,)) for i in count())
+        results = execute_concurrent(mock_session, statements_and_params, concurrency=10, ordered=False)
+        indexes = [idx for idx, _ in islice(results, 50)]
+        self.assertEqual(sorted(indexes), list(range(50)))
+        self.assertEqual(mock_session.execute_async.call_count, 60)
+
     def insert_and_validate_list_results(self, reverse, slowdown):
         """
         This utility method will execute submit various statements for execution using the ConcurrentExecutorListResults,
@@ -258,3 +334,167 @@ class ConcurrencyTest((unittest.TestCase)):
         for r in results:
             self.assertFalse(r[0])
             self.assertIsInstance(r[1], TypeError)
+
+
+class TokenRangeScanTest(unittest.TestCase):
+
+    def make_session(self):
+        tokens = [Murmur3Token(i) for i in range(-300, 300, 100)]
+        hosts = [Host("127.0.0.%d" % (i % 3 + 1), SimpleConvictionPolicy) for i in range(len(tokens))]
+        metadata = Metadata()
+        keyspace = KeyspaceMetadata("ks", True, "SimpleStrategy", {"replication_factor": "1"})
+        table = Mock(partition_key=[Mock()])
+        table.partition_key[0].name = 'k'
+        keyspace.tables['t'] = table
+        metadata.keyspaces['ks'] = keyspace
+        metadata.token_map = TokenMap(Murmur3Token, dict(zip(tokens, hosts)), tokens, metadata)
+
+        def prepare(query):
+            column_metadata = [ColumnMetadata('ks', 't', 'partition key token', LongType)] * query.count('?')
+            return PreparedStatement(column_metadata, None, None, query, 'ks', 4, None, None)
+
+        session = Mock()
+        session.cluster.metadata = metadata
+        session.prepare.side_effect = prepare
+        # two pages for every range
+        session.execute_async.side_effect = lambda statement, **kwargs: PagedResponseFuture(
+            statement, [[(statement, 0)], [(statement, 1)]])
+        return session, tokens
+
+    def test_scan(self):
+        session, tokens = self.make_session()
+        rows = list(ConcurrentTokenRangeScan(session, 'ks', 't', columns=['a', 'b'], fetch_size=10).execute(concurrency=3))
+
+        self.assertEqual(len(rows), 2 * (len(tokens) + 1))
+        statements = set(statement for statement, _ in rows)
+        self.assertEqual(len(statements), len(tokens) + 1)
+        self.assertEqual(set(s.prepared_statement.query_string for s in statements), set([
+            'SELECT a, b FROM ks.t WHERE token(k) <= ?',
+            'SELECT a, b FROM ks.t WHERE token(k) > ?',
+            'SELECT a, b FROM ks.t WHERE token(k) > ? AND token(k) <= ?']))
+
+        routing_tokens = []
+        for statement in statements:
+            self.assertEqual(statement.fetch_size, 10)
+            self.assertIsInstance(statement.routing_key, Murmur3Token)
+            routing_tokens.append(statement.routing_key)
+        # every range start, and the last token for the first range
+        self.assertEqual(sorted(routing_tokens), tokens + [tokens[-1]])
+
+    def test_scan_ranges_interleaved(self):
+        session, tokens = self.make_session()
+        scan = ConcurrentTokenRangeScan(session, 'ks', 't')
+        owners = [scan._token_map.token_to_host_owner[end if end is not None else tokens[0]]
+                  for _, end in scan.token_ranges()]
+        # consecutive ranges belong to different hosts
+        self.assertEqual(len(set(owners[:3])), 3)
+
+    def test_scan_unknown_table(self):
+        session, _ = self.make_session()
+        self.assertRaises(ValueError, ConcurrentTokenRangeScan, session, 'ks', 'missing')
+
+
+class ConcurrentBatchedTest(unittest.TestCase):
+
+    def setUp(self):
+        tokens = [Murmur3Token(i) for i in (-2 ** 62, 0, 2 ** 62)]
+        hosts = [Host("127.0.0.%d" % (i + 1), SimpleConvictionPolicy) for i in range(len(tokens))]
+        metadata = Metadata()
+        metadata.keyspaces['ks'] = KeyspaceMetadata("ks", True, "SimpleStrategy", {"replication_factor": "1"})
+        metadata.token_map = TokenMap(Murmur3Token, dict(zip(tokens, hosts)), tokens, metadata)
+
+        self.session = Mock()
+        self.session.cluster.metadata = metadata
+        self.session.execute_async.side_effect = lambda statement, params, **kwargs: PagedResponseFuture(statement, [[]])
+        self.insert = PreparedStatement([ColumnMetadata('ks', 't', 'k', Int32Type), ColumnMetadata('ks', 't', 'v', Int32Type)],
+                                        b'id', [0], 'INSERT INTO t (k, v) VALUES (?, ?)', 'ks', 4, None, None)
+
+    def executed(self):
+        return [args[0] for args, _ in self.session.execute_async.call_args_list]
+
+    def test_group_by_partition(self):
+        statements = [(self.insert, (k, v)) for v in range(5) for k in range(10)]
+        statements.append(("INSERT INTO t (k, v) VALUES (%s, %s)", (1, 1)))
+        results = execute_concurrent_batched(self.session, statements, max_batch_size=3)
+
+        executed = self.executed()
+        self.assertEqual(len(results), len(executed))
+        # ten partitions of five rows, in batches of at most three
+        batches = [s for s in executed if isinstance(s, BatchStatement)]
+        self.assertEqual(len(batches), 20)
+        self.assertEqual(sorted(len(b) for b in batches), [2] * 10 + [3] * 10)
+        for batch in batches:
+            self.assertEqual(batch.batch_type, BatchType.UNLOGGED)
+            self.assertEqual(len(set(params[0] for _, _, params in batch._statements_and_parameters)), 1)
+            self.assertIsNotNone(batch.routing_key)
+        # statements without a routing key are executed as they are
+        self.assertEqual(executed[-1], "INSERT INTO t (k, v) VALUES (%s, %s)")
+
+        # consecutive batches go to different replicas
+        replicas = [self.session.cluster.metadata.get_replicas('ks', b.routing_key)[0] for b in batches]
+        self.assertEqual(len(set(replicas[:3])), 3)
+
+    def test_batch_bytes(self):
+        statements = [(self.insert, (0, v)) for v in range(4)]
+        execute_concurrent_batched(self.session, statements, max_batch_bytes=16)
+        self.assertEqual([len(b) for b in self.executed()], [2, 2])
+
+        self.session.execute_async.reset_mock()
+        execute_concurrent_batched(self.session, statements[:1], max_batch_bytes=1)
+        self.assertIsInstance(self.executed()[0], BoundStatement)
+
+    def test_unset_values(self):
+        statements = [(self.insert, (0, UNSET_VALUE)), (self.insert, (0, 1))]
+        execute_concurrent_batched(self.session, statements)
+        self.assertEqual([len(b) for b in self.executed()], [2])
+
+    def test_consistency_level(self):
+        simple = SimpleStatement("INSERT INTO t (k, v) VALUES (1, 1)", consistency_level=ConsistencyLevel.ONE)
+        statements = [(self.insert, (0, v)) for v in range(2)] + [(self.insert, (1, 0)), (simple, None),
+                                                                  ("INSERT INTO t (k, v) VALUES (2, 2)", None)]
+        execute_concurrent_batched(self.session, statements, consistency_level=ConsistencyLevel.QUORUM)
+
+        executed = self.executed()
+        self.assertEqual(len(executed), 4)
+        self.assertEqual([s.consistency_level for s in executed], [ConsistencyLevel.QUORUM] * 4)
+        self.assertIsInstance(executed[-1], SimpleStatement)
+        # statements passed in are not changed
+        self.assertEqual(simple.consistency_level, ConsistencyLevel.ONE)
+
+    def test_conflicting_consistency_levels(self):
+        statements = []
+        for level in (ConsistencyLevel.ONE, ConsistencyLevel.ONE, ConsistencyLevel.ALL):
+            statement = self.insert.bind((0, 1))
+            statement.consistency_level = level
+            statements.append((statement, None))
+        statements[0][0].serial_consistency_level = ConsistencyLevel.LOCAL_SERIAL
+        statements.append((self.insert.bind((0, 2)), None))
+        statements[-1][0].consistency_level = ConsistencyLevel.ONE
+        statements[-1][0].serial_consistency_level = ConsistencyLevel.LOCAL_SERIAL
+        execute_concurrent_batched(self.session, statements)
+
+        # only statements with the same levels share a batch, which keeps them
+        executed = self.executed()
+        self.assertEqual(sorted(len(s) if isinstance(s, BatchStatement) else 1 for s in executed), [1, 1, 2])
+        batch, = [s for s in executed if isinstance(s, BatchStatement)]
+        self.assertEqual(batch.consistency_level, ConsistencyLevel.ONE)
+        self.assertEqual(batch.serial_consistency_level, ConsistencyLevel.LOCAL_SERIAL)
+
+    def test_statement_options(self):
+        retry_policy = Mock()
+        self.insert.is_idempotent = True
+        self.insert.retry_policy = retry_policy
+        self.insert.custom_payload = {'key': b'value'}
+        statements = [(self.insert, (0, v)) for v in range(3)]
+        other = self.insert.bind((0, 3))
+        other.is_idempotent = False
+        statements.append((other, None))
+        execute_concurrent_batched(self.session, statements)
+
+        # statements are only batched with others of the same options, which the batch keeps
+        executed = self.executed()
+        self.assertEqual(sorted(len(s) if isinstance(s, BatchStatement) else 1 for s in executed), [1, 3])
+        batch, = [s for s in executed if isinstance(s, BatchStatement)]
+        self.assertTrue(batch.is_idempotent)
+        self.assertIs(batch.retry_policy, retry_policy)
+        self.assertEqual(batch.custom_payload, {'key': b'value'})
@@ -20,16 +20,16 @@ from mock import Mock, ANY, call, patch
 import six
 from six import BytesIO
 import time
-from threading import Lock
+from threading import Lock, Thread
 
 from cassandra import OperationTimedOut
 from cassandra.cluster import Cluster
 from cassandra.connection import (Connection, HEADER_DIRECTION_TO_CLIENT, ProtocolError,
                                   locally_supported_compressions, ConnectionHeartbeat, _Frame, Timer, TimerManager,
-                                  ConnectionException)
+                                  ConnectionException, _ReadBuffer)
 from cassandra.marshal import uint8_pack, uint32_pack, int32_pack
 from cassandra.protocol import (write_stringmultimap, write_int, write_string,
-                                SupportedMessage, ProtocolHandler)
+                                SupportedMessage, OptionsMessage, ProtocolHandler)
 
 
 class ConnectionTest(unittest.TestCase):
@@ -83,7 +83,6 @@ class ConnectionTest(unittest.TestCase):
         header = self.make_header_prefix(SupportedMessage, version=0x7f)
         options = self.make_options_body()
         message = self.make_msg(header, options)
-        c._iobuf = BytesIO()
         c._iobuf.write(message)
         c.process_io_buffer()
 
@@ -100,7 +99,6 @@ class ConnectionTest(unittest.TestCase):
         # read in a SupportedMessage response
         header = self.make_header_prefix(SupportedMessage)
         message = header + int32_pack(-13)
-        c._iobuf = BytesIO()
         c._iobuf.write(message)
         c.process_io_buffer()
 
@@ -231,6 +229,33 @@ class ConnectionTest(unittest.TestCase):
 
         self.assertEqual(c.decompressor, None)
 
+    def test_request_timings(self):
+        c = self.make_connection()
+        options = self.make_options_body()
+
+        def push(msg):
+            # the event loop answers before push() returns
+            self.assertEqual(sorted(timings), ['encoded'])
+            c.process_msg(_Frame(version=4, flags=0, stream=0, opcode=SupportedMessage.opcode,
+                                 body_offset=9, end_pos=9 + len(options)), options)
+        c.push = push
+        cb = Mock()
+        timings = {}
+        c.send_msg(OptionsMessage(), 0, cb, timings=timings)
+
+        cb.assert_called_once_with(ANY)
+        self.assertEqual(sorted(timings), ['decoded', 'encoded', 'received'])
+        self.assertLessEqual(timings['encoded'], timings['received'])
+        self.assertLessEqual(timings['received'], timings['decoded'])
+        self.assertEqual(c._request_timings, {})
+
+        # timings left by a timed out request are dropped when its stream id is reused
+        c.push = Mock()
+        c.send_msg(OptionsMessage(), 0, cb, timings={})
+        c._requests.pop(0)
+        c.send_msg(OptionsMessage(), 0, cb)
+        self.assertEqual(c._request_timings, {})
+
     def test_not_implemented(self):
         """
         Ensure the following methods throw NIE's. If not, come back and test them.
@@ -253,6 +278,39 @@ class ConnectionTest(unittest.TestCase):
         cluster = Cluster(connection_class='test')
         self.assertEqual('test', cluster.connection_class)
 
+    def test_borrow_request_id(self):
+        c = self.make_connection()
+        c.max_request_id = c.highest_request_id + 1
+        request_ids = [c.borrow_request_id() for _ in range(c.max_request_id + 1)]
+        self.assertEqual(sorted(request_ids), list(range(c.max_request_id + 1)))
+        self.assertEqual(c.in_flight, len(request_ids))
+
+        # all request ids are in use
+        self.assertIsNone(c.borrow_request_id())
+        self.assertEqual(c.in_flight, len(request_ids))
+
+        c.request_ids.append(request_ids[0])
+        self.assertEqual(c.release_request(), len(request_ids) - 1)
+        self.assertEqual(c.borrow_request_id(), request_ids[0])
+
+    def test_borrow_request_id_threads(self):
+        c = self.make_connection()
+
+        def borrow_and_release():
+            for _ in range(1000):
+                request_id = c.borrow_request_id()
+                c.request_ids.append(request_id)
+                c.release_request()
+
+        threads = [Thread(target=borrow_and_release) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(c.in_flight, 0)
+        self.assertEqual(sorted(c.request_ids), list(range(c.highest_request_id + 1)))
+
 
 @patch('cassandra.connection.ConnectionHeartbeat._raise_if_stopped')
 class ConnectionHeartbeatTest(unittest.TestCase):
@@ -287,7 +345,7 @@ class ConnectionHeartbeatTest(unittest.TestCase):
     def test_idle_non_idle(self, *args):
         request_id = 999
 
-        # connection.send_msg(OptionsMessage(), connection.get_request_id(), self._options_callback)
+        # connection.send_msg(OptionsMessage(), connection.borrow_request_id(), self._options_callback)
         def send_msg(msg, req_id, msg_callback):
             msg_callback(SupportedMessage([], {}))
 
@@ -296,7 +354,7 @@ class ConnectionHeartbeatTest(unittest.TestCase):
                                lock=Lock(),
                                in_flight=0, is_idle=True,
                                is_defunct=False, is_closed=False,
-                               get_request_id=lambda: request_id,
+                               borrow_request_id=lambda: request_id,
                                send_msg=Mock(side_effect=send_msg))
         non_idle_connection = Mock(spec=Connection, in_flight=0, is_idle=False, is_defunct=False, is_closed=False)
 
@@ -308,8 +366,8 @@ class ConnectionHeartbeatTest(unittest.TestCase):
         self.run_heartbeat(get_holders)
 
         holder.get_connections.assert_has_calls([call()] * get_holders.call_count)
-        self.assertEqual(idle_connection.in_flight, 0)
-        self.assertEqual(non_idle_connection.in_flight, 0)
+        self.assertEqual(idle_connection.release_request.call_count, get_holders.call_count)
+        self.assertFalse(non_idle_connection.borrow_request_id.called)
 
         idle_connection.send_msg.assert_has_calls([call(ANY, request_id, ANY)] * get_holders.call_count)
         self.assertEqual(non_idle_connection.send_msg.call_count, 0)
@@ -325,8 +383,8 @@ class ConnectionHeartbeatTest(unittest.TestCase):
         self.run_heartbeat(get_holders)
 
         holder.get_connections.assert_has_calls([call()] * get_holders.call_count)
-        self.assertEqual(closed_connection.in_flight, 0)
-        self.assertEqual(defunct_connection.in_flight, 0)
+        self.assertFalse(closed_connection.borrow_request_id.called)
+        self.assertFalse(defunct_connection.borrow_request_id.called)
         self.assertEqual(closed_connection.send_msg.call_count, 0)
         self.assertEqual(defunct_connection.send_msg.call_count, 0)
 
@@ -337,6 +395,7 @@ class ConnectionHeartbeatTest(unittest.TestCase):
         max_connection = Mock(spec=Connection, host='localhost',
                               lock=Lock(),
                               max_request_id=in_flight - 1, in_flight=in_flight,
+                              borrow_request_id=Mock(return_value=None),
                               is_idle=True, is_defunct=False, is_closed=False)
         holder = get_holders.return_value[0]
         holder.get_connections.return_value.append(max_connection)
@@ -344,7 +403,8 @@ class ConnectionHeartbeatTest(unittest.TestCase):
         self.run_heartbeat(get_holders)
 
         holder.get_connections.assert_has_calls([call()] * get_holders.call_count)
-        self.assertEqual(max_connection.in_flight, in_flight)
+        self.assertEqual(max_connection.borrow_request_id.call_count, get_holders.call_count)
+        self.assertFalse(max_connection.release_request.called)
         self.assertEqual(max_connection.send_msg.call_count, 0)
         self.assertEqual(max_connection.send_msg.call_count, 0)
         max_connection.defunct.assert_has_calls([call(ANY)] * get_holders.call_count)
@@ -364,14 +424,14 @@ class ConnectionHeartbeatTest(unittest.TestCase):
                           lock=Lock(),
                           in_flight=0, is_idle=True,
                           is_defunct=False, is_closed=False,
-                          get_request_id=lambda: request_id,
+                          borrow_request_id=lambda: request_id,
                           send_msg=Mock(side_effect=send_msg))
         holder = get_holders.return_value[0]
         holder.get_connections.return_value.append(connection)
 
         self.run_heartbeat(get_holders)
 
-        self.assertEqual(connection.in_flight, get_holders.call_count)
+        self.assertFalse(connection.release_request.called)
         connection.send_msg.assert_has_calls([call(ANY, request_id, ANY)] * get_holders.call_count)
         connection.defunct.assert_has_calls([call(ANY)] * get_holders.call_count)
         exc = connection.defunct.call_args_list[0][0][0]
@@ -393,14 +453,14 @@ class ConnectionHeartbeatTest(unittest.TestCase):
                           lock=Lock(),
                           in_flight=0, is_idle=True,
                           is_defunct=False, is_closed=False,
-                          get_request_id=lambda: request_id,
+                          borrow_request_id=lambda: request_id,
                           send_msg=Mock(side_effect=send_msg))
         holder = get_holders.return_value[0]
         holder.get_connections.return_value.append(connection)
 
         self.run_heartbeat(get_holders)
 
-        self.assertEqual(connection.in_flight, get_holders.call_count)
+        self.assertFalse(connection.release_request.called)
         connection.send_msg.assert_has_calls([call(ANY, request_id, ANY)] * get_holders.call_count)
         connection.defunct.assert_has_calls([call(ANY)] * get_holders.call_count)
         exc = connection.defunct.call_args_list[0][0][0]
@@ -411,6 +471,65 @@ class ConnectionHeartbeatTest(unittest.TestCase):
             [call(connection)] * get_holders.call_count)
 
 
+class ReadBufferTest(unittest.TestCase):
+
+    def test_write_and_consume(self):
+        buf = _ReadBuffer(initial_size=8)
+        buf.write(b'abcdef')
+        self.assertEqual(len(buf), 6)
+        self.assertEqual(buf.view(1, 4).tobytes(), b'bcd')
+
+        buf.consume(4)
+        self.assertEqual(len(buf), 2)
+        self.assertEqual(buf.getvalue(), b'ef')
+        self.assertEqual(buf.byte_at(0), ord('e'))
+
+        buf.consume(2)
+        self.assertEqual(len(buf), 0)
+        self.assertEqual(buf.getvalue(), b'')
+
+    def test_compacts_before_growing(self):
+        buf = _ReadBuffer(initial_size=8)
+        buf.write(b'abcdef')
+        buf.consume(4)
+        buf.write(b'ghijkl')
+        self.assertEqual(len(buf._buf), 8)
+        self.assertEqual(buf.getvalue(), b'efghijkl')
+
+    def test_grows(self):
+        buf = _ReadBuffer(initial_size=8)
+        buf.write(b'abc')
+        buf.consume(1)
+        buf.write(b'x' * 20)
+        self.assertEqual(len(buf._buf), 32)
+        self.assertEqual(buf.getvalue(), b'bc' + b'x' * 20)
+
+    def test_releases_large_buffer_when_empty(self):
+        buf = _ReadBuffer(initial_size=8)
+        buf.max_idle_size = 16
+        buf.write(b'x' * 20)
+        buf.consume(20)
+        self.assertEqual(len(buf._buf), 8)
+
+    def test_frames_across_writes(self):
+        c = Connection('1.2.3.4')
+        c.process_msg = Mock()
+        body = b'\x00' * 10
+        message = six.binary_type().join(map(uint8_pack, [0x84, 0, 0, 1, SupportedMessage.opcode])) + int32_pack(len(body)) + body
+        c._iobuf.write(message + message[:5])
+        c.process_io_buffer()
+        self.assertEqual(c.process_msg.call_count, 1)
+        header, msg = c.process_msg.call_args[0]
+        self.assertEqual(header.stream, 1)
+        self.assertEqual(len(msg), len(body))
+        self.assertEqual(len(c._iobuf), 5)
+
+        c._iobuf.write(message[5:])
+        c.process_io_buffer()
+        self.assertEqual(c.process_msg.call_count, 2)
+        self.assertEqual(len(c._iobuf), 0)
+
+
 class LZ4Tests(unittest.TestCase):
     def test_lz4_is_correctly_imported(self):
         try:
@@ -433,3 +552,53 @@ class TimerTest(unittest.TestCase):
         tm.add_timer(t2)
         # Prior to #466: "TypeError: unorderable types: Timer() < Timer()"
         tm.service_timeouts()
+
+    def test_timer_cancellation(self):
+        tm = TimerManager()
+        timers = [Timer(timeout, Mock()) for timeout in (0, 1, 10, 1000, 100000)]
+        for timer in timers:
+            tm.add_timer(timer)
+        self.assertEqual(tm._timer_count, 5)
+
+        # cancelled timers are taken out of the wheels right away
+        for timer in timers:
+            timer.cancel()
+        self.assertEqual(tm._timer_count, 0)
+        self.assertFalse(tm._due)
+        self.assertFalse(any(slot for wheel in tm._wheels for slot in wheel))
+
+        self.assertIsNone(tm.service_timeouts())
+        self.assertFalse(any(timer.callback.called for timer in timers))
+
+    def test_timer_wheels(self):
+        class SmallTimerManager(TimerManager):
+            # timers ending after 4096 ticks wait in the last slot of the outer wheel
+            _wheel_count = 2
+
+        clock = Mock()
+        clock.time.return_value = 1000.0
+        with patch('cassandra.connection.time', clock):
+            tm = SmallTimerManager()
+            timers = [Timer(timeout, Mock()) for timeout in (0, 0.005, 0.3, 5, 30, 100)]
+            for timer in timers:
+                tm.add_timer(timer)
+            self.assertEqual(tm.next_timeout, 1000.0)
+
+            now = 1000.0
+            while now < 1101:
+                clock.time.return_value = now
+                next_end = tm.service_timeouts()
+                for timer in timers:
+                    # never early, and at most one tick late
+                    if now < timer.end:
+                        self.assertFalse(timer.callback.called)
+                    elif now >= timer.end + tm.resolution:
+                        timer.callback.assert_called_once_with()
+
+                pending = [timer.end for timer in timers if not timer.callback.called]
+                if pending:
+                    self.assertLessEqual(next_end, min(pending) + tm.resolution + 1e-6)
+                now += 0.25
+
+            self.assertIsNone(tm.next_timeout)
+            self.assertEqual(tm._timer_count, 0)
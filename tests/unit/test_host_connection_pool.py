@@ -17,15 +17,37 @@ try:
 except ImportError:
     import unittest # noqa
 
-from mock import Mock, NonCallableMagicMock
+from mock import Mock, NonCallableMagicMock, patch
 from threading import Thread, Event, Lock
 
 from cassandra.cluster import Session
 from cassandra.connection import Connection
-from cassandra.pool import Host, HostConnectionPool, NoConnectionsAvailable
+from cassandra.pool import Host, HostConnection, HostConnectionPool, NoConnectionsAvailable
 from cassandra.policies import HostDistance, SimpleConvictionPolicy
 
 
+def mock_connection(**kwargs):
+    """
+    A connection mock which counts borrowed requests in its in_flight
+    attribute.
+    """
+    conn = NonCallableMagicMock(spec=Connection, **kwargs)
+
+    def borrow_request_id():
+        if conn.in_flight >= conn.max_request_id:
+            return None
+        conn.in_flight += 1
+        return conn.in_flight
+
+    def release_request():
+        conn.in_flight -= 1
+        return conn.in_flight
+
+    conn.borrow_request_id.side_effect = borrow_request_id
+    conn.release_request.side_effect = release_request
+    return conn
+
+
 class HostConnectionPoolTests(unittest.TestCase):
 
     def make_session(self):
@@ -38,7 +60,7 @@ class HostConnectionPoolTests(unittest.TestCase):
     def test_borrow_and_return(self):
         host = Mock(spec=Host, address='ip1')
         session = self.make_session()
-        conn = NonCallableMagicMock(spec=Connection, in_flight=0, is_defunct=False, is_closed=False, max_request_id=100)
+        conn = mock_connection(in_flight=0, is_defunct=False, is_closed=False, max_request_id=100)
         session.cluster.connection_factory.return_value = conn
 
         pool = HostConnectionPool(host, HostDistance.LOCAL, session)
@@ -47,16 +69,18 @@ class HostConnectionPoolTests(unittest.TestCase):
         c, request_id = pool.borrow_connection(timeout=0.01)
         self.assertIs(c, conn)
         self.assertEqual(1, conn.in_flight)
+        self.assertEqual(1, pool.in_flight)
         conn.set_keyspace_blocking.assert_called_once_with('foobarkeyspace')
 
         pool.return_connection(conn)
         self.assertEqual(0, conn.in_flight)
+        self.assertEqual(0, pool.in_flight)
         self.assertNotIn(conn, pool._trash)
 
     def test_failed_wait_for_connection(self):
         host = Mock(spec=Host, address='ip1')
         session = self.make_session()
-        conn = NonCallableMagicMock(spec=Connection, in_flight=0, is_defunct=False, is_closed=False, max_request_id=100)
+        conn = mock_connection(in_flight=0, is_defunct=False, is_closed=False, max_request_id=100)
         session.cluster.connection_factory.return_value = conn
 
         pool = HostConnectionPool(host, HostDistance.LOCAL, session)
@@ -74,7 +98,7 @@ class HostConnectionPoolTests(unittest.TestCase):
     def test_successful_wait_for_connection(self):
         host = Mock(spec=Host, address='ip1')
         session = self.make_session()
-        conn = NonCallableMagicMock(spec=Connection, in_flight=0, is_defunct=False, is_closed=False, max_request_id=100, lock=Lock())
+        conn = mock_connection(in_flight=0, is_defunct=False, is_closed=False, max_request_id=100, lock=Lock())
         session.cluster.connection_factory.return_value = conn
 
         pool = HostConnectionPool(host, HostDistance.LOCAL, session)
@@ -98,7 +122,7 @@ class HostConnectionPoolTests(unittest.TestCase):
     def test_all_connections_trashed(self):
         host = Mock(spec=Host, address='ip1')
         session = self.make_session()
-        conn = NonCallableMagicMock(spec=Connection, in_flight=0, is_defunct=False, is_closed=False, max_request_id=100, lock=Lock())
+        conn = mock_connection(in_flight=0, is_defunct=False, is_closed=False, max_request_id=100, lock=Lock())
         session.cluster.connection_factory.return_value = conn
         session.cluster.get_core_connections_per_host.return_value = 1
 
@@ -140,7 +164,7 @@ class HostConnectionPoolTests(unittest.TestCase):
     def test_spawn_when_at_max(self):
         host = Mock(spec=Host, address='ip1')
         session = self.make_session()
-        conn = NonCallableMagicMock(spec=Connection, in_flight=0, is_defunct=False, is_closed=False, max_request_id=100)
+        conn = mock_connection(in_flight=0, is_defunct=False, is_closed=False, max_request_id=100)
         conn.max_request_id = 100
         session.cluster.connection_factory.return_value = conn
 
@@ -165,8 +189,8 @@ class HostConnectionPoolTests(unittest.TestCase):
     def test_return_defunct_connection(self):
         host = Mock(spec=Host, address='ip1')
         session = self.make_session()
-        conn = NonCallableMagicMock(spec=Connection, in_flight=0, is_defunct=False, is_closed=False,
-                                    max_request_id=100, signaled_error=False)
+        conn = mock_connection(in_flight=0, is_defunct=False, is_closed=False,
+                               max_request_id=100, signaled_error=False)
         session.cluster.connection_factory.return_value = conn
 
         pool = HostConnectionPool(host, HostDistance.LOCAL, session)
@@ -184,8 +208,8 @@ class HostConnectionPoolTests(unittest.TestCase):
     def test_return_defunct_connection_on_down_host(self):
         host = Mock(spec=Host, address='ip1')
         session = self.make_session()
-        conn = NonCallableMagicMock(spec=Connection, in_flight=0, is_defunct=False, is_closed=False,
-                                    max_request_id=100, signaled_error=False)
+        conn = mock_connection(in_flight=0, is_defunct=False, is_closed=False,
+                               max_request_id=100, signaled_error=False)
         session.cluster.connection_factory.return_value = conn
 
         pool = HostConnectionPool(host, HostDistance.LOCAL, session)
@@ -205,7 +229,7 @@ class HostConnectionPoolTests(unittest.TestCase):
     def test_return_closed_connection(self):
         host = Mock(spec=Host, address='ip1')
         session = self.make_session()
-        conn = NonCallableMagicMock(spec=Connection, in_flight=0, is_defunct=False, is_closed=True, max_request_id=100, signaled_error=False)
+        conn = mock_connection(in_flight=0, is_defunct=False, is_closed=True, max_request_id=100, signaled_error=False)
         session.cluster.connection_factory.return_value = conn
 
         pool = HostConnectionPool(host, HostDistance.LOCAL, session)
@@ -241,3 +265,130 @@ class HostConnectionPoolTests(unittest.TestCase):
         self.assertEqual(a, b, 'Two Host instances should be equal when sharing.')
         self.assertNotEqual(a, c, 'Two Host instances should NOT be equal when using two different addresses.')
         self.assertNotEqual(b, c, 'Two Host instances should NOT be equal when using two different addresses.')
+
+
+class HostConnectionTests(unittest.TestCase):
+
+    def make_session(self):
+        session = NonCallableMagicMock(spec=Session, keyspace=None)
+        session.cluster.get_host_connections.return_value = (2, 3)
+        session.cluster.new_connection_threshold = 2
+        session.cluster.connection_factory.side_effect = lambda address: mock_connection(
+            in_flight=0, is_defunct=False, is_closed=False, signaled_error=False,
+            max_request_id=100, lock=Lock())
+        return session
+
+    def make_pool(self, session):
+        host = Mock(spec=Host, address='ip1')
+        pool = HostConnection(host, HostDistance.LOCAL, session)
+        self.assertEqual(session.cluster.connection_factory.call_count, 2)
+        return pool
+
+    def test_borrow_least_busy(self):
+        session = self.make_session()
+        pool = self.make_pool(session)
+        first, second = pool.get_connections()
+
+        conn, _ = pool.borrow_connection(timeout=0.01)
+        self.assertIs(conn, first)
+        conn, _ = pool.borrow_connection(timeout=0.01)
+        self.assertIs(conn, second)
+        self.assertEqual(pool.in_flight, 2)
+        self.assertEqual(pool.open_count, 2)
+        self.assertFalse(session.submit.called)
+
+        pool.return_connection(first)
+        conn, _ = pool.borrow_connection(timeout=0.01)
+        self.assertIs(conn, first)
+
+    def test_grow_and_trim(self):
+        session = self.make_session()
+        pool = self.make_pool(session)
+        borrowed = [pool.borrow_connection(timeout=0.01)[0] for _ in range(4)]
+
+        # every connection is at the threshold
+        session.submit.assert_called_once_with(pool._create_new_connection)
+        pool._create_new_connection()
+        self.assertEqual(len(pool.get_connections()), 3)
+        third, _ = pool.borrow_connection(timeout=0.01)
+        self.assertIs(third, pool.get_connections()[2])
+
+        pool._next_trash_allowed_at = 0
+        for conn in borrowed[:2]:
+            pool.return_connection(conn)
+        self.assertEqual(len(pool.get_connections()), 3)
+
+        # two in flight fit in the other two connections at half the threshold
+        pool.return_connection(third)
+        self.assertNotIn(third, pool.get_connections())
+        third.close.assert_called_once_with()
+
+        # never below the core connections
+        pool._next_trash_allowed_at = 0
+        for conn in borrowed[2:]:
+            pool.return_connection(conn)
+        self.assertEqual(len(pool.get_connections()), 2)
+        self.assertEqual(pool.in_flight, 0)
+
+    def test_trashed_connection_closed_when_idle(self):
+        session = self.make_session()
+        session.cluster.get_host_connections.return_value = (1, 2)
+        host = Mock(spec=Host, address='ip1')
+        pool = HostConnection(host, HostDistance.LOCAL, session)
+        pool._create_new_connection()
+        first, second = pool.get_connections()
+
+        first.in_flight = 1
+        second.in_flight = 1
+        pool._maybe_trash_connection(second)
+        self.assertEqual(pool.get_connections(), [first])
+        self.assertFalse(second.close.called)
+
+        pool.return_connection(second)
+        second.close.assert_called_once_with()
+        self.assertFalse(pool._trash)
+
+    def test_return_defunct_connection(self):
+        session = self.make_session()
+        session.cluster.signal_connection_failure.return_value = False
+        pool = self.make_pool(session)
+        conn, _ = pool.borrow_connection(timeout=0.01)
+        conn.is_defunct = True
+        pool.return_connection(conn)
+
+        self.assertNotIn(conn, pool.get_connections())
+        session.submit.assert_called_once_with(pool._replace, conn)
+        pool._replace(conn)
+        self.assertEqual(len(pool.get_connections()), 2)
+        self.assertFalse(pool._is_replacing)
+
+    def test_notify_only_waiters(self):
+        session = self.make_session()
+        pool = self.make_pool(session)
+        conn, _ = pool.borrow_connection(timeout=0.01)
+
+        with patch.object(pool, '_stream_available_condition') as condition:
+            pool.return_connection(conn)
+            self.assertFalse(condition.notify.called)
+
+            conn, _ = pool.borrow_connection(timeout=0.01)
+            pool._waiters = 1
+            pool.return_connection(conn)
+            condition.notify.assert_called_once_with()
+
+    def test_borrow_trashed_connection(self):
+        session = self.make_session()
+        pool = self.make_pool(session)
+        first, second = pool.get_connections()
+        borrow_request_id = first.borrow_request_id.side_effect
+
+        def trash_while_borrowing():
+            pool._connections = (second,)
+            return borrow_request_id()
+        first.borrow_request_id.side_effect = trash_while_borrowing
+
+        # the request is not sent on a connection which left the pool
+        conn, _ = pool.borrow_connection(timeout=0.01)
+        self.assertIs(conn, second)
+        self.assertEqual(first.in_flight, 0)
+        first.close.assert_called_once_with()
@@ -197,6 +197,17 @@ class StrategiesTest(unittest.TestCase):
         token_replicas = replica_map[MD5Token(0)]
         self.assertItemsEqual(token_replicas, (dc1_1, dc1_2, dc1_3, dc2_1, dc2_3))
 
+    def test_nts_make_token_replica_map_skipped_vnodes(self):
+        # a host skipped for its rack on several vnodes is only added once
+        hosts = [Host('dc1.%d' % i, SimpleConvictionPolicy) for i in range(4)]
+        for host, rack in zip(hosts, ('rack1', 'rack1', 'rack2', 'rack2')):
+            host.set_location_info('dc1', rack)
+        ring = [MD5Token(i) for i in range(5)]
+        token_to_host_owner = dict(zip(ring, (hosts[0], hosts[1], hosts[1], hosts[2], hosts[3])))
+
+        replica_map = NetworkTopologyStrategy({'dc1': 4}).make_token_replica_map(token_to_host_owner, ring)
+        self.assertEqual(replica_map[MD5Token(0)], [hosts[0], hosts[2], hosts[1], hosts[3]])
+
     def test_nts_make_token_replica_map_empty_dc(self):
         host = Host('1', SimpleConvictionPolicy)
         host.set_location_info('dc1', 'rack1')
@@ -328,6 +339,92 @@ class GetReplicasTest(unittest.TestCase):
             expected_host = hosts[(i + 1) % len(hosts)]
             self.assertEqual(set(replicas), {expected_host})
 
+        # batch lookups agree with single lookups
+        lookup_tokens = [token_klass(token.value + shift) for token in tokens for shift in (-1, 0, 1)]
+        self.assertEqual(token_map.get_replicas_for_tokens("ks", lookup_tokens),
+                         [token_map.get_replicas("ks", token) for token in lookup_tokens])
+        self.assertEqual(token_map.get_replicas_for_tokens("unknown_ks", lookup_tokens[:2]), [[], []])
+
+    def test_token_ranges(self):
+        tokens = [Murmur3Token(i) for i in range(-100, 100, 50)]
+        hosts = [Host("ip%d" % i, SimpleConvictionPolicy) for i in range(len(tokens))]
+        keyspace = KeyspaceMetadata("ks", True, "SimpleStrategy", {"replication_factor": "1"})
+        metadata = Metadata()
+        metadata.keyspaces['ks'] = keyspace
+        metadata.token_map = TokenMap(Murmur3Token, dict(zip(tokens, hosts)), tokens, metadata)
+
+        ranges = metadata.token_map.token_ranges()
+        self.assertEqual(ranges, [(None, tokens[0])] + list(zip(tokens, tokens[1:])) + [(tokens[-1], None)])
+
+        # a range start resolves to the owner of the range end
+        for start, end in ranges[1:-1]:
+            self.assertEqual(metadata.get_replicas("ks", start), [hosts[tokens.index(end)]])
+        self.assertEqual(metadata.get_replicas("ks", tokens[-1]), [hosts[0]])
+
+        self.assertEqual(TokenMap(Murmur3Token, {}, [], metadata).token_ranges(), [])
+
+    def test_get_replicas_for_keys(self):
+        tokens = [Murmur3Token(i) for i in (-2 ** 62, 0, 2 ** 62)]
+        hosts = [Host("ip%d" % i, SimpleConvictionPolicy) for i in range(len(tokens))]
+        metadata = Metadata()
+        metadata.keyspaces['ks'] = KeyspaceMetadata("ks", True, "SimpleStrategy", {"replication_factor": "2"})
+        self.assertEqual(metadata.get_replicas_for_keys("ks", [b'a', b'b']), [[], []])
+
+        metadata.token_map = TokenMap(Murmur3Token, dict(zip(tokens, hosts)), tokens, metadata)
+        keys = [six.b(str(i)) for i in range(100)] + [tokens[0]]
+        self.assertEqual(metadata.get_replicas_for_keys("ks", keys),
+                         [metadata.get_replicas("ks", key) for key in keys])
+        self.assertEqual(len(set(tuple(r) for r in metadata.get_replicas_for_keys("ks", keys))), 3)
+
+    def test_update_token_map(self):
+        metadata = Metadata()
+        metadata.keyspaces['simple'] = KeyspaceMetadata("simple", True, "SimpleStrategy", {"replication_factor": "3"})
+        metadata.keyspaces['nts'] = KeyspaceMetadata("nts", True, "NetworkTopologyStrategy", {"dc1": "3", "dc2": "2"})
+        metadata.keyspaces['nts2'] = KeyspaceMetadata("nts2", True, "NetworkTopologyStrategy", {"dc1": "3", "dc2": "2"})
+
+        hosts = [Host("10.0.0.%d" % i, SimpleConvictionPolicy) for i in range(12)]
+        for i, host in enumerate(hosts):
+            host.set_location_info("dc%d" % (i % 2 + 1), "rack%d" % (i % 3))
+        host_tokens = dict((host, [str(i + 12 * v) for v in range(8)]) for i, host in enumerate(hosts[:-1]))
+
+        def check(token_map):
+            fresh = Metadata()
+            fresh.keyspaces = metadata.keyspaces
+            fresh.rebuild_token_map("Murmur3Partitioner", token_map)
+            for keyspace in metadata.keyspaces:
+                ks_meta = metadata.keyspaces[keyspace]
+                self.assertEqual(dict(metadata.token_map.replica_map_for_keyspace(ks_meta)),
+                                 dict(fresh.token_map.replica_map_for_keyspace(ks_meta)))
+                for token in fresh.token_map.ring:
+                    self.assertEqual(metadata.get_replicas(keyspace, token), fresh.get_replicas(keyspace, token))
+
+        metadata.rebuild_token_map("Murmur3Partitioner", host_tokens)
+        for keyspace in metadata.keyspaces:
+            metadata.get_replicas(keyspace, Murmur3Token(0))
+        tokens_to_hosts = metadata.token_map.tokens_to_hosts_by_ks
+        # keyspaces with the same replication share their maps
+        self.assertIs(tokens_to_hosts['nts'], tokens_to_hosts['nts2'])
+
+        # a node joins
+        host_tokens[hosts[-1]] = ["59", "23"]
+        metadata.rebuild_token_map("Murmur3Partitioner", host_tokens)
+        check(host_tokens)
+        # ranges away from the new tokens are kept
+        self.assertIs(metadata.token_map.tokens_to_hosts_by_ks['simple'][Murmur3Token(80)],
+                      tokens_to_hosts['simple'][Murmur3Token(80)])
+
+        # a node leaves, and one moves a token
+        del host_tokens[hosts[3]]
+        host_tokens[hosts[4]] = host_tokens[hosts[4]][1:] + ["1000"]
+        metadata.rebuild_token_map("Murmur3Partitioner", host_tokens)
+        check(host_tokens)
+
+        # a node changes racks
+        hosts[5].set_location_info("dc2", "rack9")
+        metadata.rebuild_token_map("Murmur3Partitioner", host_tokens)
+        self.assertEqual(metadata.token_map.tokens_to_hosts_by_ks, {})
+        check(host_tokens)
+
     def test_murmur3_tokens(self):
         self._get_replicas(Murmur3Token)
 
@@ -0,0 +1,133 @@
+# Copyright DataStax, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest  # noqa
+
+from mock import Mock
+from threading import Thread, current_thread
+
+from cassandra.metrics import HistogramMetrics, MetricsExporter
+from cassandra.policies import SimpleConvictionPolicy
+from cassandra.pool import Host
+
+
+class HistogramMetricsTest(unittest.TestCase):
+
+    def make_metrics(self):
+        cluster = Mock()
+        cluster.metadata.all_hosts.return_value = [Mock(), Mock()]
+        pool = Mock(open_count=2, in_flight=5)
+        cluster.sessions = [Mock(_pools={'host': pool})]
+        return HistogramMetrics(cluster)
+
+    def test_merges_threads(self):
+        metrics = self.make_metrics()
+        host = Host('127.0.0.1', SimpleConvictionPolicy)
+
+        def record():
+            for i in range(1, 101):
+                metrics.on_request(i / 1000.0, host, 'analytics')
+            metrics.on_retry()
+            metrics.on_pool_borrow(0.001, host)
+            metrics.on_queue_wait(0.002)
+
+        threads = [Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics.on_request(0.5)
+
+        stats = metrics.get_stats()
+        # the stats of ended threads are folded together
+        self.assertEqual([thread for thread, _ in metrics._thread_stats], [current_thread()])
+        self.assertEqual(stats['request_timer']['count'], 401)
+        self.assertAlmostEqual(stats['request_timer']['median'], 0.05, delta=0.004)
+        self.assertAlmostEqual(stats['request_timer']['max'], 0.5, delta=0.03)
+        self.assertAlmostEqual(stats['request_timer']['min'], 0.001, delta=0.0001)
+        self.assertEqual(stats['host_request_timers']['127.0.0.1']['count'], 400)
+        self.assertEqual(stats['profile_request_timers']['analytics']['count'], 400)
+        self.assertEqual(stats['pool_borrow_timer']['count'], 4)
+        self.assertEqual(stats['queue_wait_timer']['count'], 4)
+        self.assertEqual(stats['retries'], 4)
+        self.assertEqual(stats['connection_errors'], 0)
+
+        self.assertEqual(stats['known_hosts'], 2)
+        self.assertEqual(stats['connected_to'], 1)
+        self.assertEqual(stats['open_connections'], 2)
+        self.assertEqual(stats['in_flight'], 5)
+
+    def test_ended_threads(self):
+        metrics = self.make_metrics()
+        for _ in range(3):
+            thread = Thread(target=metrics.on_request, args=(0.01,))
+            thread.start()
+            thread.join()
+            thread = Thread(target=metrics.on_retry)
+            thread.start()
+            thread.join()
+
+        # each new thread sweeps the ended ones
+        self.assertEqual(len(metrics._thread_stats), 1)
+        stats = metrics.get_stats()
+        self.assertEqual(metrics._thread_stats, [])
+        self.assertEqual(stats['request_timer']['count'], 3)
+        self.assertEqual(stats['retries'], 3)
+        self.assertEqual(metrics.get_stats()['retries'], 3)
+
+    def test_no_requests(self):
+        stats = self.make_metrics().get_stats()
+        self.assertEqual(stats['request_timer'], {'count': 0})
+        self.assertEqual(stats['host_request_timers'], {})
+        self.assertEqual(stats['phase_timers'], {})
+
+    def test_request_phases(self):
+        metrics = self.make_metrics()
+        metrics.on_request_phases({'encode': 0.001, 'server': 0.01})
+        metrics.on_request_phases({'encode': 0.003, 'server': 0.03, 'decode': 0.002})
+
+        phase_timers = metrics.get_stats()['phase_timers']
+        self.assertEqual(sorted(phase_timers), ['decode', 'encode', 'server'])
+        self.assertEqual(phase_timers['encode']['count'], 2)
+        self.assertEqual(phase_timers['decode']['count'], 1)
+        self.assertAlmostEqual(phase_timers['server']['max'], 0.03, delta=0.002)
+
+    def test_exporters(self):
+        metrics = self.make_metrics()
+        exporter = Mock(spec=MetricsExporter)
+        metrics.add_exporter(exporter, interval=10)
+        metrics._cluster.scheduler.schedule.assert_called_once_with(
+            10, metrics._export_periodically, exporter, 10)
+
+        metrics.on_other_error()
+        metrics._export_periodically(exporter, 10)
+        self.assertEqual(exporter.export.call_args[0][0]['other_errors'], 1)
+        self.assertEqual(metrics._cluster.scheduler.schedule.call_count, 2)
+
+        # errors from exporters are logged, and do not stop other exporters
+        failing = Mock(spec=MetricsExporter)
+        failing.export.side_effect = ValueError()
+        metrics.add_exporter(failing, interval=None)
+        metrics.export()
+        self.assertEqual(exporter.export.call_count, 2)
+        self.assertEqual(failing.export.call_count, 1)
+
+        # removed exporters are not rescheduled
+        metrics.remove_exporter(exporter)
+        metrics._export_periodically(exporter, 10)
+        self.assertEqual(exporter.export.call_count, 2)
+        self.assertEqual(metrics._cluster.scheduler.schedule.call_count, 2)
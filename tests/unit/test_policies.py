@@ -35,7 +35,8 @@ from cassandra.policies import (RoundRobinPolicy, WhiteListRoundRobinPolicy, DCA
                                 RetryPolicy, WriteType,
                                 DowngradingConsistencyRetryPolicy, ConstantReconnectionPolicy,
                                 LoadBalancingPolicy, ConvictionPolicy, ReconnectionPolicy, FallthroughRetryPolicy,
-                                IdentityTranslator, EC2MultiRegionTranslator, HostFilterPolicy)
+                                IdentityTranslator, EC2MultiRegionTranslator, HostFilterPolicy,
+                                LatencyAwarePolicy, PercentileSpeculativeExecutionPolicy)
 from cassandra.pool import Host
 from cassandra.query import Statement
 
@@ -800,6 +801,47 @@ class TokenAwarePolicyTest(unittest.TestCase):
             child_policy.make_query_plan.assert_called_once_with(keyspace, query)
             self.assertEqual(patched_shuffle.call_count, 1)
 
+    @patch('cassandra.policies.shuffle')
+    def test_power_of_two_choices(self, patched_shuffle):
+        hosts = [Host(str(i), SimpleConvictionPolicy) for i in range(5)]
+        for host in hosts:
+            host.set_up()
+        replicas = hosts[:3]
+
+        cluster = Mock(spec=Cluster)
+        cluster.metadata = Mock(spec=Metadata)
+        cluster.metadata.get_replicas.return_value = replicas
+        pools = dict((host, Mock(in_flight=0)) for host in hosts)
+        session = Mock(_pools=pools)
+        cluster.sessions = [session, Mock(_pools={})]
+
+        child_policy = Mock()
+        child_policy.make_query_plan.return_value = hosts
+        child_policy.distance.return_value = HostDistance.LOCAL
+
+        policy = TokenAwarePolicy(child_policy, power_of_two_choices=True)
+        policy.populate(cluster, hosts)
+        cluster.register_latency_tracker.assert_called_once_with(policy)
+
+        query = Statement(routing_key='routing_key')
+
+        # shuffle is patched, so the first two replicas are compared
+        self.assertEqual(list(policy.make_query_plan('keyspace', query)), hosts)
+        pools[hosts[0]].in_flight = 10
+        self.assertEqual(list(policy.make_query_plan('keyspace', query)),
+                         [hosts[1], hosts[0], hosts[2]] + hosts[3:])
+        self.assertEqual(patched_shuffle.call_count, 2)
+
+        # with latencies, in flight requests are weighted by them
+        policy.on_latency(hosts[0], query, 0.001)
+        policy.on_latency(hosts[1], query, 0.1)
+        self.assertEqual(list(policy.make_query_plan('keyspace', query)), hosts)
+
+        # replicas that are down are skipped
+        hosts[1].set_down()
+        self.assertEqual(list(policy.make_query_plan('keyspace', query)),
+                         [hosts[2], hosts[0]] + hosts[3:])
+
 
 class ConvictionPolicyTest(unittest.TestCase):
     def test_not_implemented(self):
@@ -1474,3 +1516,144 @@ class HostFilterPolicyQueryPlanTest(unittest.TestCase):
         self.assertEqual(set(query_plan), {Host("127.0.0.1", SimpleConvictionPolicy),
                                            Host("127.0.0.4", SimpleConvictionPolicy)})
 
+
+class LatencyAwarePolicyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.hosts = [Host("127.0.0.{}".format(i), SimpleConvictionPolicy) for i in range(1, 4)]
+        for host in self.hosts:
+            host.set_up()
+        self.cluster = Mock(spec=Cluster)
+        child_policy = Mock(make_query_plan=Mock(side_effect=lambda *args: list(self.hosts)))
+        self.policy = LatencyAwarePolicy(child_policy, min_measured=3)
+        self.policy.populate(self.cluster, self.hosts)
+
+    def record(self, host, latency, count, now):
+        with patch('cassandra.policies.time') as patched_time:
+            for i in range(count):
+                patched_time.time.return_value = now + i
+                self.policy.on_latency(host, None, latency)
+
+    def query_plan(self, now):
+        with patch('cassandra.policies.time') as patched_time:
+            patched_time.time.return_value = now
+            return list(self.policy.make_query_plan())
+
+    def test_populate(self):
+        self.cluster.register_latency_tracker.assert_called_once_with(self.policy)
+        self.policy._child_policy.populate.assert_called_once_with(self.cluster, self.hosts)
+
+    def test_slow_host_moved_to_end(self):
+        fast, slow, other = self.hosts
+        self.assertEqual(self.query_plan(100), self.hosts)
+
+        self.record(fast, 0.001, 3, 100)
+        self.record(slow, 0.5, 3, 100)
+        self.assertAlmostEqual(self.policy.host_latency(slow), 0.5)
+        self.assertIsNone(self.policy.host_latency(other))
+        self.assertEqual(self.query_plan(103), [fast, other, slow])
+
+        # a slow host is used normally once it recovers
+        self.record(slow, 0.001, 5, 104)
+        self.assertEqual(self.query_plan(109), self.hosts)
+
+    def test_not_enough_measurements(self):
+        fast, slow, other = self.hosts
+        self.record(fast, 0.001, 3, 100)
+        self.record(slow, 0.5, 2, 100)
+        self.assertEqual(self.query_plan(103), self.hosts)
+
+    def test_retry_period(self):
+        fast, slow, other = self.hosts
+        self.record(fast, 0.001, 3, 100)
+        self.record(slow, 0.5, 3, 100)
+        self.assertEqual(self.query_plan(103), [fast, other, slow])
+
+        # without recent latencies, the slow host is tried again
+        self.assertEqual(self.query_plan(103 + self.policy.retry_period), self.hosts)
+
+    def test_removed_host(self):
+        fast, slow, other = self.hosts
+        self.record(slow, 0.5, 3, 100)
+        self.policy.on_remove(slow)
+        self.assertIsNone(self.policy.host_latency(slow))
+        self.policy._child_policy.on_remove.assert_called_once_with(slow)
+
+
+class PercentileSpeculativeExecutionPolicyTest(unittest.TestCase):
+
+    def make_bound_statement(self, query_id):
+        return Mock(prepared_statement=Mock(query_id=query_id))
+
+    def test_bad_vals(self):
+        self.assertRaises(ValueError, PercentileSpeculativeExecutionPolicy, percentile=0)
+        self.assertRaises(ValueError, PercentileSpeculativeExecutionPolicy, percentile=100)
+
+    def test_delay_follows_percentile(self):
+        policy = PercentileSpeculativeExecutionPolicy(percentile=90, max_attempts=2, budget=1, min_samples=10)
+        query = Statement()
+
+        # no speculative executions without enough latencies
+        self.assertEqual(policy.new_plan('ks', query).next_execution(None), -1)
+
+        for i in range(1, 11):
+            policy.on_latency(None, query, i / 100.0)
+        policy._delays.clear()
+        plan = policy.new_plan('ks', query)
+        delay = plan.next_execution(None)
+        self.assertAlmostEqual(delay, 0.09, delta=0.006)
+        self.assertEqual(plan.next_execution('host'), delay)
+        self.assertEqual(plan.next_execution('host'), -1)
+
+        # latencies of internal requests are ignored
+        policy.on_latency(None, None, 10)
+        self.assertEqual(policy._current.latencies.count, 10)
+
+    def test_prepared_statement_latencies(self):
+        policy = PercentileSpeculativeExecutionPolicy(budget=1, min_samples=10)
+        fast, slow = self.make_bound_statement(b'fast'), self.make_bound_statement(b'slow')
+        for i in range(10):
+            policy.on_latency(None, fast, 0.001)
+            policy.on_latency(None, slow, 0.5)
+
+        self.assertAlmostEqual(policy.new_plan('ks', fast).next_execution(None), 0.001, delta=0.0001)
+        self.assertAlmostEqual(policy.new_plan('ks', slow).next_execution(None), 0.5, delta=0.03)
+        # statements without enough latencies of their own use all latencies
+        self.assertAlmostEqual(policy.new_plan('ks', self.make_bound_statement(b'new')).next_execution(None),
+                               0.5, delta=0.03)
+
+    def test_budget(self):
+        policy = PercentileSpeculativeExecutionPolicy(budget=0.5, min_samples=1)
+        query = Statement()
+        policy.on_latency(None, query, 0.01)
+
+        first, second = policy.new_plan('ks', query), policy.new_plan('ks', query)
+        self.assertGreater(first.next_execution(None), 0)
+        # the speculative execution of the first plan is sent
+        self.assertEqual(first.next_execution('host'), -1)
+        self.assertEqual(policy._current.speculative_executions, 1)
+
+        self.assertEqual(second.next_execution(None), -1)
+        policy.new_plan('ks', query)
+        self.assertGreater(policy.new_plan('ks', query).next_execution(None), 0)
+
+    def test_window(self):
+        with patch('cassandra.policies.time') as patched_time:
+            patched_time.time.return_value = 0
+            policy = PercentileSpeculativeExecutionPolicy(budget=1, min_samples=1, window=10)
+            query = Statement()
+            policy.on_latency(None, query, 0.01)
+
+            # latencies are kept for between half the window and the window
+            patched_time.time.return_value = 5
+            policy.on_latency(None, query, 0.02)
+            self.assertEqual(policy._previous.latencies.count, 1)
+            self.assertAlmostEqual(policy.new_plan('ks', query).next_execution(None), 0.02, delta=0.002)
+
+            patched_time.time.return_value = 10
+            self.assertAlmostEqual(policy.new_plan('ks', query).next_execution(None), 0.02, delta=0.002)
+            self.assertEqual(policy._previous.latencies.count, 1)
+            self.assertEqual(policy._current.latencies.count, 0)
+
+            patched_time.time.return_value = 15
+            self.assertEqual(policy.new_plan('ks', query).next_execution(None), -1)
@@ -3,11 +3,17 @@ try:
 except ImportError:
     import unittest # noqa
 
+import copy
+import pickle
+
 from mock import Mock
-from cassandra import ProtocolVersion, UnsupportedOperation
+from six import BytesIO
+from cassandra import ProtocolVersion, UnsupportedOperation, DriverException
 from cassandra.protocol import (PrepareMessage, QueryMessage, ExecuteMessage,
-                                BatchMessage)
-from cassandra.query import SimpleStatement, BatchType
+                                BatchMessage, ResultMessage, ProtocolHandler,
+                                EncodedRows, EncodedRowsProtocolHandler, RESULT_KIND_ROWS,
+                                write_int, write_short, write_string, write_value)
+from cassandra.query import SimpleStatement, BatchType, LazyRow, lazy_row_factory, named_tuple_factory
 
 class MessageTest(unittest.TestCase):
 
@@ -48,6 +54,23 @@ class MessageTest(unittest.TestCase):
                                (b'\x00\x04',),
                                (b'\x00\x00\x00\x01',), (b'\x00\x00',)])
 
+    def test_execute_message_prefix_cache(self):
+        cache = {}
+        for protocol_version in (4, 5):
+            for values in ([b'a'], [b'bc'], [None]):
+                message = ExecuteMessage('1', values, 4, fetch_size=10, result_metadata_id='foo')
+                cached = ExecuteMessage('1', values, 4, fetch_size=10, result_metadata_id='foo', prefix_cache=cache)
+                expected, actual = BytesIO(), BytesIO()
+                message.send_body(expected, protocol_version)
+                cached.send_body(actual, protocol_version)
+                self.assertEqual(expected.getvalue(), actual.getvalue())
+        self.assertEqual(len(cache), 2)
+
+        # a different consistency level or metadata id gets its own prefix
+        ExecuteMessage('1', [], 1, fetch_size=10, result_metadata_id='foo', prefix_cache=cache).send_body(BytesIO(), 5)
+        ExecuteMessage('1', [], 4, fetch_size=10, result_metadata_id='bar', prefix_cache=cache).send_body(BytesIO(), 5)
+        self.assertEqual(len(cache), 4)
+
     def test_query_message(self):
         """
         Test to check the appropriate calls are made
@@ -172,3 +195,70 @@ class MessageTest(unittest.TestCase):
              (b'\x00\x03',),
              (b'\x00\x00\x00\x80',), (b'\x00\x02',), (b'ks',))
         )
+
+
+class EncodedRowsTest(unittest.TestCase):
+
+    def make_rows_body(self, rows):
+        body = BytesIO()
+        write_int(body, RESULT_KIND_ROWS)
+        write_int(body, 0x0001)  # global table spec
+        write_int(body, 3)
+        write_string(body, 'ks')
+        write_string(body, 'tbl')
+        for name, type_code in (('id', 0x0009), ('name', 0x000D), ('Total Count', 0x0009)):
+            write_string(body, name)
+            write_short(body, type_code)
+        write_int(body, len(rows))
+        for row in rows:
+            for value in row:
+                write_value(body, value)
+        return body.getvalue()
+
+    def decode(self, protocol_handler, rows):
+        message = protocol_handler.decode_message(4, {}, 0, 0, ResultMessage.opcode,
+                                                  self.make_rows_body(rows), None, None)
+        return message.results
+
+    def test_lazy_rows(self):
+        encoded = [(b'\x00\x00\x00\x01', b'a', b'\x00\x00\x00\x02'),
+                   (b'\x00\x00\x00\x03', None, b''),
+                   (b'\x00\x00\x00\x04', b'', b'\x00')]
+        colnames, rows = self.decode(EncodedRowsProtocolHandler, encoded)
+        self.assertIsInstance(rows, EncodedRows)
+        self.assertEqual(len(rows), 3)
+
+        lazy_rows = lazy_row_factory(colnames, rows)
+        self.assertEqual(lazy_rows[0], (1, u'a', 2))
+        self.assertEqual(lazy_rows[0].id, 1)
+        self.assertEqual(lazy_rows[0]['name'], u'a')
+        self.assertEqual(lazy_rows[0].Total_Count, 2)
+        self.assertEqual(lazy_rows[0]['Total Count'], 2)
+        self.assertEqual(lazy_rows[0][-1], 2)
+        self.assertEqual(lazy_rows[0][1:], (u'a', 2))
+        self.assertEqual(lazy_rows[0]._fields, ('id', 'name', 'Total_Count'))
+        self.assertEqual(list(lazy_rows[0]._asdict().items()), [('id', 1), ('name', u'a'), ('Total_Count', 2)])
+        self.assertRaises(AttributeError, getattr, lazy_rows[0], 'missing')
+        self.assertRaises(IndexError, lazy_rows[0].__getitem__, 3)
+        self.assertEqual(lazy_rows[1], (3, None, None))
+
+        # the invalid int is only decoded when it is read
+        self.assertEqual(lazy_rows[2].name, u'')
+        self.assertRaises(DriverException, getattr, lazy_rows[2], 'Total_Count')
+
+        # values are cached once decoded
+        self.assertIs(lazy_rows[0].name, lazy_rows[0].name)
+
+        # same values as the default protocol handler
+        colnames, decoded = self.decode(ProtocolHandler, encoded[:2])
+        self.assertEqual(lazy_row_factory(colnames, decoded), named_tuple_factory(colnames, decoded))
+
+    def test_lazy_rows_copy(self):
+        colnames, rows = self.decode(EncodedRowsProtocolHandler, [(b'\x00\x00\x00\x01', b'a', None)])
+        row = lazy_row_factory(colnames, rows)[0]
+
+        for copied in (copy.copy(row), copy.deepcopy(row), pickle.loads(pickle.dumps(row))):
+            self.assertEqual(copied, (1, u'a', None))
+            self.assertEqual(copied.Total_Count, None)
+            self.assertIsNone(copied._rows)
+        self.assertFalse(hasattr(LazyRow.__new__(LazyRow), 'id'))
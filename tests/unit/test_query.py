@@ -19,7 +19,9 @@ except ImportError:
 
 import six
 
-from cassandra.query import BatchStatement, SimpleStatement
+from cassandra import query
+from cassandra.query import (BatchStatement, SimpleStatement, named_tuple_factory,
+                             compact_row_factory, CompactRow)
 
 
 class BatchStatementTest(unittest.TestCase):
@@ -73,3 +75,42 @@ class BatchStatementTest(unittest.TestCase):
             batch.add_all(statements=['%s'] * n,
                           parameters=[(i,) for i in range(n)])
             self.assertEqual(len(batch), n)
+
+
+class RowFactoryTest(unittest.TestCase):
+
+    colnames = ("name", "func(abc)", "[applied]", "class", "_x")
+    rows = [(u'a', 1, True, 2, 3), (u'b', 4, False, 5, 6)]
+
+    def test_named_tuple_class_cached(self):
+        first = named_tuple_factory(self.colnames, self.rows)
+        second = named_tuple_factory(list(self.colnames), self.rows[1:])
+        self.assertIs(type(first[0]), type(second[0]))
+        self.assertEqual(second[0], self.rows[1])
+        self.assertIsNot(type(named_tuple_factory(self.colnames[:2], [])), type(first[0]))
+
+    def test_row_class_cache_bounded(self):
+        self.addCleanup(setattr, query, '_ROW_CLASS_CACHE_SIZE', query._ROW_CLASS_CACHE_SIZE)
+        query._ROW_CLASS_CACHE_SIZE = 3
+        for i in range(10):
+            named_tuple_factory(['c%d' % i], [(i,)])
+            self.assertLessEqual(len(query._named_tuple_classes), 3)
+
+    def test_compact_rows(self):
+        rows = compact_row_factory(self.colnames, self.rows)
+        row = rows[0]
+        self.assertIsInstance(row, CompactRow)
+        self.assertFalse(hasattr(row, '__dict__'))
+        self.assertEqual(row._fields, ('name', 'func_abc', 'applied', 'field_3_', 'x'))
+        self.assertEqual((row.name, row.func_abc, row.applied, row.field_3_, row.x), self.rows[0])
+        self.assertEqual(row, self.rows[0])
+        self.assertEqual(tuple(row), self.rows[0])
+        self.assertEqual(row[1], 1)
+        self.assertEqual(row[-1], 3)
+        self.assertEqual(row[1:3], (1, True))
+        self.assertEqual(len(row), 5)
+        self.assertEqual(list(row._asdict().keys()), list(row._fields))
+        self.assertNotEqual(row, rows[1])
+        self.assertEqual(repr(rows[1]), "Row(name=%r, func_abc=4, applied=False, field_3_=5, x=6)" % (u'b',))
+
+        self.assertIs(type(compact_row_factory(self.colnames, self.rows)[0]), type(row))
@@ -17,10 +17,18 @@ try:
 except ImportError:
     import unittest # noqa
 
+from concurrent.futures import Future
 from mock import Mock, MagicMock, ANY
+from threading import Thread
+import time
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None  # noqa
 
 from cassandra import ConsistencyLevel, Unavailable, SchemaTargetType, SchemaChangeType
-from cassandra.cluster import Session, ResponseFuture, NoHostAvailable, ProtocolVersion
+from cassandra.cluster import Session, ResponseFuture, NoHostAvailable, ProtocolVersion, QueryExhausted
 from cassandra.connection import Connection, ConnectionException
 from cassandra.protocol import (ReadTimeoutErrorMessage, WriteTimeoutErrorMessage,
                                 UnavailableErrorMessage, ResultMessage, QueryMessage,
@@ -539,3 +547,180 @@ class ResponseFutureTests(unittest.TestCase):
         rf._query = Mock(return_value=True)
         rf._execute_after_prepare('host', None, None, response)
         rf._query.assert_called_once_with('host')
+
+    @unittest.skipIf(asyncio is None, "asyncio is not available")
+    def test_asyncio_future(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        session = self.make_session()
+        rf = self.make_response_future(session)
+        rf.send_request()
+
+        future = rf._asyncio_future(loop)
+        self.assertFalse(future.done())
+
+        # completed from another thread, like the reactor
+        response = self.make_mock_response([{'col': 'val'}])
+        t = Thread(target=rf._set_result, args=(None, None, None, response))
+        t.start()
+        t.join()
+        self.assertEqual(loop.run_until_complete(future), [{'col': 'val'}])
+
+        # already completed; resolved immediately on the running loop
+        futures = []
+        loop.call_soon(lambda: futures.append(rf._asyncio_future(loop)))
+        loop.run_until_complete(asyncio.sleep(0))
+        self.assertTrue(futures[0].done())
+        self.assertEqual(futures[0].result(), [{'col': 'val'}])
+
+    @unittest.skipIf(asyncio is None, "asyncio is not available")
+    def test_asyncio_future_error(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        session = self.make_session()
+        rf = self.make_response_future(session)
+        rf.send_request()
+
+        future = rf._asyncio_future(loop)
+        exc = Exception("failed")
+        loop.call_soon(rf._set_final_exception, exc)
+        self.assertRaises(Exception, loop.run_until_complete, future)
+        self.assertIs(future.exception(), exc)
+
+    def make_page_response(self, page, paging_state):
+        return Mock(spec=ResultMessage, kind=RESULT_KIND_ROWS, results=['col', [page]],
+                    paging_state=paging_state, col_types=None)
+
+    def test_read_ahead(self):
+        session = self.make_session()
+        rf = self.make_response_future(session)
+        rf.prefetch_pages = 2
+        rf.send_request()
+
+        # the first page starts the next request right away
+        rf._set_result(None, None, None, self.make_page_response(0, 'p1'))
+        self.assertEqual(rf.result().current_rows, ['col', [0]])
+        self.assertEqual(len(rf._read_ahead), 1)
+        first = rf._read_ahead[0]
+        self.assertEqual(first.message.paging_state, 'p1')
+        self.assertIsNone(rf.message.paging_state)
+
+        # each page read ahead requests the following one, up to prefetch_pages
+        first._set_result(None, None, None, self.make_page_response(1, 'p2'))
+        self.assertEqual(len(rf._read_ahead), 2)
+        second = rf._read_ahead[1]
+        self.assertEqual(second.message.paging_state, 'p2')
+        second._set_result(None, None, None, self.make_page_response(2, 'p3'))
+        self.assertEqual(len(rf._read_ahead), 2)
+
+        # consuming a buffered page makes room for another
+        rf.start_fetching_next_page()
+        self.assertEqual(rf.result().current_rows, ['col', [1]])
+        self.assertEqual(rf._paging_state, 'p2')
+        self.assertEqual(len(rf._read_ahead), 2)
+        third = rf._read_ahead[1]
+        self.assertEqual(third.message.paging_state, 'p3')
+
+        rf.start_fetching_next_page()
+        self.assertEqual(rf.result().current_rows, ['col', [2]])
+
+        # the last page is still in flight
+        rf.start_fetching_next_page()
+        self.assertFalse(rf._event.is_set())
+        third._set_result(None, None, None, self.make_page_response(3, None))
+        self.assertEqual(rf.result().current_rows, ['col', [3]])
+        self.assertFalse(rf.has_more_pages)
+        self.assertEqual(len(rf._read_ahead), 0)
+        self.assertRaises(QueryExhausted, rf.start_fetching_next_page)
+
+    def test_read_ahead_error(self):
+        session = self.make_session()
+        rf = self.make_response_future(session)
+        rf.prefetch_pages = 1
+        rf.send_request()
+
+        rf._set_result(None, None, None, self.make_page_response(0, 'p1'))
+        page_future = rf._read_ahead[0]
+        page_future._set_final_exception(Unavailable("unavailable"))
+        self.assertEqual(len(rf._read_ahead), 1)
+
+        rf.start_fetching_next_page()
+        self.assertRaises(Unavailable, rf.result)
+
+    def test_decoding_rows(self):
+        session = self.make_session()
+        session.submit.side_effect = lambda fn, *args, **kwargs: fn(*args, **kwargs)
+        rf = self.make_response_future(session)
+        rf.send_request()
+
+        # rows still being decoded by a DecodeProcessPool arrive as a Future
+        decoding = Future()
+        rf._set_result(None, None, None, self.make_mock_response(['col', decoding]))
+        self.assertFalse(rf.has_more_pages)
+        self.assertFalse(rf._event.is_set())
+        self.assertFalse(session.submit.called)
+
+        # the page is delivered by the executor, not the thread which decoded it
+        decoding.set_result([1, 2])
+        session.submit.assert_called_once_with(rf._set_decoded_rows, 'col', decoding)
+        self.assertEqual(rf.result().current_rows, ['col', [1, 2]])
+
+        rf = self.make_response_future(session)
+        rf.send_request()
+        decoding = Future()
+        rf._set_result(None, None, None, self.make_mock_response(['col', decoding]))
+        decoding.set_exception(ValueError("invalid"))
+        self.assertRaises(ValueError, rf.result)
+
+    def test_latency_trackers(self):
+        session = self.make_session()
+        tracker = Mock()
+        query = SimpleStatement("SELECT * FROM foo")
+        message = QueryMessage(query=query, consistency_level=ConsistencyLevel.ONE)
+        rf = ResponseFuture(session, message, query, 1, latency_trackers=(tracker,))
+        rf.send_request()
+
+        rf._set_result('ip1', None, None, self.make_mock_response([{'col': 'val'}]))
+        tracker.on_latency.assert_called_once_with('ip1', query, ANY)
+        self.assertGreaterEqual(tracker.on_latency.call_args[0][2], 0)
+
+        # errors returned without doing the work are not reported
+        tracker.reset_mock()
+        rf = ResponseFuture(session, message, query, 1, latency_trackers=(tracker,))
+        rf.send_request()
+        rf._set_result('ip1', None, None, Mock(spec=UnavailableErrorMessage, info={}))
+        self.assertFalse(tracker.on_latency.called)
+
+    def test_phase_timings(self):
+        session = self.make_basic_session()
+        session.cluster._default_load_balancing_policy.make_query_plan.return_value = ['ip1', 'ip2']
+        pool = session._pools.get.return_value
+        pool.is_shutdown = False
+        connection = Mock(spec=Connection)
+        pool.borrow_connection.return_value = (connection, 1)
+
+        query = SimpleStatement("SELECT * FROM foo")
+        message = QueryMessage(query=query, consistency_level=ConsistencyLevel.ONE)
+        metrics = Mock()
+        rf = ResponseFuture(session, message, query, 1, metrics=metrics)
+        self.assertIsNone(rf.phase_timings)
+        rf._attempt_phases = {}
+        rf.send_request()
+
+        timings = connection.send_msg.call_args[1]['timings']
+        self.assertEqual(sorted(timings), ['borrow_start', 'borrowed', 'start'])
+        # stamped by the connection
+        for name in ('encoded', 'received', 'decoded'):
+            timings[name] = time.time()
+
+        callback = Mock()
+        rf.add_callback(callback)
+        rf._set_result('ip1', None, None, self.make_mock_response([{'col': 'val'}]))
+        callback.assert_called_once_with(ANY)
+
+        phases = rf.phase_timings
+        self.assertEqual(sorted(phases), ['callbacks', 'decode', 'encode', 'pool_borrow',
+                                          'queue_wait', 'result', 'server'])
+        for seconds in phases.values():
+            self.assertGreaterEqual(seconds, 0)
+        metrics.on_request_phases.assert_called_once_with(phases)
@@ -20,6 +20,11 @@ except ImportError:
 
 from mock import Mock, PropertyMock
 
+try:
+    import asyncio
+except ImportError:
+    asyncio = None  # noqa
+
 from cassandra.cluster import ResultSet
 
 
@@ -41,6 +46,39 @@ class ResultSetTests(unittest.TestCase):
         type(response_future).has_more_pages = PropertyMock(side_effect=(True, True, False))  # after init to avoid side effects being consumed by init
         self.assertListEqual(list(itr), expected)
 
+    @unittest.skipIf(asyncio is None, "asyncio is not available")
+    def test_async_iter_paged(self):
+        expected = list(range(10))
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        asyncio.set_event_loop(loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+
+        def page_future(*pages):
+            results = iter(pages)
+
+            def make_future(loop):
+                future = loop.create_future()
+                loop.call_soon(future.set_result, ResultSet(Mock(), next(results)))
+                return future
+            return make_future
+
+        response_future = Mock(has_more_pages=True)
+        # an empty page which is not the last one is skipped over
+        response_future._asyncio_future.side_effect = page_future(expected[5:7], [], expected[7:])
+        rs = ResultSet(response_future, expected[:5])
+        type(response_future).has_more_pages = PropertyMock(side_effect=(True, True, True, False))
+
+        itr = rs.__aiter__()
+        rows = []
+        while True:
+            try:
+                rows.append(loop.run_until_complete(itr.__anext__()))
+            except StopAsyncIteration:  # noqa
+                break
+        self.assertListEqual(rows, expected)
+        self.assertEqual(response_future.start_fetching_next_page.call_count, 3)
+
     def test_list_non_paged(self):
         # list access on RS for backwards-compatibility
         expected = list(range(10))
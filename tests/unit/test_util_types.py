@@ -18,7 +18,7 @@ except ImportError:
 
 import datetime
 
-from cassandra.util import Date, Time, Duration
+from cassandra.util import Date, Time, Duration, LatencyHistogram
 
 
 class DateTests(unittest.TestCase):
@@ -206,4 +206,39 @@ class DurationTests(unittest.TestCase):
         self.assertEqual(str(Duration(52, 23, 564564)), "52mo23d564564ns")
 
 
-
+class LatencyHistogramTests(unittest.TestCase):
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(99))
+
+        for i in range(1, 1001):
+            histogram.add(i / 1000.0)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.mean(), 0.5005)
+        for percentile, expected in ((50, 0.5), (95, 0.95), (99, 0.99), (100, 1.0)):
+            value = histogram.percentile(percentile)
+            self.assertGreaterEqual(value, expected)
+            self.assertLessEqual(value, expected * 1.07)
+
+    def test_small_values(self):
+        histogram = LatencyHistogram()
+        for latency in (0, 0.000001, 0.00002):
+            histogram.add(latency)
+        self.assertEqual(histogram.percentile(1), 0)
+        self.assertEqual(histogram.percentile(50), 0.000001)
+        self.assertEqual(histogram.percentile(100), 0.00002)
+
+    def test_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.add(0.001)
+        second.add(0.1)
+        second.add(0.2)
+        first.merge(second)
+        self.assertEqual(first.count, 3)
+        self.assertAlmostEqual(first.percentile(100), 0.2, delta=0.01)
+        self.assertAlmostEqual(first.percentile(30), 0.001, delta=0.0001)
+
+        first.clear()
+        self.assertEqual(first.count, 0)
+        self.assertIsNone(first.percentile(50))